@@ -7,6 +7,26 @@ const char* password = "YourPass";    // <- placeholder
 const char* mqtt_server = "192.168.1.100"; // MQTT broker IP (Raspberry Pi)
 // =======================
 
+// === PAYLOAD FORMAT ===
+// Binary batches (see code/raspberrypi/distance_protocol.py): BATCH_SIZE readings,
+// one every SAMPLE_INTERVAL_MS, are sent in a single MQTT message.
+// Set USE_BINARY_PAYLOAD to 0 to publish one ASCII reading every 500 ms instead.
+#define USE_BINARY_PAYLOAD 1
+#define SAMPLE_INTERVAL_MS 50   // 20 Hz
+#define BATCH_SIZE 10           // readings per message -> 2 messages/s
+
+const char* topic = "sensor/distance";
+const uint8_t PAYLOAD_MAGIC = 0xD5;
+const uint8_t PAYLOAD_VERSION = 1;
+const int HEADER_SIZE = 14;
+
+uint16_t batch[BATCH_SIZE];
+int batchCount = 0;
+uint32_t batchStartMs = 0;
+uint32_t batchSeq = 0;
+unsigned long lastSampleMs = 0;
+// =======================
+
 WiFiClient espClient;
 PubSubClient client(espClient);
 
@@ -35,11 +55,48 @@ void setup() {
 
 void loop() {
   if (!client.connected()) reconnectMQTT();
+  client.loop();
+#if USE_BINARY_PAYLOAD
+  unsigned long now = millis();
+  if (now - lastSampleMs < SAMPLE_INTERVAL_MS) return;
+  lastSampleMs = now;
+  measureDistance();
+  if (batchCount == 0) batchStartMs = now;
+  batch[batchCount++] = (uint16_t)distanceCm;
+  if (batchCount == BATCH_SIZE) {
+    publishBatch();
+    batchCount = 0;
+  }
+#else
   measureDistance();
   char buf[16];
   sprintf(buf, "%d", distanceCm);
-  client.publish("sensor/distance", buf);
+  client.publish(topic, buf);
   delay(500);
+#endif
+}
+
+// Little-endian helpers for the binary payload
+void putU16(uint8_t* p, uint16_t v) {
+  p[0] = v & 0xFF;
+  p[1] = v >> 8;
+}
+
+void putU32(uint8_t* p, uint32_t v) {
+  for (int i = 0; i < 4; i++) p[i] = (v >> (8 * i)) & 0xFF;
+}
+
+void publishBatch() {
+  uint8_t buf[HEADER_SIZE + 2 * BATCH_SIZE];
+  buf[0] = PAYLOAD_MAGIC;
+  buf[1] = PAYLOAD_VERSION;
+  buf[2] = batchCount;
+  buf[3] = 0;                        // flags, reserved
+  putU32(buf + 4, batchSeq++);
+  putU32(buf + 8, batchStartMs);     // millis() of the first reading
+  putU16(buf + 12, SAMPLE_INTERVAL_MS);
+  for (int i = 0; i < batchCount; i++) putU16(buf + HEADER_SIZE + 2 * i, batch[i]);
+  client.publish(topic, buf, HEADER_SIZE + 2 * batchCount);
 }
 
 void measureDistance() {
@@ -49,7 +106,8 @@ void measureDistance() {
   delayMicroseconds(10);
   digitalWrite(TRIG_PIN, LOW);
 
-  durationVal = pulseIn(ECHO_PIN, HIGH);
+  // 30 ms timeout (~5 m) so a missing echo can't stall the sampling loop for 1 s
+  durationVal = pulseIn(ECHO_PIN, HIGH, 30000);
   distanceCm = durationVal * 0.034 / 2;
   // clamp
   if (distanceCm < 0) distanceCm = 0;
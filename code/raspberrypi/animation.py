@@ -1,20 +1,50 @@
+#!/usr/bin/env python3
+"""
+Generate the distance-band animations used by display_controller_animation.py.
+
+One animation is rendered per distance band and per output size, both as a
+GIF and as a raw frame pack (see framepack.py) that the display memory-maps
+instead of decoding. Jobs run in a process pool, outputs whose parameters did
+not change are skipped (each job is hashed), and a manifest.json describing
+every animation is written next to them for the display to load.
+
+    python3 animation.py                      # default bands at 400x300
+    python3 animation.py --size 800x480 --size 1920x1080 --jobs 4
+    python3 animation.py --size 1920x1080 --pixel-format RGBX
+    python3 animation.py --legacy             # the original close/far GIFs
+"""
+
+import argparse
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
 
-# Make sure assets folder exists
-os.makedirs("assets", exist_ok=True)
+import framepack
+
+GENERATOR_VERSION = 2  # bump when the drawing code changes to invalidate old outputs
+ASSETS_DIR = "assets"
+MANIFEST_NAME = "manifest.json"
+LEGACY_NAMES = ("animation_close.gif", "animation_far.gif")
+FRAME_MS = 100
+
+# Upper bound of each band in cm; the last band has no upper bound
+BAND_EDGES = [10, 20, 30, 40, 50, 75, 100, 150, 200, 300, 500, None]
 
 # Try to load a nicer font, fall back to default if not found
+FONT_NAME = "arial.ttf"
 try:
-    font = ImageFont.truetype("arial.ttf", 40)
+    font = ImageFont.truetype(FONT_NAME, 40)
 except:
+    FONT_NAME = "default"
     font = ImageFont.load_default()
 
-def create_animated_gif(filename, bg_color, circle_color, text, expanding=True):
+def render_frames(bg_color, circle_color, text, expanding=True, size=(400, 300), num_frames=15):
     frames = []
-    width, height = 400, 300
-    max_radius = 100
-    num_frames = 15
+    width, height = size
+    max_radius = min(width, height) // 3
+    text_offset = width // 8
 
     for i in range(num_frames):
         img = Image.new("RGB", (width, height), bg_color)
@@ -24,22 +54,156 @@ def create_animated_gif(filename, bg_color, circle_color, text, expanding=True):
         progress = i / (num_frames - 1)
         radius = int(progress * max_radius) if expanding else int((1 - progress) * max_radius)
         draw.ellipse(
-            [(width//2 - radius, height//2 - radius), 
+            [(width//2 - radius, height//2 - radius),
              (width//2 + radius, height//2 + radius)],
             fill=circle_color
         )
 
         # Bouncing text
-        text_x = width // 2 - 50
+        text_x = width // 2 - text_offset
         text_y = int(height // 2 + (10 * (1 if i % 2 == 0 else -1)))
         draw.text((text_x, text_y), text, font=font, fill="white")
 
         frames.append(img)
+    return frames
+
+def create_animated_gif(filename, bg_color, circle_color, text, expanding=True,
+                        size=(400, 300), num_frames=15):
+    frames = render_frames(bg_color, circle_color, text, expanding, size, num_frames)
+    frames[0].save(filename, save_all=True, append_images=frames[1:], duration=FRAME_MS, loop=0)
+    return len(frames)
+
+def write_legacy(out_dir=ASSETS_DIR):
+    """The original close/far GIFs, the display's fallback without a manifest; returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    close, far = (os.path.join(out_dir, name) for name in LEGACY_NAMES)
+    create_animated_gif(close, bg_color="red", circle_color="darkred", text="CLOSE", expanding=False)
+    create_animated_gif(far, bg_color="green", circle_color="darkgreen", text="FAR", expanding=True)
+    return close, far
+
+# --- Band definitions ---
+def band_specs(sizes, num_frames=15, pixel_format="BGRA"):
+    """One job description per (band, size)."""
+    specs = []
+    lo = 0
+    for idx, hi in enumerate(BAND_EDGES):
+        # red (close) -> yellow -> green (far)
+        t = idx / max(1, len(BAND_EDGES) - 1)
+        if t < 0.5:
+            bg = (220, int(40 + 360 * t), 30)
+        else:
+            bg = (int(220 - 360 * (t - 0.5)), 220, int(30 + 60 * (t - 0.5)))
+        circle = tuple(int(c * 0.55) for c in bg)
+        text = f"{lo}-{hi}cm" if hi is not None else f"{lo}cm+"
+        for w, h in sizes:
+            name = f"band{idx:02d}_{w}x{h}"
+            specs.append({
+                "name": name,
+                "file": name + ".gif",
+                "pack": name + ".fpk",
+                "pixel_format": pixel_format,
+                "min_cm": lo,
+                "max_cm": hi,
+                "size": [w, h],
+                "bg_color": list(bg),
+                "circle_color": list(circle),
+                "text": text,
+                "expanding": hi is None or hi > 50,
+                "num_frames": num_frames,
+            })
+        lo = hi
+    return specs
+
+def spec_hash(spec):
+    data = json.dumps([GENERATOR_VERSION, FONT_NAME, spec], sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+def render_spec(args):
+    """Pool worker: render one animation (GIF + frame pack) and return its manifest entry."""
+    spec, out_dir = args
+    frames = render_frames(
+        bg_color=tuple(spec["bg_color"]),
+        circle_color=tuple(spec["circle_color"]),
+        text=spec["text"],
+        expanding=spec["expanding"],
+        size=tuple(spec["size"]),
+        num_frames=spec["num_frames"],
+    )
+    frames[0].save(os.path.join(out_dir, spec["file"]), save_all=True,
+                   append_images=frames[1:], duration=FRAME_MS, loop=0)
+    framepack.write_pack(os.path.join(out_dir, spec["pack"]), frames,
+                         spec["pixel_format"], FRAME_MS)
+    return dict(spec, frames=len(frames), hash=spec_hash(spec))
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": GENERATOR_VERSION, "animations": []}
+
+def generate(specs, out_dir=ASSETS_DIR, jobs=None, force=False):
+    """
+    Render every spec that changed since the last run and rewrite the
+    manifest (entries of other sizes already in out_dir are kept).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    previous = {a["name"]: a for a in load_manifest(out_dir)["animations"]}
+
+    entries, todo = [], []
+    for spec in specs:
+        old = previous.get(spec["name"])
+        if (not force and old and old.get("hash") == spec_hash(spec)
+                and os.path.exists(os.path.join(out_dir, spec["file"]))
+                and os.path.exists(os.path.join(out_dir, spec["pack"]))):
+            entries.append(old)
+        else:
+            todo.append((spec, out_dir))
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            entries.extend(pool.map(render_spec, todo))
+
+    # Keep sizes built by earlier runs, as long as their files are still there
+    names = {spec["name"] for spec in specs}
+    entries.extend(a for name, a in previous.items()
+                   if name not in names
+                   and os.path.exists(os.path.join(out_dir, a["file"]))
+                   and os.path.exists(os.path.join(out_dir, a["pack"])))
+
+    entries.sort(key=lambda a: (a["size"], a["min_cm"]))
+    manifest = {"version": GENERATOR_VERSION, "animations": entries}
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return len(todo), len(specs) - len(todo)
+
+def parse_size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate distance-band animations.")
+    parser.add_argument("--out", default=ASSETS_DIR, help="output folder (default: assets)")
+    parser.add_argument("--size", action="append", type=parse_size,
+                        help="output size WxH, may be repeated (default: 400x300)")
+    parser.add_argument("--frames", type=int, default=15, help="frames per animation")
+    parser.add_argument("--pixel-format", default="BGRA", choices=sorted(framepack.PIXEL_FORMATS),
+                        help="frame-pack pixel layout; BGRA matches a 32-bit XRGB display (default)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="regenerate even if unchanged")
+    parser.add_argument("--legacy", action="store_true",
+                        help="only write the original animation_close/far GIFs")
+    args = parser.parse_args(argv)
 
-    frames[0].save(filename, save_all=True, append_images=frames[1:], duration=100, loop=0)
+    if args.legacy:
+        write_legacy(args.out)
+        print(f"Animated GIFs created in '{args.out}' folder.")
+        return
 
-# Create the GIFs
-create_animated_gif("assets/animation_close.gif", bg_color="red", circle_color="darkred", text="CLOSE", expanding=False)
-create_animated_gif("assets/animation_far.gif", bg_color="green", circle_color="darkgreen", text="FAR", expanding=True)
+    specs = band_specs(args.size or [(400, 300)], num_frames=args.frames,
+                       pixel_format=args.pixel_format)
+    built, skipped = generate(specs, args.out, jobs=args.jobs, force=args.force)
+    print(f"{built} animations built, {skipped} unchanged; manifest written to '{args.out}/{MANIFEST_NAME}'.")
 
-print("Animated GIFs created in 'assets' folder.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Distance bands as a lookup table.
+
+A Banding maps a distance in cm to one of its bands' values: (colour, name)
+for bar_meter.BANDS, or a list of animation frames for gif_frames. The band
+of every whole centimetre from 0 to MAX_CM (the clamp static_visual applies)
+is computed once, so a lookup is an int() and an index, whatever the number
+of bands.
+
+update() adds hysteresis for displays that show one band at a time. Having
+left a band, a reading only moves to the next one once it is `hysteresis`
+cm past the boundary. A reading that sits on a boundary therefore no
+longer flips the screen between two colours on every sample:
+
+    bands = Banding([(20, "close"), (50, "near"), (None, "far")], hysteresis=2)
+    bands.update(19)   # True, "close"
+    bands.update(21)   # False, still "close" (not 22 yet)
+    bands.update(22)   # True, "near"
+"""
+
+from array import array
+
+MAX_CM = 10000
+HYSTERESIS_CM = 2
+
+
+class Banding:
+    def __init__(self, bands, hysteresis=HYSTERESIS_CM, max_cm=MAX_CM):
+        """
+        bands: [(upper bound in cm, exclusive; None = no limit, value)] in
+        increasing order. Readings past the last bound get the last band.
+        """
+        if not bands:
+            raise ValueError("at least one band is needed")
+        self.limits = [limit for limit, _ in bands]
+        self.values = [value for _, value in bands]
+        self.hysteresis = hysteresis
+        self.max_cm = max_cm
+        lut = array("H", bytes(2 * (max_cm + 1)))  # band index per cm
+        lo = 0
+        for i, limit in enumerate(self.limits):
+            hi = max_cm + 1 if limit is None else max(lo, min(int(limit), max_cm + 1))
+            lut[lo:hi] = array("H", [i]) * (hi - lo)
+            lo = hi
+        if lo <= max_cm:
+            lut[lo:] = array("H", [len(bands) - 1]) * (max_cm + 1 - lo)
+        self._lut = lut
+        self.index = None  # band shown, as settled by update()
+
+    def _at(self, d):
+        d = int(d)
+        return self._lut[0 if d < 0 else self.max_cm if d > self.max_cm else d]
+
+    def lookup(self, d):
+        """Value of the band d falls in (no hysteresis, no state)."""
+        return self.values[self._at(d)]
+
+    @property
+    def value(self):
+        return None if self.index is None else self.values[self.index]
+
+    def update(self, d):
+        """Move to d's band unless d is within `hysteresis` cm of the band it is leaving. True on a change."""
+        current = self.index
+        new = self._at(d)
+        if new == current:
+            return False
+        if current is not None and self.hysteresis:
+            if new > current and self._at(d - self.hysteresis) <= current:
+                return False
+            if new < current and self._at(d + self.hysteresis) >= current:
+                return False
+        self.index = new
+        return True
+
+    def reset(self):
+        """Forget the shown band, e.g. when the display stops."""
+        self.index = None
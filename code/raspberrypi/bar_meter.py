@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Distance bands and the bar meter body, shared by the single-sensor displays
+and the multi-sensor grid.
+
+The bands can be replaced without editing this file: point BANDS_FILE at a
+JSON list such as
+
+    [{"max_cm": 20, "color": [200, 30, 30], "name": "Very Close"},
+     {"max_cm": 50, "color": [220, 180, 30], "name": "Near"},
+     {"max_cm": null, "color": [40, 180, 60], "name": "Far"}]
+"""
+
+import json
+import os
+
+import pygame
+
+import banding
+import gradient_cache
+
+# (upper bound in cm, exclusive; None = no limit), colour, name
+BANDS = [
+    (20, (200, 30, 30), "Very Close"),
+    (50, (220, 180, 30), "Near"),
+    (None, (40, 180, 60), "Far"),
+]
+BANDS_FILE = os.environ.get("BANDS_FILE")  # JSON bands as above; replaces BANDS
+HYSTERESIS_CM = 2  # how far past a boundary a reading must be to change band
+
+METER_RANGE = 200.0  # cm shown by a full bar
+
+
+def load_bands(path):
+    """BANDS-style tuples from a JSON file (see the module docstring)."""
+    with open(path) as f:
+        return [(b["max_cm"], tuple(b["color"]), b["name"]) for b in json.load(f)]
+
+
+def make_banding(bands=None, hysteresis=HYSTERESIS_CM):
+    """A Banding whose values are (colour, name); one per display, as update() keeps state."""
+    return banding.Banding([(limit, (color, name)) for limit, color, name in bands or BANDS],
+                           hysteresis)
+
+
+if BANDS_FILE:
+    BANDS = load_bands(BANDS_FILE)
+_lookup = make_banding().lookup
+
+
+def band(d):
+    """Return (colour, name) for a distance in cm."""
+    return _lookup(d)
+
+
+def draw_bar(surface, x, y, w, h, distance_value, faded=False):
+    """
+    Horizontal bar from left (near) to right (far): background, gradient
+    fill and indicator line. Returns the filled width.
+    """
+    pygame.draw.rect(surface, (40, 40, 40), (x, y, w, h), border_radius=6)
+    norm = max(0.0, min(1.0, distance_value / METER_RANGE))
+    fill_w = int(w * norm)
+    if fill_w > 0:
+        # gradient fill, cropped from the cached full-width bar
+        grad = gradient_cache.bar_gradient(w, h, faded)
+        surface.blit(grad, (x, y), area=pygame.Rect(0, 0, fill_w, h))
+    color_line = (0, 0, 0) if not faded else (120, 120, 120)
+    pygame.draw.line(surface, color_line, (x + fill_w, y), (x + fill_w, y + h), 3)
+    return fill_w
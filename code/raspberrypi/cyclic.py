@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Pre-rendered frames for looping, time-driven effects.
+
+An effect that depends only on the time modulo its period (the pulsing "?" of
+draw_no_data, the radar pulse while waiting for data) is rendered once at
+`count` evenly spaced phases. Drawing it is then picking the frame for the
+current time and one blit, instead of a rotozoom or a handful of ring blits
+on every frame.
+
+Animations are cached by a caller-chosen key (fonts, size, colours), like
+gradient_cache; stats() reports how many frames and bytes the cache holds.
+"""
+
+import time
+
+import pygame
+
+_animations = {}
+
+
+class CyclicAnimation:
+    def __init__(self, size, period, count, render, anchor=(0, 0)):
+        """
+        render(canvas, phase) draws one frame onto a transparent canvas of
+        `size`, for phase in [0, 1). It is called `count` times, here only.
+        anchor is the canvas point that blit() places at the given position.
+        Identical frames share one surface (quantized effects repeat a lot).
+        """
+        self.size = size
+        self.period = period
+        self.anchor = anchor
+        self.frames = []
+        seen = {}
+        for i in range(count):
+            canvas = pygame.Surface(size, pygame.SRCALPHA)
+            render(canvas, i / count)
+            self.frames.append(seen.setdefault(pygame.image.tobytes(canvas, "RGBA"), canvas))
+
+    def index(self, t=None):
+        """Frame shown at t (time.monotonic() seconds, default now)."""
+        if t is None:
+            t = time.monotonic()
+        count = len(self.frames)
+        return int(t / self.period * count) % count
+
+    def frame(self, t=None):
+        return self.frames[self.index(t)]
+
+    def blit(self, target, pos, t=None):
+        """Blit the frame for t with its anchor at pos; returns the rect."""
+        return target.blit(self.frames[self.index(t)],
+                           (pos[0] - self.anchor[0], pos[1] - self.anchor[1]))
+
+
+def animation(key, make):
+    """The cached animation for key; make() builds it (renders the frames) on first use."""
+    anim = _animations.get(key)
+    if anim is None:
+        anim = make()
+        _animations[key] = anim
+    return anim
+
+
+def stats():
+    frames = [f for anim in _animations.values() for f in anim.frames]
+    unique = {id(f): f for f in frames}.values()
+    return {
+        "entries": len(_animations),
+        "frames": len(frames),
+        "surfaces": len(unique),
+        "bytes": sum(f.get_width() * f.get_height() * f.get_bytesize() for f in unique),
+    }
+
+
+def clear():
+    _animations.clear()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Dirty-rectangle rendering for the pygame displays.
+
+Each widget registers a fixed bounding rect, a draw function and a state
+function. Every frame the state function is called; when its result differs
+from the previous frame the widget's rect is invalidated. Only invalidated
+regions are cleared, redrawn (including any overlapping widgets, clipped to
+the region) and pushed to the screen with pygame.display.update(rects).
+"""
+
+import pygame
+
+
+class Widget:
+    def __init__(self, name, rect, draw, state):
+        self.name = name
+        self.rect = pygame.Rect(rect)
+        self.draw = draw
+        self.state = state
+        self.last_state = None
+
+
+class DirtyRenderer:
+    def __init__(self, surface, bg_color):
+        self.surface = surface
+        self.bg_color = bg_color
+        self.widgets = []
+        self.full_redraw = True
+
+    def add(self, name, rect, draw, state=lambda: None):
+        """
+        Register a widget. Widgets are drawn in registration order (back to front).
+        state() must return something comparable; a change marks the widget dirty.
+        """
+        widget = Widget(name, rect, draw, state)
+        self.widgets.append(widget)
+        self.full_redraw = True
+        return widget
+
+    def invalidate(self, name=None):
+        """Force a redraw of one widget, or of the whole screen when name is None."""
+        if name is None:
+            self.full_redraw = True
+            return
+        for widget in self.widgets:
+            if widget.name == name:
+                widget.last_state = _FORCE
+
+    def render(self):
+        """Redraw dirty regions and push them to the display. Returns the updated rects."""
+        return self.present(self.draw())
+
+    def draw(self):
+        """Redraw dirty regions into the surface only. Returns them for present()."""
+        screen_rect = self.surface.get_rect()
+        if self.full_redraw:
+            dirty = [screen_rect]
+            for widget in self.widgets:
+                widget.last_state = widget.state()
+        else:
+            dirty = []
+            for widget in self.widgets:
+                state = widget.state()
+                if state != widget.last_state:
+                    widget.last_state = state
+                    dirty.append(widget.rect.clip(screen_rect))
+            dirty = _merge(dirty)
+        self.full_redraw = False
+
+        for region in dirty:
+            self.surface.set_clip(region)
+            self.surface.fill(self.bg_color, region)
+            for widget in self.widgets:
+                if widget.rect.colliderect(region):
+                    widget.draw()
+        self.surface.set_clip(None)
+        return dirty
+
+    def present(self, dirty):
+        """Push the given regions to the display."""
+        if dirty:
+            pygame.display.update(dirty)
+        return dirty
+
+
+# Sentinel that never compares equal to a widget state
+class _Force:
+    def __eq__(self, other):
+        return False
+
+    def __ne__(self, other):
+        return True
+
+
+_FORCE = _Force()
+
+
+def _merge(rects):
+    """Union overlapping rects so shared areas are only redrawn once."""
+    merged = []
+    for rect in rects:
+        if rect.width <= 0 or rect.height <= 0:
+            continue
+        i = 0
+        while i < len(merged):
+            if merged[i].colliderect(rect):
+                rect = rect.union(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
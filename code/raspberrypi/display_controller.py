@@ -4,92 +4,106 @@ import paho.mqtt.client as mqtt
 import pygame
 import sys
 import time
-import threading
+
+import distance_protocol
+import filters
+import frame_scheduler
+import latency
+import metrics
+import mqtt_supervisor
+import sample_log
+import startup
+import visuals
+from log_setup import MessageStats, rate_limited, setup_logging
+from sample_ring import SampleRing, make_buffers
+from settings import (BROKER_IP, BROKER_PORT, LOG_LEVEL, METRICS_HOST, METRICS_PORT, PASSWORD,
+                      RECONNECT_INITIAL, RECONNECT_MAX, REPLAY, REPLAY_SPEED, SAMPLE_LOG, USERNAME)
 
 # --- SETTINGS ---
-BROKER_IP = "192.168.1.100"  # Replace with your broker IP
-BROKER_PORT = 1883
+# Broker, reconnects, logging, metrics and the sample log are in settings.py
 TOPIC = "sensor/distance"
 CLIENT_ID = "distance_display_client"
-USERNAME = None    # e.g. "myuser" if needed, otherwise None
-PASSWORD = None    # e.g. "mypassword" if needed, otherwise None
 
-# Reconnect params
-RECONNECT_INITIAL = 5     # Initial seconds between reconnect attempts
-RECONNECT_MAX = 300       # Max seconds backoff interval
+# Frame rate: at most FPS while data arrives; otherwise redraw IDLE_FPS times/s
+FPS = 10
+IDLE_FPS = 1
+
+# --- Logging ---
+log = setup_logging("display_controller", LOG_LEVEL)
+stats = MessageStats(log)  # periodic "N samples/s, M invalid" summary
 
 # --- Pygame Setup ---
-pygame.init()
 SCREEN_SIZE = (800, 480)
-screen = pygame.display.set_mode(SCREEN_SIZE)
-pygame.display.set_caption("Distance Display")
-font = pygame.font.SysFont(None, 48)
+screen = startup.init_display(SCREEN_SIZE, "Distance Display")
+font = startup.font(None, 48)
+startup.timer.mark("fonts")
+scheduler = frame_scheduler.FrameScheduler(FPS, IDLE_FPS)
 
 current_distance = None
-connected = False
-last_disconnect_time = 0
-reconnect_backoff = RECONNECT_INITIAL
-reconnect_lock = threading.Lock()
+samples = SampleRing()  # written by on_message, drained by the main loop
+frame_times, frame_values = make_buffers(samples)
+distance_filter = filters.default_chain()  # outlier rejection, median and EMA
+
+# --- Metrics ---
+frame_metrics = metrics.FrameMetrics(1.0 / FPS)
+metrics.expose_stats(stats, samples)
+metrics.expose_text_cache()
+metrics.serve(METRICS_PORT, METRICS_HOST)
+overlay = metrics.Overlay()
+overlay_state = None
+
+# Band colour and label; repaints only what changed (see visuals.BandScreen)
+band_screen = visuals.BandScreen(screen, font)
 
 def draw_display():
-    screen.fill((30, 30, 30))  # default background
+    global overlay_state
+    state = overlay.state()
+    if state != overlay_state:
+        overlay_state = state
+        band_screen.invalidate()  # repaint under a hidden or refreshed overlay
     if current_distance is None:
-        label = font.render("Waiting for data...", True, (200, 200, 200))
+        dirty = band_screen.draw(None, "Waiting for data...")
     else:
-        try:
-            d = int(current_distance)
-        except Exception:
-            d = None
-        if d is None:
-            label = font.render("Invalid data", True, (220, 100, 100))
-        else:
-            if d < 20:
-                color = (200, 30, 30)
-                text = f"Very Close ({d} cm)"
-            elif d < 50:
-                color = (220, 180, 30)
-                text = f"Near ({d} cm)"
-            else:
-                color = (40, 180, 60)
-                text = f"Far ({d} cm)"
-            screen.fill(color)
-            label = font.render(text, True, (0, 0, 0))
-    screen.blit(label, (40, SCREEN_SIZE[1]//2 - 24))
-    pygame.display.flip()
+        dirty = band_screen.draw(int(current_distance))
+    if not dirty:
+        return
+    overlay.draw(screen, dirty)
+    latency.probe.rendered()
+    pygame.display.update(dirty)
+    latency.probe.flipped()
 
 # --- MQTT Callbacks ---
 def on_connect(client, userdata, flags, rc):
-    global connected, reconnect_backoff
     if rc == 0:
-        connected = True
-        reconnect_backoff = RECONNECT_INITIAL
-        print("Connected to MQTT broker.")
-        client.subscribe(TOPIC)
+        log.info("Connected to MQTT broker.")
     else:
-        connected = False
-        print(f"Failed to connect, return code {rc}")
+        log.warning("Failed to connect, return code %s", rc)
 
 def on_message(client, userdata, msg):
-    global current_distance
-    payload = msg.payload.decode(errors='ignore').strip()
     try:
-        # Accept integer data; modify here if your sensor sends differently
-        current_distance = int(payload)
-        print(f"Received distance: {current_distance} cm")
+        # Binary batch from the ESP32, or a single ASCII number
+        batch = distance_protocol.decode(msg.payload)
     except ValueError:
-        print(f"Invalid MQTT payload received: '{payload}'")
+        stats.invalid += 1
+        log.warning("Invalid MQTT payload received: %r", msg.payload)
+        return
+    stats.messages += 1
+    stats.samples += len(batch.values)
+    latency.probe.received(batch)
+    sample_log.recorder.append("", batch)
+    for t, distance in batch.timed(time.monotonic()):
+        samples.push(distance, t)
+    frame_scheduler.wake()
+    log.debug("Received distance: %s cm", distance, extra=rate_limited(""))
 
 def on_disconnect(client, userdata, rc):
-    global connected, last_disconnect_time
-    connected = False
-    last_disconnect_time = time.time()
     if rc == 0:
-        print("Clean disconnect from broker.")
+        log.info("Clean disconnect from broker.")
     else:
-        print(f"Unexpected MQTT disconnect (rc={rc}).")
+        log.warning("Unexpected MQTT disconnect (rc=%s).", rc)
 
 def on_subscribe(client, userdata, mid, granted_qos):
-    print(f"Subscribed (mid={mid}, qos={granted_qos})")
+    log.info("Subscribed (mid=%s, qos=%s)", mid, granted_qos)
 
 # --- MQTT Client Setup ---
 client = mqtt.Client(client_id=CLIENT_ID)
@@ -104,53 +118,60 @@ if USERNAME and PASSWORD:
 # Last Will message is optional; lets broker know if you go offline suddenly
 client.will_set("clients/" + CLIENT_ID + "/status", payload="offline", qos=1, retain=True)
 
-def try_connect():
-    try:
-        client.connect(BROKER_IP, BROKER_PORT, keepalive=60)
-        client.loop_start()
-    except Exception as e:
-        print(f"Initial connect failed: {e}")
-
-# Initial connection
-try_connect()
+# Connects and reconnects on paho's thread; state changes arrive as CONNECTION events
+supervisor = mqtt_supervisor.ConnectionSupervisor(client, BROKER_IP, BROKER_PORT, topics=[TOPIC],
+                                                  reconnect_initial=RECONNECT_INITIAL,
+                                                  reconnect_max=RECONNECT_MAX, log=log)
+metrics.expose_connection(lambda: supervisor.connected, lambda: supervisor.reconnect_backoff,
+                          lambda: supervisor.last_disconnect)
+
+# First frame, before the sample log and the broker connection are set up
+draw_display()
+startup.timer.mark("first frame")
+
+# --- Sample log ---
+if REPLAY:
+    log.info("Replaying %s at %sx", REPLAY, REPLAY_SPEED)
+    sample_log.start_replay(REPLAY, on_message, client, REPLAY_SPEED)
+else:
+    if SAMPLE_LOG:
+        sample_log.recorder.open(SAMPLE_LOG, log=log)
+    # Initial connection
+    supervisor.start()
+    startup.timer.mark("connect")
+startup.timer.report(log)
 
 # --- Main loop with reconnect handling ---
 try:
     while True:
         # Handle pygame events
-        for event in pygame.event.get():
+        for event in scheduler.wait(animating=False):
+            if overlay.handle(event):
+                continue
             if event.type == pygame.QUIT:
-                try:
-                    client.loop_stop()
-                    client.disconnect()
-                except Exception:
-                    pass
+                supervisor.stop()
+                sample_log.recorder.close()
                 pygame.quit()
                 sys.exit()
 
-        # Reconnect watchdog
-        if not connected:
-            now = time.time()
-            with reconnect_lock:
-                if now - last_disconnect_time >= reconnect_backoff:
-                    print(f"[Reconnect] Trying in {reconnect_backoff} seconds...")
-                    try:
-                        client.reconnect()
-                    except Exception as e:
-                        print(f"[Reconnect] Failed: {e}")
-                        last_disconnect_time = now
-                        reconnect_backoff = min(reconnect_backoff * 2, RECONNECT_MAX)
-                # If it connects, reconnect_backoff is reset in on_connect
+        frame_metrics.start()
+
+        stats.maybe_log()
+
+        # Consume every sample received since the last frame
+        latency.probe.frame()
+        n = samples.drain(frame_times, frame_values)
+        filtered = distance_filter.update_many(frame_values, n)
+        if filtered is not None and int(round(filtered)) != current_distance:
+            current_distance = int(round(filtered))
+            scheduler.activity()
 
         draw_display()
-        pygame.time.wait(100)  # ~10 fps
+        frame_metrics.stop()
 
 except KeyboardInterrupt:
-    print("Shutting down.")
-    try:
-        client.loop_stop()
-        client.disconnect()
-    except Exception:
-        pass
+    log.info("Shutting down.")
+    supervisor.stop()
+    sample_log.recorder.close()
     pygame.quit()
     sys.exit()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+display_controller_v2 on a single asyncio thread: MQTT socket I/O, the
+reconnect loop and rendering all run on one event loop (see mqtt_asyncio.py),
+so there are no paho network thread, no locks and no blocking reconnects.
+
+Try it locally with:  python3 mini_broker.py &  BROKER_IP=127.0.0.1 python3 display_controller_async.py
+"""
+
+import asyncio
+import paho.mqtt.client as mqtt
+import pygame
+import time
+
+import distance_protocol
+import filters
+import latency
+import metrics
+import sample_log
+import startup
+import text_cache
+import visuals
+from log_setup import MessageStats, rate_limited, setup_logging
+from mqtt_asyncio import AsyncController
+from sample_ring import SampleRing, make_buffers
+from settings import (BROKER_IP, BROKER_PORT, LOG_LEVEL, METRICS_HOST, METRICS_PORT, PASSWORD,
+                      RECONNECT_INITIAL, RECONNECT_MAX, REPLAY, REPLAY_SPEED, SAMPLE_LOG, USERNAME)
+
+# --- SETTINGS ---
+# Broker, reconnects, logging, metrics and the sample log are in settings.py
+TOPIC = "sensor/distance"
+CLIENT_ID = "distance_display_client"
+
+# Input is polled FPS times/s; the screen is only redrawn when something changed
+FPS = 10
+
+# --- Logging ---
+log = setup_logging("display_controller_async", LOG_LEVEL)
+stats = MessageStats(log)  # periodic "N samples/s, M invalid" summary
+
+# --- Pygame Setup ---
+SCREEN_SIZE = (800, 480)
+screen = startup.init_display(SCREEN_SIZE, "Distance Display")
+font = startup.font(None, 48)
+button_font = startup.font(None, 36)
+startup.timer.mark("fonts")
+
+current_distance = None
+samples = SampleRing()  # written by on_message, drained by frame(); same thread
+frame_times, frame_values = make_buffers(samples)
+distance_filter = filters.default_chain()  # outlier rejection, median and EMA
+display_enabled = False  # Start/Stop flag
+needs_redraw = True
+
+# --- Button positions ---
+start_button_rect = pygame.Rect(50, SCREEN_SIZE[1] - 70, 120, 50)
+stop_button_rect = pygame.Rect(50, SCREEN_SIZE[1] - 70, 120, 50)  # Same place as Start
+
+def draw_buttons():
+    """Draw either Start or Stop button based on state"""
+    if not display_enabled:
+        pygame.draw.rect(screen, (0, 200, 0), start_button_rect)  # green
+        label = text_cache.render(button_font, "Start", True, (255, 255, 255))
+        screen.blit(label, (start_button_rect.x + 25, start_button_rect.y + 10))
+    else:
+        pygame.draw.rect(screen, (200, 0, 0), stop_button_rect)  # red
+        label = text_cache.render(button_font, "Stop", True, (255, 255, 255))
+        screen.blit(label, (stop_button_rect.x + 30, stop_button_rect.y + 10))
+
+# Band colour and label; repaints only what changed (see visuals.BandScreen)
+band_screen = visuals.BandScreen(screen, font)
+
+def draw_display():
+    if not display_enabled:
+        dirty = band_screen.draw(None, "Press Start to begin")
+    elif current_distance is None:
+        dirty = band_screen.draw(None, "Waiting for data...")
+    else:
+        dirty = band_screen.draw(current_distance)
+    if not dirty:
+        return
+    draw_buttons()
+    overlay.draw(screen, dirty)
+    latency.probe.rendered()
+    pygame.display.update(dirty)
+    latency.probe.flipped()
+
+# --- MQTT Callbacks (called from the event loop) ---
+def on_connect(client, userdata, flags, rc):
+    if rc == 0:
+        log.info("Connected to MQTT broker.")
+        startup.timer.mark("connect")
+        startup.timer.report(log)
+    else:
+        log.warning("Failed to connect, return code %s", rc)
+
+def on_message(client, userdata, msg):
+    if display_enabled:  # Only update when started
+        try:
+            # Binary batch from the ESP32, or a single ASCII number
+            batch = distance_protocol.decode(msg.payload)
+        except ValueError:
+            stats.invalid += 1
+            log.warning("Invalid MQTT payload received: %r", msg.payload)
+            return
+        stats.messages += 1
+        stats.samples += len(batch.values)
+        latency.probe.received(batch)
+        sample_log.recorder.append("", batch)
+        for t, distance in batch.timed(time.monotonic()):
+            samples.push(distance, t)
+        controller.wake()
+        log.debug("Received distance: %s cm", distance, extra=rate_limited(""))
+
+def on_disconnect(client, userdata, rc):
+    if rc == 0:
+        log.info("Clean disconnect from broker.")
+    else:
+        log.warning("Unexpected MQTT disconnect (rc=%s).", rc)
+
+def on_subscribe(client, userdata, mid, granted_qos):
+    log.info("Subscribed (mid=%s, qos=%s)", mid, granted_qos)
+
+# --- MQTT Client Setup ---
+client = mqtt.Client(client_id=CLIENT_ID)
+client.on_connect = on_connect
+client.on_message = on_message
+client.on_disconnect = on_disconnect
+client.on_subscribe = on_subscribe
+
+if USERNAME and PASSWORD:
+    client.username_pw_set(USERNAME, PASSWORD)
+
+client.will_set("clients/" + CLIENT_ID + "/status", payload="offline", qos=1, retain=True)
+
+controller = AsyncController(client, None if REPLAY else BROKER_IP, BROKER_PORT, topics=[TOPIC],
+                             fps=FPS, reconnect_initial=RECONNECT_INITIAL,
+                             reconnect_max=RECONNECT_MAX, log=log)
+
+# --- Metrics ---
+frame_metrics = metrics.FrameMetrics(1.0 / FPS)
+metrics.expose_stats(stats, samples)
+metrics.expose_text_cache()
+metrics.expose_connection(lambda: controller.connected, lambda: controller.reconnect_backoff)
+overlay = metrics.Overlay()
+overlay_state = None
+
+# --- Frame ---
+def frame(events):
+    global current_distance, display_enabled, needs_redraw, overlay_state
+    for event in events:
+        if overlay.handle(event):
+            continue
+        if event.type == pygame.QUIT:
+            return None
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            mouse_pos = event.pos
+            if not display_enabled and start_button_rect.collidepoint(mouse_pos):
+                display_enabled = True
+                needs_redraw = True
+                log.info("Distance display started.")
+            elif display_enabled and stop_button_rect.collidepoint(mouse_pos):
+                display_enabled = False
+                needs_redraw = True
+                log.info("Distance display stopped.")
+
+    frame_metrics.start()
+    stats.maybe_log()
+
+    # Consume every sample received since the last frame
+    latency.probe.frame()
+    n = samples.drain(frame_times, frame_values)
+    filtered = distance_filter.update_many(frame_values, n)
+    if filtered is not None and int(round(filtered)) != current_distance:
+        current_distance = int(round(filtered))
+        needs_redraw = True
+
+    state = overlay.state()
+    if state != overlay_state:
+        overlay_state = state
+        band_screen.invalidate()  # repaint under a hidden or refreshed overlay
+        needs_redraw = True
+
+    if needs_redraw:
+        draw_display()
+        needs_redraw = False
+    frame_metrics.stop()
+    return 1.0 / FPS
+
+# First frame; the broker connect runs on the event loop afterwards
+draw_display()
+needs_redraw = False
+startup.timer.mark("first frame")
+
+# --- Main loop ---
+async def main():
+    await metrics.serve_async(METRICS_PORT, METRICS_HOST)
+    replay = None
+    if REPLAY:
+        startup.timer.report(log)
+        log.info("Replaying %s at %sx", REPLAY, REPLAY_SPEED)
+        deliver = lambda msg: on_message(client, None, msg)
+        replay = sample_log.replay_task(REPLAY, deliver, REPLAY_SPEED, log)
+    elif SAMPLE_LOG:
+        sample_log.recorder.open(SAMPLE_LOG, log=log)
+    try:
+        await controller.run(frame)
+    finally:
+        if replay is not None:
+            await sample_log.cancel_replay(replay)
+
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    pass
+log.info("Shutting down.")
+sample_log.recorder.close()
+pygame.quit()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Distance payload format shared with code/esp32/distance_sender.ino.
+
+Binary v1 (little endian), one MQTT message carries N readings:
+
+    offset size
+    0      1    magic        0xD5
+    1      1    version      1
+    2      1    count        number of readings (1..255)
+    3      1    flags        bit 0: timestamp_ms is Unix time in ms (mod 2**32)
+                             instead of millis(); other bits reserved, 0
+    4      4    seq          batch sequence number, wraps at 2**32
+    8      4    timestamp_ms sensor millis() when the first reading was taken
+    12     2    interval_ms  time between consecutive readings
+    14     2*N  readings     uint16 distance in cm
+
+Anything that does not start with the magic byte is treated as the legacy
+ASCII payload: a single number such as "42".
+"""
+
+import math
+import struct
+from collections import namedtuple
+
+TOPIC = "sensor/distance"
+
+MAGIC = 0xD5
+VERSION = 1
+HEADER = struct.Struct("<BBBBIIH")
+MAX_READINGS = 255
+FLAG_WALLCLOCK = 0x01  # set by sensor_emulator.py so latency can be measured
+
+_readings = {}  # count -> struct.Struct for the readings block
+
+
+class Batch(namedtuple("Batch", "seq timestamp_ms interval_ms values flags", defaults=(0,))):
+    """Decoded payload. seq/timestamp_ms are None for ASCII payloads."""
+
+    __slots__ = ()
+
+    def timed(self, received):
+        """
+        Yield (receive_time, value) per reading. The last reading is stamped
+        with `received`; earlier ones are spaced back by interval_ms.
+        """
+        step = self.interval_ms / 1000.0
+        last = len(self.values) - 1
+        for i, value in enumerate(self.values):
+            yield received - (last - i) * step, value
+
+
+def encode(values, seq=0, timestamp_ms=0, interval_ms=0, flags=0):
+    values = list(values)
+    if not 1 <= len(values) <= MAX_READINGS:
+        raise ValueError(f"batch must hold 1..{MAX_READINGS} readings")
+    values = [max(0, min(0xFFFF, int(v))) for v in values]
+    header = HEADER.pack(MAGIC, VERSION, len(values), flags,
+                         seq & 0xFFFFFFFF, timestamp_ms & 0xFFFFFFFF, interval_ms)
+    return header + _readings_struct(len(values)).pack(*values)
+
+
+def decode(payload):
+    """Decode a binary or ASCII payload into a Batch. Raises ValueError if invalid."""
+    if payload[:1] == bytes((MAGIC,)):
+        if len(payload) < HEADER.size:
+            raise ValueError("truncated header")
+        _, version, count, flags, seq, timestamp_ms, interval_ms = HEADER.unpack_from(payload)
+        if version != VERSION:
+            raise ValueError(f"unsupported payload version {version}")
+        if count == 0 or len(payload) != HEADER.size + 2 * count:
+            raise ValueError("reading count does not match payload length")
+        values = _readings_struct(count).unpack_from(payload, HEADER.size)
+        return Batch(seq, timestamp_ms, interval_ms, values, flags)
+
+    text = payload.decode(errors="ignore").strip()
+    try:
+        value = int(text)
+    except ValueError:
+        value = float(text)  # raises ValueError for anything non-numeric
+        if not math.isfinite(value):
+            raise ValueError(f"non-finite distance {text!r}")
+    return Batch(None, None, 0, (value,))
+
+
+def _readings_struct(count):
+    s = _readings.get(count)
+    if s is None:
+        s = _readings[count] = struct.Struct(f"<{count}H")
+    return s
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Streaming filters for noisy HC-SR04 readings.
+
+Each filter has update(x) for live use (constant work per sample, returns
+the filtered value or None when the sample is dropped) and batch(values) for
+replaying recorded data with NumPy. batch() always starts from a fresh
+filter and does not touch the live state; it returns an array the same
+length as its input with NaN where a sample was dropped.
+
+Chain them with FilterChain; default_chain() is what the displays use.
+
+    python3 filters.py --bench      # per-sample cost of every filter
+"""
+
+import argparse
+import bisect
+import math
+import time
+from collections import deque
+
+try:
+    import numpy
+except ImportError:  # only batch() needs NumPy
+    numpy = None
+
+
+class OutlierReject:
+    """
+    Drop readings outside [min_valid, max_valid] (the sensor reports 0 on a
+    missed echo and clamps at 500) unless they persist for `persist`
+    consecutive samples, in which case they are real and passed through.
+    """
+
+    def __init__(self, min_valid=1, max_valid=499, persist=3):
+        self.min_valid = min_valid
+        self.max_valid = max_valid
+        self.persist = persist
+        self.reset()
+
+    def reset(self):
+        self._run = 0
+
+    def update(self, x):
+        if self.min_valid <= x <= self.max_valid:
+            self._run = 0
+            return x
+        self._run += 1
+        return x if self._run >= self.persist else None
+
+    def batch(self, values):
+        values = numpy.asarray(values, dtype=float)
+        bad = (values < self.min_valid) | (values > self.max_valid)
+        # Length of the current run of bad samples at each index
+        idx = numpy.arange(len(values))
+        last_good = numpy.maximum.accumulate(numpy.where(bad, -1, idx))
+        run = numpy.where(bad, idx - last_good, 0)
+        return numpy.where(bad & (run < self.persist), numpy.nan, values)
+
+
+class Median:
+    """Median of the last n samples (n small and fixed)."""
+
+    def __init__(self, n=5):
+        self.n = n
+        self.reset()
+
+    def reset(self):
+        self._window = deque()
+        self._sorted = []
+
+    def update(self, x):
+        self._window.append(x)
+        bisect.insort(self._sorted, x)
+        if len(self._window) > self.n:
+            old = self._window.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+        s, k = self._sorted, len(self._sorted)
+        return s[k // 2] if k % 2 else (s[k // 2 - 1] + s[k // 2]) / 2
+
+    def batch(self, values):
+        values = numpy.asarray(values, dtype=float)
+        n = self.n
+        if len(values) == 0:
+            return values.copy()
+        # NaN in front, so the first windows hold only the samples seen so
+        # far, as in update(); sorting puts the NaNs last
+        padded = numpy.concatenate((numpy.full(n - 1, numpy.nan), values))
+        s = numpy.sort(numpy.lib.stride_tricks.sliding_window_view(padded, n), axis=1)
+        out = (s[:, (n - 1) // 2] + s[:, n // 2]) / 2
+        head = min(n - 1, len(values))  # windows still filling up
+        k = numpy.arange(1, head + 1)
+        out[:head] = (s[k - 1, (k - 1) // 2] + s[k - 1, k // 2]) / 2
+        return out
+
+
+class EMA:
+    """Exponential moving average; alpha in (0, 1], higher follows faster."""
+
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self._y = None
+
+    def update(self, x):
+        self._y = x if self._y is None else self._y + self.alpha * (x - self._y)
+        return self._y
+
+    def batch(self, values):
+        values = numpy.asarray(values, dtype=float)
+        if len(values) == 0:
+            return values.copy()
+        out = numpy.empty_like(values)
+        out[0] = values[0]
+        out[1:] = _ema_blocks(values[1:], self.alpha, values[0])
+        return out
+
+
+class Kalman1D:
+    """
+    Constant-position Kalman filter. q is the process noise (how fast the
+    true distance may move), r the measurement noise of the sensor.
+    """
+
+    def __init__(self, q=4.0, r=25.0):
+        self.q = q
+        self.r = r
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._p = 0.0
+
+    def update(self, z):
+        if self._x is None:
+            self._x, self._p = z, self.r
+            return z
+        p = self._p + self.q
+        k = p / (p + self.r)
+        self._x += k * (z - self._x)
+        self._p = (1 - k) * p
+        return self._x
+
+    def batch(self, values):
+        values = numpy.asarray(values, dtype=float)
+        out = numpy.empty_like(values)
+        if len(values) == 0:
+            return out
+        # The gain sequence does not depend on the data and converges quickly;
+        # once it is steady the filter is an EMA with alpha = steady gain.
+        x, p = values[0], self.r
+        out[0] = x
+        i, k_prev = 1, -1.0
+        while i < len(values):
+            p += self.q
+            k = p / (p + self.r)
+            p *= 1 - k
+            x += k * (values[i] - x)
+            out[i] = x
+            i += 1
+            if abs(k - k_prev) < 1e-12:
+                break
+            k_prev = k
+        if i < len(values):
+            out[i:] = _ema_blocks(values[i:], k, x)
+        return out
+
+
+class FilterChain:
+    """Run filters in order; a None from any stage drops the sample."""
+
+    def __init__(self, *stages):
+        self.stages = stages
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def update(self, x):
+        for stage in self.stages:
+            x = stage.update(x)
+            if x is None:
+                return None
+        return x
+
+    def update_many(self, values, n):
+        """Feed values[:n]; return the last value that made it through, or None."""
+        last = None
+        for i in range(n):
+            y = self.update(values[i])
+            if y is not None:
+                last = y
+        return last
+
+    def batch(self, values):
+        values = numpy.asarray(values, dtype=float)
+        out = numpy.full(len(values), numpy.nan)
+        keep = numpy.arange(len(values))
+        data = values
+        for stage in self.stages:
+            data = stage.batch(data)
+            # Later stages only see samples that survived, as in update()
+            ok = ~numpy.isnan(data)
+            keep, data = keep[ok], data[ok]
+        out[keep] = data
+        return out
+
+
+def default_chain():
+    return FilterChain(OutlierReject(), Median(5), EMA(0.5))
+
+
+def _ema_blocks(values, alpha, y0):
+    """
+    y[i] = y[i-1] + alpha * (values[i] - y[i-1]) starting from y0, without a
+    Python loop over samples. The input is cut into blocks short enough that
+    (1 - alpha)^-len stays well conditioned; each block is solved in closed
+    form from a zero state, then the state carried between blocks is added.
+    """
+    n = len(values)
+    decay = 1.0 - alpha
+    if n == 0 or decay <= 0.0:
+        return numpy.array(values, dtype=float)
+    block = n if decay >= 1.0 else max(1, min(n, int(6 / -math.log10(decay))))
+    count = -(-n // block)
+    padded = numpy.zeros(count * block)
+    padded[:n] = values
+    blocks = padded.reshape(count, block)
+
+    p = decay ** numpy.arange(1, block + 1)
+    # Response of every block to its own samples, starting from zero
+    zero = alpha * p * numpy.cumsum(blocks / p, axis=1)
+
+    # State entering block j: s[j] = g * s[j-1] + zero[j-1, -1], s[0] = y0.
+    # g = decay^block is tiny, so only the last few blocks contribute.
+    g = p[-1]
+    ends = zero[:, -1]
+    state = y0 * g ** numpy.arange(count)
+    weight, m = 1.0, 1
+    while m < count and weight > 1e-17:
+        state[m:] += weight * ends[:count - m]
+        weight *= g
+        m += 1
+    return (zero + p * state[:, None]).ravel()[:n]
+
+
+# --- Benchmark ---
+def _bench(n):
+    rng = numpy.random.default_rng(1)
+    data = 80 + 30 * numpy.sin(numpy.arange(n) / 200) + rng.normal(0, 3, n)
+    data[rng.random(n) < 0.02] = 0      # missed echoes
+    data[rng.random(n) < 0.02] = 500    # clamped out-of-range
+    values = data.tolist()
+
+    cases = [
+        ("outlier", OutlierReject),
+        ("median5", lambda: Median(5)),
+        ("ema", EMA),
+        ("kalman", Kalman1D),
+        ("default_chain", default_chain),
+    ]
+    print(f"{'filter':<15}{'update ns/sample':>18}{'batch ns/sample':>18}")
+    for name, make in cases:
+        f = make()
+        t = time.perf_counter()
+        for x in values:
+            f.update(x)
+        stream = (time.perf_counter() - t) / n * 1e9
+        t = time.perf_counter()
+        make().batch(data)
+        batch = (time.perf_counter() - t) / n * 1e9
+        print(f"{name:<15}{stream:>18.0f}{batch:>18.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distance filter benchmarks.")
+    parser.add_argument("--bench", action="store_true", help="measure per-sample cost")
+    parser.add_argument("--samples", type=int, default=200000)
+    args = parser.parse_args(argv)
+    if args.bench:
+        _bench(args.samples)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Adaptive frame rate for the display loops.
+
+While something on screen animates and the displayed value changed recently,
+frames run at the full rate. Otherwise the loop blocks in pygame.event.wait
+until input arrives, on_message calls wake(), or the idle timeout expires
+(so watchdogs still run, at roughly idle_fps).
+"""
+
+import time
+
+import pygame
+
+WAKEUP = pygame.event.custom_type()  # posted by wake(); never returned to callers
+
+_wake_pending = False
+
+
+def wake():
+    """Wake the render loop from another thread (e.g. the MQTT callback)."""
+    global _wake_pending
+    if not _wake_pending:  # one queued wakeup is enough
+        _wake_pending = True
+        pygame.event.post(pygame.event.Event(WAKEUP))
+
+
+class FrameScheduler:
+    def __init__(self, fps=30, idle_fps=1, idle_after=10.0):
+        """
+        idle_after: seconds without activity() before animations slow down to
+        idle_fps; None keeps animations at full rate.
+        """
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.clock = pygame.time.Clock()
+        self.last_activity = time.monotonic()
+
+    def activity(self):
+        """Call when the displayed value changes; keeps animations at full rate."""
+        self.last_activity = time.monotonic()
+
+    def is_active(self, animating):
+        if not animating:
+            return False
+        if self.idle_after is None:
+            return True
+        return time.monotonic() - self.last_activity < self.idle_after
+
+    def wait(self, animating):
+        """Sleep until the next frame is due and return the pending events."""
+        global _wake_pending
+        # Clear before reading the queue so a wake() racing with us still posts
+        _wake_pending = False
+        if self.is_active(animating):
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        else:
+            first = pygame.event.wait(int(1000 / self.idle_fps))
+            events = [] if first.type == pygame.NOEVENT else [first] + pygame.event.get()
+            self.clock.tick(self.fps)  # still never faster than the full rate
+
+        result = []
+        for event in events:
+            if event.type == WAKEUP:
+                continue
+            if event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN, pygame.FINGERDOWN):
+                self.activity()
+            result.append(event)
+        return result
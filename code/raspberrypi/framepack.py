@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Frame-pack (.fpk) files: raw animation frames ready to blit.
+
+Layout: a 64-byte header followed by frame_count contiguous frames of
+width * height * bytes_per_pixel bytes each, already in the pixel layout the
+display uses. The reader memory-maps the file and wraps each frame with
+pygame.image.frombuffer, so opening a pack does no decoding and no copying,
+and pages are only read from disk when a frame is first shown.
+
+Header (little endian):
+    magic        4s   b"FPK1"
+    version      H
+    data_offset  H    where the first frame starts
+    width        H
+    height       H
+    frame_count  I
+    delay_ms     I    frame duration
+    pixel_format 8s   "BGRA", "RGBX" or "RGB", NUL padded
+"""
+
+import mmap
+import struct
+
+import pygame
+
+MAGIC = b"FPK1"
+VERSION = 1
+DATA_OFFSET = 64
+HEADER = struct.Struct("<4sHHHHII8s")
+
+# pack format -> (PIL mode, PIL raw mode, bytes per pixel)
+# BGRA matches the usual 32-bit XRGB8888 display surface byte for byte.
+PIXEL_FORMATS = {
+    "BGRA": ("RGBA", "BGRA", 4),
+    "RGBX": ("RGB", "RGBX", 4),
+    "RGB": ("RGB", "RGB", 3),
+}
+
+
+def write_pack(path, images, pixel_format="BGRA", delay_ms=100):
+    """Write PIL images (all the same size) to a frame-pack file."""
+    mode, rawmode, _ = PIXEL_FORMATS[pixel_format]
+    width, height = images[0].size
+    header = HEADER.pack(MAGIC, VERSION, DATA_OFFSET, width, height, len(images),
+                         delay_ms, pixel_format.encode())
+    with open(path, "wb") as f:
+        f.write(header.ljust(DATA_OFFSET, b"\0"))
+        for img in images:
+            f.write(img.convert(mode).tobytes("raw", rawmode))
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        data = f.read(HEADER.size)
+    return _parse_header(data, path)
+
+
+def _parse_header(data, path):
+    magic, version, offset, width, height, count, delay_ms, fmt = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a version {VERSION} frame pack")
+    fmt = fmt.rstrip(b"\0").decode()
+    if fmt not in PIXEL_FORMATS:
+        raise ValueError(f"{path}: unknown pixel format {fmt!r}")
+    return {"data_offset": offset, "size": (width, height), "frame_count": count,
+            "delay_ms": delay_ms, "pixel_format": fmt}
+
+
+class FramePack:
+    """
+    Memory-mapped frame pack. Behaves like a read-only list of surfaces;
+    each surface is created on first access and shares memory with the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        info = _parse_header(self._map, path)
+        self.size = info["size"]
+        self.delay_ms = info["delay_ms"]
+        self.pixel_format = info["pixel_format"]
+        self._offset = info["data_offset"]
+        self._frame_bytes = self.size[0] * self.size[1] * PIXEL_FORMATS[self.pixel_format][2]
+        self._count = info["frame_count"]
+        if len(self._map) < self._offset + self._count * self._frame_bytes:
+            raise ValueError(f"{path}: truncated frame pack")
+        self._view = memoryview(self._map)
+        self._surfaces = [None] * self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        surf = self._surfaces[index]
+        if surf is None:
+            start = self._offset + (index % self._count) * self._frame_bytes
+            data = self._view[start:start + self._frame_bytes]
+            surf = pygame.image.frombuffer(data, self.size, self.pixel_format)
+            if self.pixel_format == "BGRA":
+                surf.set_alpha(None)  # frames are opaque; blit without blending
+            self._surfaces[index] = surf
+        return surf
+
+    def close(self):
+        # Surfaces hold references into the map; drop them first
+        self._surfaces = [None] * self._count
+        self._view.release()
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Loading and playback of the distance animations (GIFs and .fpk frame packs
+written by animation.py) for scenes.AnimationScene. Importing this module
+has no side effects; loading needs pygame.display to be initialised.
+"""
+
+import functools
+import json
+import os
+
+import pygame
+from PIL import Image
+
+from framepack import FramePack
+
+_raw_frames = {}     # path -> decoded frames at GIF size
+_scaled_frames = {}  # (path, size) -> frames scaled and converted for the display
+
+
+def load_gif_frames(path):
+    if path in _raw_frames:
+        return _raw_frames[path]
+    frames = []
+    try:
+        pil_img = Image.open(path)
+        while True:
+            frame = pil_img.copy().convert("RGB")
+            mode = frame.mode
+            size = frame.size
+            data = frame.tobytes()
+            py_image = pygame.image.fromstring(data, size, mode)
+            frames.append(py_image)
+            pil_img.seek(len(frames))  # go to next frame
+    except EOFError:
+        pass
+    _raw_frames[path] = frames
+    return frames
+
+
+def load_scaled_frames(path, size):
+    """
+    Frames scaled once to size and converted to the display pixel format
+    (left as they are without a set_mode() screen, e.g. to upload as textures).
+    """
+    key = (path, tuple(size))
+    if key not in _scaled_frames:
+        frames = [pygame.transform.scale(f, size) for f in load_gif_frames(path)]
+        if pygame.display.get_surface() is not None:
+            frames = [f.convert() for f in frames]
+        _scaled_frames[key] = frames
+    return _scaled_frames[key]
+
+
+def band_animation_loaders(manifest_path, size):
+    """
+    The per-band animations listed in the manifest, at the generated size
+    closest to the display: [(max_cm, load)] sorted by distance, where load()
+    returns that band's frames. Nothing is decoded until load() is called.
+    """
+    try:
+        with open(manifest_path) as f:
+            animations = json.load(f)["animations"]
+    except (OSError, ValueError, KeyError):
+        return []
+    if not animations:
+        return []
+    area = size[0] * size[1]
+    best = min({tuple(a["size"]) for a in animations}, key=lambda s: abs(s[0] * s[1] - area))
+    folder = os.path.dirname(manifest_path)
+    bands = []
+    for a in sorted(animations, key=lambda a: a["min_cm"]):
+        if tuple(a["size"]) != best:
+            continue
+        if "pack" in a and best == tuple(size):
+            # Memory-mapped raw frames: no decode, no scaling
+            load = functools.partial(FramePack, os.path.join(folder, a["pack"]))
+        else:
+            load = functools.partial(load_scaled_frames, os.path.join(folder, a["file"]), size)
+        bands.append((a["max_cm"], load))
+    return bands
+
+
+def draw_frame(surface, frames, frame_index, frame_delay):
+    """
+    Blit the frame for frame_index (each frame is held for frame_delay
+    ticks) and return the next index.
+    """
+    if not frames:
+        return frame_index
+    frame_index %= len(frames) * frame_delay  # bands may differ in length
+    surface.blit(frames[frame_index // frame_delay], (0, 0))
+    return (frame_index + 1) % (len(frames) * frame_delay)
+
+
+def clear():
+    _raw_frames.clear()
+    _scaled_frames.clear()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Cached gradient surfaces for the bar meter.
+
+Gradients are generated once per (width, height, faded) with NumPy and
+pygame.surfarray, then cropped at draw time, so drawing the meter is a single
+blit instead of one Surface.fill per pixel column.
+"""
+
+import pygame
+
+try:
+    import numpy
+except ImportError:  # surfarray needs NumPy; fall back to building columns once
+    numpy = None
+
+_bar_cache = {}
+_scanner_cache = {}
+
+
+def bar_gradient(w, h, faded=False):
+    """Full-width fill gradient (green near, red far). Blit with area= to crop to fill_w."""
+    key = (w, h, faded)
+    surf = _bar_cache.get(key)
+    if surf is None:
+        surf = _make_bar(w, h, faded)
+        _bar_cache[key] = surf
+    return surf
+
+
+def scanner_gradient(w, h):
+    """Blue block with a triangular alpha ramp, used while waiting for the sensor."""
+    key = (w, h)
+    surf = _scanner_cache.get(key)
+    if surf is None:
+        surf = _make_scanner(w, h)
+        _scanner_cache[key] = surf
+    return surf
+
+
+def clear():
+    _bar_cache.clear()
+    _scanner_cache.clear()
+
+
+def _make_bar(w, h, faded):
+    w, h = max(1, w), max(1, h)
+    surf = pygame.Surface((w, h))
+    if faded:
+        surf.fill((150, 150, 150))
+        return surf
+    if numpy is not None:
+        t = numpy.arange(w) / w
+        cols = numpy.empty((w, 3), dtype=numpy.uint8)
+        cols[:, 0] = (40 + 200 * t).astype(numpy.uint8)
+        cols[:, 1] = (200 - 100 * t).astype(numpy.uint8)
+        cols[:, 2] = (60 + 60 * (1 - t)).astype(numpy.uint8)
+        pygame.surfarray.blit_array(surf, numpy.repeat(cols[:, None, :], h, axis=1))
+    else:
+        for i in range(w):
+            r = int(40 + 200 * (i / w))
+            g = int(200 - 100 * (i / w))
+            b = int(60 + 60 * (1 - i / w))
+            surf.fill((r, g, b), rect=pygame.Rect(i, 0, 1, h))
+    return surf
+
+
+def _make_scanner(w, h):
+    w, h = max(1, w), max(1, h)
+    surf = pygame.Surface((w, h), pygame.SRCALPHA)
+    half = w / 2
+    if numpy is not None:
+        surf.fill((80, 120, 200, 255))
+        alpha = (180 * (1 - numpy.abs(numpy.arange(w) - half) / half)).astype(numpy.uint8)
+        pixels = pygame.surfarray.pixels_alpha(surf)
+        pixels[:] = alpha[:, None]
+        del pixels  # unlock the surface
+    else:
+        for i in range(w):
+            alpha = int(180 * (1 - abs(i - half) / half))
+            surf.fill((80, 120, 200, alpha), rect=pygame.Rect(i, 0, 1, h))
+    return surf
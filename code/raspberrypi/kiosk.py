@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+All display modes in one resident process (scenes.py): one pygame display,
+one MQTT session on the asyncio core (mqtt_asyncio.py), one filtered
+distance. Switching mode swaps the scene that draws the next frame; nothing
+is re-initialised, reconnected or decoded.
+
+Switch with
+    keys        1 / 2 / 3, Tab or arrow keys for next / previous
+    touch       swipe left or right across the screen
+    MQTT        publish "band", "radar", "animation", "next" or "prev" to MODE_TOPIC
+
+SCENES=radar runs a single mode; display_controller_v2.py, static_visual_v2.py
+and display_controller_animation.py are launchers that do just that.
+
+Try it locally with:  python3 mini_broker.py &  BROKER_IP=127.0.0.1 python3 kiosk.py
+"""
+
+import asyncio
+import os
+import paho.mqtt.client as mqtt
+import pygame
+import time
+
+import distance_protocol
+import filters
+import latency
+import metrics
+import motion
+import sample_log
+import scenes
+import startup
+import texture_display
+from log_setup import MessageStats, rate_limited, setup_logging
+from mqtt_asyncio import AsyncController
+from sample_ring import SampleRing, make_buffers
+from settings import (BROKER_IP, BROKER_PORT, LOG_LEVEL, METRICS_HOST, METRICS_PORT, PASSWORD,
+                      RECONNECT_INITIAL, RECONNECT_MAX, REPLAY, REPLAY_SPEED, SAMPLE_LOG, USERNAME)
+
+# --- SETTINGS ---
+# Broker, reconnects, logging, metrics and the sample log are in settings.py
+TOPIC = "sensor/distance"
+MODE_TOPIC = "display/mode"  # payload: scene name, "next" or "prev"
+CLIENT_ID = "distance_kiosk_client"
+
+START_SCENE = os.environ.get("SCENE", "band")
+SCENES = os.environ.get("SCENES", "band,radar,animation")  # the modes offered, in order
+FULLSCREEN = os.environ.get("FULLSCREEN", "0") == "1"  # at the native resolution
+# "surface" (set_mode and flip), "texture" (GPU textures, software renderer
+# when there is no GPU) or "software"; see texture_display.py
+RENDERER = os.environ.get("RENDERER", "surface")
+MAX_FPS = 30  # cap for any scene
+PRELOAD_STEP = 0.01  # seconds of scene loading after each frame, until every scene is ready
+SWIPE_FRACTION = 0.25  # horizontal drag, as a fraction of the width, that switches scene
+GLIDE = 0.3             # motion smoothing between readings, see motion.py
+PREDICT_HORIZON = 0.25  # max seconds to extrapolate past a reading (0: off)
+
+# --- Logging ---
+log = setup_logging("kiosk", LOG_LEVEL)
+stats = MessageStats(log)  # periodic "N samples/s, M invalid" summary
+
+# --- Pygame Setup ---
+SCREEN_SIZE = (800, 480)
+display = texture_display.open_display((0, 0) if FULLSCREEN else SCREEN_SIZE, "Distance Display",
+                                       FULLSCREEN, RENDERER, log)
+loading_font = startup.font(None, 48)
+
+state = scenes.SceneState()
+samples = SampleRing()  # written by on_message, drained by frame(); same thread
+frame_times, frame_values = make_buffers(samples)
+distance_filter = filters.default_chain()  # outlier rejection, median and EMA
+estimator = motion.MotionEstimator(GLIDE, PREDICT_HORIZON)  # smooth value per frame
+last_activity = time.monotonic()
+
+# --- Scenes ---
+offered = [name.strip() for name in SCENES.split(",")]
+scene_list = [cls(display, state) for cls in scenes.SCENES if cls.name in offered]
+if not scene_list:
+    raise ValueError(f"SCENES={SCENES!r} names no scene (have "
+                     f"{', '.join(cls.name for cls in scenes.SCENES)})")
+scene_names = [s.name for s in scene_list]
+active = scene_list[scene_names.index(START_SCENE) if START_SCENE in scene_names else 0]
+startup.timer.mark("fonts")  # the scenes create theirs
+preloader = scenes.Preloader(scene_list, first=active, log=log)  # stepped by frame()
+swipe_start = None
+held_events = []  # input for the active scene while it is still loading
+
+def switch_scene(target):
+    """target: a scene name, "next" or "prev". Takes effect on the next frame."""
+    global active
+    i = scene_list.index(active)
+    if target == "next":
+        scene = scene_list[(i + 1) % len(scene_list)]
+    elif target == "prev":
+        scene = scene_list[(i - 1) % len(scene_list)]
+    elif target in scene_names:
+        scene = scene_list[scene_names.index(target)]
+    else:
+        log.warning("Unknown scene %r (have %s)", target, ", ".join(scene_names))
+        return
+    if scene is not active:
+        active = scene
+        active.enter()
+        held_events.clear()
+        log.info("Scene: %s", active.name)
+    controller.wake()
+
+# --- MQTT Callbacks (called from the event loop) ---
+def on_connect(client, userdata, flags, rc):
+    if rc == 0:
+        log.info("Connected to MQTT broker.")
+        startup.timer.mark("connect")
+        startup.timer.report(log)
+    else:
+        log.warning("Failed to connect, return code %s", rc)
+
+def on_message(client, userdata, msg):
+    if msg.topic == MODE_TOPIC:
+        switch_scene(msg.payload.decode(errors="ignore").strip().lower())
+        return
+    try:
+        # Binary batch from the ESP32, or a single ASCII number
+        batch = distance_protocol.decode(msg.payload)
+    except ValueError:
+        stats.invalid += 1
+        log.warning("Invalid MQTT payload received: %r", msg.payload)
+        return
+    stats.messages += 1
+    stats.samples += len(batch.values)
+    latency.probe.received(batch)
+    sample_log.recorder.append("", batch)
+    for t, distance in batch.timed(time.monotonic()):
+        samples.push(distance, t)
+    controller.wake()
+    log.debug("Received distance: %s cm", distance, extra=rate_limited(""))
+
+def on_disconnect(client, userdata, rc):
+    if rc == 0:
+        log.info("Clean disconnect from broker.")
+    else:
+        log.warning("Unexpected MQTT disconnect (rc=%s).", rc)
+
+def on_subscribe(client, userdata, mid, granted_qos):
+    log.info("Subscribed (mid=%s, qos=%s)", mid, granted_qos)
+
+# --- MQTT Client Setup ---
+client = mqtt.Client(client_id=CLIENT_ID)
+client.on_connect = on_connect
+client.on_message = on_message
+client.on_disconnect = on_disconnect
+client.on_subscribe = on_subscribe
+
+if USERNAME and PASSWORD:
+    client.username_pw_set(USERNAME, PASSWORD)
+
+client.will_set("clients/" + CLIENT_ID + "/status", payload="offline", qos=1, retain=True)
+
+controller = AsyncController(client, None if REPLAY else BROKER_IP, BROKER_PORT,
+                             topics=[TOPIC, MODE_TOPIC], fps=MAX_FPS,
+                             reconnect_initial=RECONNECT_INITIAL,
+                             reconnect_max=RECONNECT_MAX, log=log)
+
+# --- Metrics ---
+frame_metrics = metrics.FrameMetrics(1.0 / MAX_FPS)
+metrics.expose_stats(stats, samples)
+metrics.expose_text_cache()
+metrics.expose_connection(lambda: controller.connected, lambda: controller.reconnect_backoff)
+metrics.expose_ring_atlas()
+metrics.gauge("scene", "Index of the active scene (see scenes.SCENES)",
+              lambda: scenes.SCENES.index(type(active)))
+overlay = metrics.Overlay()
+overlay_state = None
+
+# --- Input ---
+SCENE_KEYS = {pygame.K_1: 0, pygame.K_2: 1, pygame.K_3: 2}
+
+def handle_event(event):
+    """Scene switching first, then the active scene. Returns False on quit."""
+    global swipe_start
+    if event.type == pygame.QUIT:
+        return False
+    if event.type == pygame.KEYDOWN:
+        if event.key in SCENE_KEYS and SCENE_KEYS[event.key] < len(scene_list):
+            switch_scene(scene_names[SCENE_KEYS[event.key]])
+        elif event.key in (pygame.K_TAB, pygame.K_RIGHT):
+            switch_scene("next")
+        elif event.key == pygame.K_LEFT:
+            switch_scene("prev")
+        return True
+    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+        swipe_start = event.pos
+    elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and swipe_start is not None:
+        dx = event.pos[0] - swipe_start[0]
+        swipe_start = None
+        if abs(dx) >= display.get_size()[0] * SWIPE_FRACTION:
+            switch_scene("prev" if dx > 0 else "next")
+            return True
+    if active.ready:
+        active.handle(event)
+    else:
+        held_events.append(event)  # e.g. a Start tap on the loading screen
+    return True
+
+# --- Frame ---
+def frame(events):
+    global overlay_state, last_activity
+    was_started = state.started
+    if held_events and active.ready:
+        for event in held_events:
+            active.handle(event)
+        held_events.clear()
+    for event in events:
+        if overlay.handle(event):
+            continue
+        if not handle_event(event):
+            return None
+    if was_started and not state.started:
+        # Stopped: forget the old reading
+        state.distance = None
+        samples.clear()
+        distance_filter.reset()
+        estimator.reset()
+
+    frame_metrics.start()
+    stats.maybe_log()
+    state.connected = controller.connected
+
+    # Consume every sample received since the last frame
+    latency.probe.frame()
+    n = samples.drain(frame_times, frame_values)
+    estimator.add_many(frame_times, frame_values, n, distance_filter)
+    shown = estimator.value_at(time.monotonic())
+    if shown is not None and int(round(shown)) != state.distance:
+        state.distance = int(round(shown))
+        last_activity = time.monotonic()
+
+    overlay_now = overlay.state()
+    if overlay_now != overlay_state:
+        overlay_state = overlay_now
+        active.enter()  # repaint under a hidden or refreshed overlay
+
+    scene = active
+    if scene.ready:
+        dirty = scene.draw()
+        on_canvas = scene.canvas
+    else:
+        dirty = scenes.draw_loading(display.canvas, loading_font, scene.name)
+        scene.enter()  # full repaint once it is ready
+        on_canvas = True
+    if dirty and overlay_state is not None:
+        if on_canvas:
+            overlay.draw(display.canvas, dirty)
+        else:
+            display.draw_overlay(overlay)
+
+    latency.probe.rendered()
+    if dirty:
+        if on_canvas:
+            display.present_canvas(dirty)
+        else:
+            display.present()
+        latency.probe.flipped()
+    frame_metrics.stop()
+
+    if not preloader.done:
+        preloader.step(PRELOAD_STEP)
+        return 0  # keep loading at up to MAX_FPS steps a second
+    if estimator.moving(time.monotonic()):
+        return 1.0 / scene.fps  # let the distance settle smoothly
+    if scene.animating():
+        idle = scene.idle_after is not None and time.monotonic() - last_activity > scene.idle_after
+        return 1.0 / (scene.idle_fps if idle else scene.fps)
+    return 1.0 / scene.idle_fps
+
+# First frame; the broker connect runs on the event loop afterwards
+frame([])
+startup.timer.mark("first frame")
+
+# --- Main loop ---
+async def main():
+    await metrics.serve_async(METRICS_PORT, METRICS_HOST)
+    replay = None
+    if REPLAY:
+        startup.timer.report(log)
+        log.info("Replaying %s at %sx", REPLAY, REPLAY_SPEED)
+        deliver = lambda msg: on_message(client, None, msg)
+        replay = sample_log.replay_task(REPLAY, deliver, REPLAY_SPEED, log)
+    elif SAMPLE_LOG:
+        sample_log.recorder.open(SAMPLE_LOG, log=log)
+    try:
+        await controller.run(frame)
+    finally:
+        if replay is not None:
+            await sample_log.cancel_replay(replay)
+
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    pass
+log.info("Shutting down.")
+sample_log.recorder.close()
+pygame.quit()
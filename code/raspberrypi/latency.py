@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Sample-to-pixel latency instrumentation.
+
+The controllers call the module-level `probe` at four points:
+
+    probe.received(batch)   MQTT callback, after decoding
+    probe.frame()           render loop, just before draining the samples
+    probe.rendered()        after drawing, before the flip/update
+    probe.flipped()         after pygame.display.flip()/update()
+
+It stays disabled (each call is one attribute check) unless something such
+as latency_bench.py calls probe.enable(). Only batches whose timestamp is a
+wall clock (distance_protocol.FLAG_WALLCLOCK, set by sensor_emulator.py)
+can be measured, and only when sender and display share a clock.
+"""
+
+import bisect
+import time
+from collections import deque
+
+import distance_protocol
+
+# Bucket upper bounds in ms for the latency histograms
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram; keeps raw values (up to max_values) for percentiles."""
+
+    def __init__(self, buckets=BUCKETS_MS, max_values=200000):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.total = 0.0
+        self.max_values = max_values
+        self.values = []
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        if len(self.values) < self.max_values:
+            self.values.append(value)
+
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, q):
+        if not self.values:
+            return float("nan")
+        values = sorted(self.values)
+        return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.values = []
+
+
+class LatencyProbe:
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self._pending = deque()   # (sent_ms, received_ms) appended by the MQTT thread
+        self._in_flight = []      # taken by the render loop, waiting for the flip
+        self._rendered_ms = None
+        self.samples = 0          # all samples seen, measurable or not
+        self.frames = 0
+        self.receive = Histogram()  # sensor -> on_message
+        self.render = Histogram()   # sensor -> drawn into the back buffer
+        self.flip = Histogram()     # sensor -> on screen
+
+    # --- MQTT thread ---
+    def received(self, batch):
+        if not self.enabled:
+            return
+        self.samples += len(batch.values)
+        if not batch.flags & distance_protocol.FLAG_WALLCLOCK:
+            return
+        now_ms = time.time() * 1000.0
+        for i in range(len(batch.values)):
+            sent = batch.timestamp_ms + i * batch.interval_ms
+            # Timestamps are Unix ms truncated to 32 bits; undo the wrap
+            age = (int(now_ms) - sent) % 2**32
+            if age >= 2**31:  # stamped slightly ahead of our clock
+                age -= 2**32
+            self._pending.append((now_ms - age, now_ms))
+
+    # --- render loop ---
+    def frame(self):
+        if not self.enabled:
+            return
+        pending = self._pending
+        while pending:  # popleft is safe against the concurrent append
+            self._in_flight.append(pending.popleft())
+
+    def rendered(self):
+        if self.enabled:
+            self._rendered_ms = time.time() * 1000.0
+
+    def flipped(self):
+        if not self.enabled:
+            return
+        now_ms = time.time() * 1000.0
+        rendered_ms = self._rendered_ms if self._rendered_ms is not None else now_ms
+        self.frames += 1
+        for sent, received in self._in_flight:
+            self.receive.add(received - sent)
+            self.render.add(rendered_ms - sent)
+            self.flip.add(now_ms - sent)
+        self._in_flight = []
+        self._rendered_ms = None
+
+
+probe = LatencyProbe()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency and throughput of the display controllers.
+
+For each controller variant this starts a local broker (mini_broker.py,
+or --broker host:port for mosquitto), runs the controller with the latency
+probe enabled, presses its Start button, and feeds it from
+sensor_emulator.py at increasing reading rates. Per rate it reports how many
+readings reached the controller and the sensor -> on_message -> drawn ->
+on-screen latency percentiles; the throughput ceiling is the highest rate
+that was still delivered (>= 95%) with p99 on-screen latency under
+--max-latency. Latency counts from the moment each reading was taken, so it
+includes the time a reading waits for its batch to be sent (--batch 1 to
+leave that out).
+
+    python3 latency_bench.py --variant display_controller_async
+    python3 latency_bench.py --rates 20,200,2000 --duration 5 --out latency.json
+
+Runs headless (SDL dummy driver) unless --display is given; use --display on
+the Pi to include the real flip.
+"""
+
+import argparse
+import json
+import os
+import runpy
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import latency
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (script, Start button position or None, multi-sensor topic)
+VARIANTS = {
+    "display_controller": ("display_controller.py", None, False),
+    "display_controller_v2": ("display_controller_v2.py", (60, 430), False),
+    "display_controller_async": ("display_controller_async.py", (60, 430), False),
+    "static_visual": ("static_visual.py", None, False),
+    "static_visual_v2": ("static_visual_v2.py", (400, 370), False),
+    "display_controller_animation": ("display_controller_animation.py", (700, 450), False),
+    "multi_sensor_display": ("multi_sensor_display.py", None, True),
+    "kiosk": ("kiosk.py", (60, 430), False),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def summarize(hist):
+    return {
+        "count": hist.count(),
+        "p50_ms": round(hist.percentile(50), 2),
+        "p90_ms": round(hist.percentile(90), 2),
+        "p99_ms": round(hist.percentile(99), 2),
+        "buckets_ms": list(hist.buckets),
+        "counts": list(hist.counts),
+    }
+
+
+# --- child: one controller in this process ---
+def _drive(args, host, port, results):
+    """Runs next to the controller's main loop: click Start, step the emulator, quit."""
+    import pygame
+
+    probe = latency.probe
+    time.sleep(args.settle)
+    _, start_pos, multi = VARIANTS[args.child]
+    if start_pos is not None:
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=start_pos))
+        time.sleep(0.5)
+    for rate in args.rates:
+        sensors = args.sensors if multi else 1
+        # At most half a second of readings per message, as a sensor would send
+        batch = max(1, min(args.batch, int(rate / sensors * 0.5)))
+        probe.enable()
+        t = time.monotonic()
+        out = subprocess.run(
+            [sys.executable, os.path.join(HERE, "sensor_emulator.py"),
+             "--host", host, "--port", str(port), "--sensors", str(sensors),
+             "--rate", str(rate / sensors), "--batch", str(batch),
+             "--jitter", str(args.jitter), "--duration", str(args.duration)],
+            capture_output=True, text=True).stdout
+        time.sleep(0.5)  # let the last frames reach the screen
+        elapsed = time.monotonic() - t
+        probe.disable()
+        sent = int(out.split()[1]) if out.startswith("Published") else 0
+        results.append({
+            "rate": rate,
+            "sensors": sensors,
+            "offered_per_s": round(sent / args.duration, 1),
+            "delivered_per_s": round(probe.samples / args.duration, 1),
+            "frames_per_s": round(probe.frames / elapsed, 1),
+            "receive": summarize(probe.receive),
+            "render": summarize(probe.render),
+            "flip": summarize(probe.flip),
+        })
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+
+def run_child(args):
+    if not args.display:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    host, port = args.broker.split(":")
+    os.environ["BROKER_IP"], os.environ["BROKER_PORT"] = host, port
+    os.environ.setdefault("SAMPLE_LOG", os.path.join(args.tmp, "latency_bench.dslog"))
+    os.environ.setdefault("FULLSCREEN", "0")  # the Start positions above are for 800x480
+    results = []
+    threading.Thread(target=_drive, args=(args, host, int(port), results), daemon=True).start()
+    script = VARIANTS[args.child][0]
+    os.chdir(HERE)  # the scripts load assets relative to their folder
+    try:
+        runpy.run_path(os.path.join(HERE, script), run_name="__main__")
+    except SystemExit:
+        pass
+    with open(args.result, "w") as f:
+        json.dump(results, f)
+
+
+# --- parent: broker and one child per variant ---
+def ceiling(steps, max_latency):
+    ok = [s for s in steps
+          if s["offered_per_s"] and s["delivered_per_s"] >= 0.95 * s["offered_per_s"]
+          and s["flip"]["count"] and s["flip"]["p99_ms"] <= max_latency]
+    return max((s["delivered_per_s"] for s in ok), default=0.0)
+
+
+def print_histogram(hist):
+    total = sum(hist["counts"]) or 1
+    edges = [f"<={b}" for b in hist["buckets_ms"]] + [f">{hist['buckets_ms'][-1]}"]
+    for edge, n in zip(edges, hist["counts"]):
+        print(f"    {edge:>7} ms {n:>7}  {'#' * int(50 * n / total)}")
+
+
+def print_report(name, steps, max_latency):
+    print(f"\n== {name}")
+    print(f"  {'rate/s':>8}{'offered':>9}{'delivered':>10}{'fps':>6}"
+          f"{'recv p50':>9}{'flip p50':>9}{'flip p90':>9}{'flip p99':>9}  (ms)")
+    for s in steps:
+        print(f"  {s['rate']:>8}{s['offered_per_s']:>9.0f}{s['delivered_per_s']:>10.0f}"
+              f"{s['frames_per_s']:>6.0f}{s['receive']['p50_ms']:>9.1f}"
+              f"{s['flip']['p50_ms']:>9.1f}{s['flip']['p90_ms']:>9.1f}{s['flip']['p99_ms']:>9.1f}")
+    if steps:
+        print(f"  sample -> screen latency at {steps[0]['rate']} readings/s:")
+        print_histogram(steps[0]["flip"])
+    print(f"  throughput ceiling: ~{ceiling(steps, max_latency):.0f} readings/s")
+
+
+def run_parent(args):
+    broker = None
+    if args.broker is None:
+        port = free_port()
+        broker = subprocess.Popen([sys.executable, os.path.join(HERE, "mini_broker.py"),
+                                   "--port", str(port)], stderr=subprocess.DEVNULL)
+        args.broker = f"127.0.0.1:{port}"
+        time.sleep(0.5)
+    report = {}
+    try:
+        for name in args.variant or list(VARIANTS):
+            result = os.path.join(args.tmp, f"latency_{name}.json")
+            cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--result", result,
+                   "--broker", args.broker, "--rates", ",".join(map(str, args.rates)),
+                   "--duration", str(args.duration), "--batch", str(args.batch),
+                   "--jitter", str(args.jitter), "--sensors", str(args.sensors),
+                   "--settle", str(args.settle)]
+            if args.display:
+                cmd.append("--display")
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                with open(result) as f:
+                    steps = json.load(f)
+                os.remove(result)
+            except (OSError, ValueError):
+                print(f"\n== {name}: controller did not produce results")
+                continue
+            report[name] = {"steps": steps, "ceiling_per_s": ceiling(steps, args.max_latency)}
+            print_report(name, steps, args.max_latency)
+    finally:
+        if broker is not None:
+            broker.terminate()
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved {args.out}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sensor-to-screen latency benchmark.")
+    parser.add_argument("--variant", action="append", choices=list(VARIANTS),
+                        help="controller to measure (repeatable; default all)")
+    parser.add_argument("--rates", type=lambda s: [float(x) for x in s.split(",")],
+                        default=[20, 100, 500, 2000, 10000], help="total readings/s to try")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per rate")
+    parser.add_argument("--batch", type=int, default=10, help="max readings per message")
+    parser.add_argument("--jitter", type=float, default=5.0, help="+/- ms on each send")
+    parser.add_argument("--sensors", type=int, default=50, help="sensors for multi_sensor_display")
+    parser.add_argument("--broker", help="host:port of a running broker (default: start mini_broker)")
+    parser.add_argument("--max-latency", type=float, default=250.0,
+                        help="p99 ms still counted as keeping up")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait for connect")
+    parser.add_argument("--display", action="store_true", help="use the real display")
+    parser.add_argument("--out", help="write all results as JSON")
+    parser.add_argument("--tmp", default=tempfile.gettempdir())
+    parser.add_argument("--child", choices=list(VARIANTS), help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        run_child(args)
+    else:
+        run_parent(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Non-blocking, rate-limited logging for the display controllers.
+
+Log calls only build a record and put it on a queue; a background listener
+thread does the actual (possibly slow) write to stdout/journald, so the paho
+network thread never blocks on I/O. Hot-path DEBUG calls such as
+"Received distance" opt into a rate limit with extra=rate_limited(), so
+they cannot flood the log; everything else, and every INFO and higher
+record, is logged as it comes. MessageStats turns the per-sample traffic
+into periodic summary lines.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener = None
+
+
+def rate_limited(key=True):
+    """
+    extra= for a hot-path DEBUG call: log.debug("Received %s", v, extra=rate_limited("")).
+    Records with the same logger, message and key pass once per interval.
+    The default key is the call's arguments, so only exact repeats are
+    thinned out; per-sample lines pass a coarser one ("" or a sensor id).
+    """
+    return {"rate_limit": key}
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Pass at most one rate_limited() DEBUG record per (logger, message, key)
+    every `interval` seconds. The next record that gets through reports how
+    many were suppressed in between. Other records always pass.
+    """
+
+    def __init__(self, interval=1.0):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+
+    def filter(self, record):
+        limit = getattr(record, "rate_limit", None)
+        if limit is None or record.levelno >= logging.INFO:
+            return True
+        key = (record.name, record.levelno, record.msg, record.args if limit is True else limit)
+        last = self._last.get(key)
+        if last is not None and record.created - last < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+        self._last[key] = record.created
+        skipped = self._suppressed.pop(key, 0)
+        if skipped:
+            record.msg = f"{record.msg} [{skipped} similar suppressed]"
+        return True
+
+
+def setup_logging(name, level="INFO", rate_interval=1.0):
+    """
+    Return the logger for a controller. The queue handler and its listener
+    thread are installed on the root logger once per process.
+    """
+    global _listener
+    if _listener is None:
+        q = queue.SimpleQueue()
+        handler = logging.handlers.QueueHandler(q)
+        handler.addFilter(RateLimitFilter(rate_interval))
+        out = logging.StreamHandler(sys.stdout)
+        out.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = logging.handlers.QueueListener(q, out)
+        _listener.start()
+        atexit.register(_listener.stop)  # flush queued records on exit
+        logging.getLogger().addHandler(handler)
+    log = logging.getLogger(name)
+    log.setLevel(level)
+    return log
+
+
+class MessageStats:
+    """
+    Counters bumped from the MQTT thread (one writer), summarised from the
+    render loop: "12.0 samples/s, 1.2 msgs/s, 0 invalid".
+    """
+
+    def __init__(self, log, interval=10.0):
+        self.log = log
+        self.interval = interval
+        self.messages = 0
+        self.samples = 0
+        self.invalid = 0
+        self._since = time.monotonic()
+        self._seen = (0, 0, 0)
+
+    def maybe_log(self, now=None):
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._since
+        if elapsed < self.interval:
+            return
+        current = (self.messages, self.samples, self.invalid)
+        messages, samples, invalid = (c - s for c, s in zip(current, self._seen))
+        self._since, self._seen = now, current
+        if messages or invalid:  # stay quiet while nothing arrives
+            self.log.info("%.1f samples/s, %.1f msgs/s, %d invalid",
+                          samples / elapsed, messages / elapsed, invalid)
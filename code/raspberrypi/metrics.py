@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Counters, gauges and histograms for the display controllers, exposed in
+Prometheus text format on http://<pi>:<port>/metrics and as an on-screen
+overlay (F3).
+
+The hot path stays cheap: most metrics are read at scrape time from state
+the controllers keep anyway (MessageStats, SampleRing.dropped, the
+reconnect globals, the drawing caches' stats()) by passing fn=...; the render loop only adds a
+FrameMetrics start()/stop() pair per frame. Updates are plain attribute
+writes without locks, so a concurrent increment can very rarely be lost.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pygame
+
+import ring_atlas
+import startup
+import text_cache
+
+PREFIX = "distance_display_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+FRAME_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_registry = {}  # name -> metric, in registration order
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, fn=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+    def get(self):
+        return self.fn() if self.fn is not None else self.value
+
+    def samples(self):
+        yield self.name, "", self.get()
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def samples(self):
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield self.name + "_bucket", f'{{le="{le}"}}', cumulative
+        yield self.name + "_sum", "", self.sum
+        yield self.name + "_count", "", self.count
+
+
+def _register(cls, name, *args):
+    name = PREFIX + name
+    metric = _registry.get(name)
+    if metric is None:
+        metric = _registry[name] = cls(name, *args)
+    return metric
+
+
+def counter(name, help, fn=None):
+    """Monotonic count; with fn, the value is read from fn() at scrape time."""
+    return _register(Counter, name, help, fn)
+
+
+def gauge(name, help, fn=None):
+    return _register(Gauge, name, help, fn)
+
+
+def histogram(name, help, buckets):
+    return _register(Histogram, name, help, buckets)
+
+
+def exposition():
+    """All metrics in Prometheus text format."""
+    lines = []
+    for metric in _registry.values():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {float(value)!r}")
+    return "\n".join(lines) + "\n"
+
+
+def clear():
+    _registry.clear()
+
+
+# --- Controller helpers ---
+class FrameMetrics:
+    """Time each frame's work; frames over budget (1/FPS) count as late."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.seconds = histogram("frame_seconds", "Time spent drawing one frame", FRAME_BUCKETS)
+        self.late = counter("frames_late_total", "Frames that took longer than the frame budget")
+        self._start = 0.0
+
+    def start(self):
+        self._start = time.perf_counter()
+
+    def stop(self):
+        elapsed = time.perf_counter() - self._start
+        self.seconds.observe(elapsed)
+        if elapsed > self.budget:
+            self.late.value += 1
+
+
+def expose_stats(stats, ring=None):
+    """Publish a log_setup.MessageStats (and a SampleRing's drops) without extra work per message."""
+    counter("mqtt_messages_total", "MQTT messages decoded", lambda: stats.messages)
+    counter("samples_total", "Distance readings received", lambda: stats.samples)
+    counter("invalid_payloads_total", "MQTT payloads that could not be decoded", lambda: stats.invalid)
+    if ring is not None:
+        counter("samples_dropped_total", "Readings overwritten before the render loop used them",
+                lambda: ring.dropped)
+
+
+def expose_connection(connected, backoff=None, last_disconnect=None):
+    """Connection state from callables, e.g. lambda: reconnect_backoff."""
+    gauge("mqtt_connected", "1 while connected to the broker", lambda: int(bool(connected())))
+    if backoff is not None:
+        gauge("mqtt_reconnect_backoff_seconds", "Current reconnect back-off", backoff)
+    if last_disconnect is not None:
+        gauge("mqtt_last_disconnect_timestamp_seconds", "Unix time of the last disconnect",
+              last_disconnect)
+
+
+def expose_ring_atlas():
+    """ring_atlas's size and hit rate, for the controllers that draw the radar."""
+    stats = ring_atlas.stats
+    gauge("ring_atlas_bytes", "Pixel memory of the cached ring sprites", lambda: stats()["bytes"])
+    gauge("ring_atlas_sprites", "Ring sprites in the cache", lambda: stats()["entries"])
+    counter("ring_atlas_hits_total", "Rings drawn from a cached sprite", lambda: stats()["hits"])
+    counter("ring_atlas_misses_total", "Ring sprites rendered", lambda: stats()["misses"])
+    counter("ring_atlas_evictions_total", "Ring sprites dropped to stay under ring_atlas.MAX_BYTES",
+            lambda: stats()["evictions"])
+
+
+def expose_text_cache():
+    """text_cache's size and hit rate; every controller draws its labels through it."""
+    stats = text_cache.stats
+    gauge("text_cache_labels", f"Rendered labels in the cache (at most {text_cache.MAX_ENTRIES})",
+          lambda: stats()["entries"])
+    counter("text_cache_hits_total", "Labels drawn from the cache", lambda: stats()["hits"])
+    counter("text_cache_misses_total", "Labels rendered", lambda: stats()["misses"])
+
+
+# --- HTTP endpoint ---
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # no per-scrape log lines
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread. Returns the server, or None if the port is taken."""
+    try:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError:
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+async def serve_async(port, host="127.0.0.1"):
+    """Serve /metrics on the running event loop (for the asyncio controllers)."""
+
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # skip headers
+            parts = request.split()
+            if len(parts) >= 2 and parts[1].split(b"?")[0] == b"/metrics":
+                body = exposition().encode()
+                head = f"HTTP/1.0 200 OK\r\nContent-Type: {CONTENT_TYPE}\r\n"
+            else:
+                body = b"not found\n"
+                head = "HTTP/1.0 404 Not Found\r\nContent-Type: text/plain\r\n"
+            writer.write(f"{head}Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    try:
+        return await asyncio.start_server(handle, host, port)
+    except OSError:
+        return None
+
+
+# --- On-screen overlay ---
+class Overlay:
+    """
+    Translucent panel listing every metric: counters as per-second rates and
+    totals, gauges as values, histograms as averages over the last second.
+    The text is refreshed once per second, so drawing it is a few cached blits.
+    """
+
+    def __init__(self, font=None, key=pygame.K_F3, pos=(8, 44)):
+        self.font = font or startup.font(None, 22)
+        self.key = key
+        self.pos = pos
+        self.visible = False
+        self._lines = ()
+        self._last = {}
+        self._updated = 0.0
+        self._panel = None
+        self._composed = None  # (lines, surface) for panel()
+
+    @property
+    def rect(self):
+        line_h = self.font.get_linesize()
+        return pygame.Rect(self.pos, (340, 12 + line_h * len(_registry)))
+
+    def handle(self, event):
+        """Toggle on the key; returns True when the event was consumed."""
+        if event.type == pygame.KEYDOWN and event.key == self.key:
+            self.visible = not self.visible
+            self._updated = 0.0
+            return True
+        return False
+
+    def state(self):
+        """Changes when the overlay needs redrawing (for DirtyRenderer / needs_redraw)."""
+        if not self.visible:
+            return None
+        now = time.monotonic()
+        if now - self._updated >= 1.0:
+            self._lines = self._format(now - self._updated if self._updated else 0.0)
+            self._updated = now
+        return self._lines
+
+    def draw(self, surface, areas=None):
+        """
+        areas: the rects repainted this frame, for partial redraws. The panel
+        is translucent, so it is only blended over those; blending it again
+        over pixels that were not repainted would darken them.
+        """
+        lines = self.state()
+        if lines is None:
+            return
+        rect = self.rect
+        if areas is not None:
+            clip = surface.get_clip()
+            for area in areas:
+                part = rect.clip(area)
+                if part:
+                    surface.set_clip(part)
+                    self.draw(surface)
+            surface.set_clip(clip)
+            return
+        if self._panel is None or self._panel.get_size() != rect.size:
+            self._panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+            self._panel.fill((0, 0, 0, 170))
+        surface.blit(self._panel, rect)
+        y = rect.y + 6
+        for line in lines:
+            surface.blit(text_cache.render(self.font, line, True, (220, 220, 220)), (rect.x + 8, y))
+            y += self.font.get_linesize()
+
+    def panel(self):
+        """
+        The panel with its text as one translucent surface, or None while
+        hidden, for displays that upload it (texture_display.TextureDisplay).
+        The same surface is redrawn whenever state() changes.
+        """
+        lines = self.state()
+        if lines is None:
+            return None
+        if self._composed is None or self._composed[0] is not lines:
+            surface = self._composed[1] if self._composed is not None else None
+            if surface is None or surface.get_size() != self.rect.size:
+                surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            surface.fill((0, 0, 0, 170))
+            y = 6
+            for line in lines:
+                surface.blit(text_cache.render(self.font, line, True, (220, 220, 220)), (8, y))
+                y += self.font.get_linesize()
+            self._composed = (lines, surface)
+        return self._composed[1]
+
+    def _format(self, elapsed):
+        lines = []
+        for metric in _registry.values():
+            name = metric.name[len(PREFIX):]
+            if metric.kind == "counter":
+                value = metric.get()
+                previous = self._last.get(name)
+                self._last[name] = value
+                if previous is not None and elapsed > 0:
+                    lines.append(f"{name}: {value:g} ({(value - previous) / elapsed:.1f}/s)")
+                else:
+                    lines.append(f"{name}: {value:g}")
+            elif metric.kind == "histogram":
+                previous = self._last.get(name, (0.0, 0))
+                self._last[name] = (metric.sum, metric.count)
+                n = metric.count - previous[1]
+                avg = (metric.sum - previous[0]) / n if n else 0.0
+                lines.append(f"{name}: avg {avg * 1000:.1f} ms, {n} in last interval")
+            else:
+                lines.append(f"{name}: {metric.get():g}")
+        return tuple(lines)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Minimal in-process MQTT 3.1.1 broker for trying the controllers without
+mosquitto: CONNECT, SUBSCRIBE/UNSUBSCRIBE (with + and # wildcards),
+PUBLISH (delivered at QoS 0, QoS 1 publishes are acknowledged), PINGREQ
+and DISCONNECT. No retained messages, wills, sessions or authentication.
+
+    python3 mini_broker.py --port 1883
+
+or from asyncio code:
+
+    broker = MiniBroker()
+    await broker.start("127.0.0.1", 1883)
+"""
+
+import argparse
+import asyncio
+import logging
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+log = logging.getLogger("mini_broker")
+
+
+def topic_matches(pattern, topic):
+    """MQTT topic filter match, e.g. topic_matches("sensor/+/distance", "sensor/3/distance")."""
+    p_parts = pattern.split("/")
+    t_parts = topic.split("/")
+    for i, part in enumerate(p_parts):
+        if part == "#":
+            return True
+        if i >= len(t_parts) or (part != "+" and part != t_parts[i]):
+            return False
+    return len(p_parts) == len(t_parts)
+
+
+def _packet(kind, body=b"", flags=0):
+    header = bytearray([kind << 4 | flags])
+    n = len(body)
+    while True:  # variable-length "remaining length"
+        byte, n = n % 128, n // 128
+        header.append(byte | (0x80 if n else 0))
+        if not n:
+            break
+    return bytes(header) + body
+
+
+def _string(data, pos):
+    n = int.from_bytes(data[pos:pos + 2], "big")
+    return data[pos + 2:pos + 2 + n].decode("utf-8"), pos + 2 + n
+
+
+class MiniBroker:
+    def __init__(self):
+        self.subscriptions = {}  # writer -> set of topic filters
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=1883):
+        self.server = await asyncio.start_server(self._client, host, port)
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self.subscriptions):
+            writer.close()
+
+    def publish(self, topic, payload):
+        """Deliver a message to every matching subscriber (QoS 0)."""
+        body = len(topic.encode()).to_bytes(2, "big") + topic.encode() + payload
+        packet = _packet(PUBLISH, body)
+        for writer, filters in self.subscriptions.items():
+            if any(topic_matches(f, topic) for f in filters):
+                writer.write(packet)
+
+    async def _client(self, reader, writer):
+        self.subscriptions[writer] = set()
+        try:
+            while True:
+                first = await reader.readexactly(1)
+                length, shift = 0, 0
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length |= (byte & 0x7F) << shift
+                    shift += 7
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                kind, flags = first[0] >> 4, first[0] & 0x0F
+                if kind == DISCONNECT:
+                    break
+                self._handle(writer, kind, flags, body)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.subscriptions.pop(writer, None)
+            writer.close()
+
+    def _handle(self, writer, kind, flags, body):
+        if kind == CONNECT:
+            writer.write(_packet(CONNACK, b"\x00\x00"))
+        elif kind == PUBLISH:
+            topic, pos = _string(body, 0)
+            qos = (flags >> 1) & 0x03
+            if qos:
+                packet_id, pos = body[pos:pos + 2], pos + 2
+                writer.write(_packet(PUBACK, packet_id))
+            self.publish(topic, body[pos:])
+        elif kind == SUBSCRIBE:
+            pos, granted = 2, bytearray()
+            while pos < len(body):
+                pattern, pos = _string(body, pos)
+                pos += 1  # requested QoS; everything is delivered at 0
+                self.subscriptions[writer].add(pattern)
+                granted.append(0)
+            writer.write(_packet(SUBACK, body[:2] + bytes(granted)))
+        elif kind == UNSUBSCRIBE:
+            pos = 2
+            while pos < len(body):
+                pattern, pos = _string(body, pos)
+                self.subscriptions[writer].discard(pattern)
+            writer.write(_packet(UNSUBACK, body[:2]))
+        elif kind == PINGREQ:
+            writer.write(_packet(PINGRESP))
+        else:
+            log.warning("Ignoring packet type %d", kind)
+
+
+async def _serve(host, port):
+    broker = MiniBroker()
+    server = await broker.start(host, port)
+    log.info("Listening on %s:%d", host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minimal MQTT broker for local testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+    try:
+        asyncio.run(_serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Smooth per-frame display values between sparse readings.
+
+The sensor sends a batch every 500 ms, but the radar displays draw 30 frames
+a second; showing the newest filtered reading makes the meter jump once per
+batch and then stand still. MotionEstimator is fed the filtered readings
+with their sample times (add) and asked for the value to show at the frame
+time (value_at):
+
+- Interpolation: a new reading does not move the display at once; the shown
+  value glides from where it was onto the new estimate over `glide` seconds.
+- Extrapolation (horizon > 0): between readings the estimate follows the
+  recent velocity, but for at most `horizon` seconds past the newest
+  reading (bounded dead reckoning), then holds. horizon=0 only interpolates.
+
+add() and value_at() are a handful of float operations with no allocation,
+so one estimator per sensor is cheap to evaluate every frame.
+
+    python3 motion.py --bench      # cost of value_at() for many sensors
+"""
+
+import argparse
+import time
+
+GLIDE = 0.3     # seconds to blend onto a new reading
+HORIZON = 0.25  # max seconds to extrapolate past the newest reading
+
+
+class MotionEstimator:
+    __slots__ = ("glide", "horizon", "velocity_alpha",
+                 "_t", "_value", "_velocity", "_shown", "_shown_t", "_offset", "_offset_t")
+
+    def __init__(self, glide=GLIDE, horizon=HORIZON, velocity_alpha=0.3):
+        """velocity_alpha: EMA weight of each new reading-to-reading slope (cm/s)."""
+        self.glide = glide
+        self.horizon = horizon
+        self.velocity_alpha = velocity_alpha
+        self.reset()
+
+    def reset(self):
+        self._t = None         # time of the newest reading
+        self._value = 0.0      # newest reading
+        self._velocity = 0.0   # cm/s
+        self._shown = None     # last value_at() result...
+        self._shown_t = 0.0    # ...and its time
+        self._offset = 0.0     # shown minus estimate when the last reading came in
+        self._offset_t = 0.0   # time the glide started
+
+    @property
+    def ready(self):
+        return self._t is not None
+
+    def moving(self, now):
+        """True while value_at() is still changing (gliding or extrapolating)."""
+        if self._t is None:
+            return False
+        return bool(self._offset) or (self._velocity != 0.0 and now - self._t < self.horizon)
+
+    def add(self, t, value):
+        """Feed one filtered reading taken at t (time.monotonic() seconds)."""
+        last_t = self._t
+        if last_t is not None:
+            if t < last_t:
+                return  # older than what we have
+            if t > last_t:
+                slope = (value - self._value) / (t - last_t)
+                self._velocity += self.velocity_alpha * (slope - self._velocity)
+        self._t = t
+        self._value = value
+        if self._shown is not None and self.glide > 0:
+            # Glide from what is on screen onto the corrected estimate
+            self._offset = self._shown - self._estimate(self._shown_t)
+            self._offset_t = self._shown_t
+        else:
+            self._offset = 0.0
+
+    def add_many(self, times, values, n, chain=None):
+        """
+        add() readings [:n] (e.g. what SampleRing.drain() returned), first
+        through `chain` (a filters.FilterChain) if given, skipping what it drops.
+        """
+        for i in range(n):
+            value = values[i] if chain is None else chain.update(values[i])
+            if value is not None:
+                self.add(times[i], value)
+
+    def _estimate(self, now):
+        dt = now - self._t
+        if dt <= 0.0:
+            return self._value
+        return self._value + self._velocity * (dt if dt < self.horizon else self.horizon)
+
+    def value_at(self, now):
+        """Value to show at `now`; None before the first reading."""
+        if self._t is None:
+            return None
+        value = self._estimate(now)
+        if self._offset:
+            k = 1.0 - (now - self._offset_t) / self.glide
+            if k > 0.0:
+                value += self._offset * (k if k < 1.0 else 1.0)
+            else:
+                self._offset = 0.0
+        self._shown = value
+        self._shown_t = now
+        return value
+
+
+# --- Benchmark ---
+def _bench(sensors, frames):
+    estimators = [MotionEstimator() for _ in range(sensors)]
+    t0 = time.monotonic()
+    for i, e in enumerate(estimators):
+        e.add(t0 - 0.1, 50.0 + i % 7)
+        e.add(t0, 52.0 + i % 7)
+    t = time.perf_counter()
+    for f in range(frames):
+        now = t0 + f / 30
+        for e in estimators:
+            e.value_at(now)
+    per_call = (time.perf_counter() - t) / (sensors * frames) * 1e9
+    print(f"{sensors} sensors: {per_call:.0f} ns per value_at(), "
+          f"{per_call * sensors / 1e6:.3f} ms per frame")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Motion estimator benchmark.")
+    parser.add_argument("--bench", action="store_true", help="measure value_at() cost")
+    parser.add_argument("--sensors", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args(argv)
+    if args.bench:
+        _bench(args.sensors, args.frames)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Single-threaded asyncio core: MQTT I/O and rendering on one event loop.
+
+AsyncMqtt drives a paho client through its socket callbacks (loop_read /
+loop_write / loop_misc are called from the event loop, no loop_start()
+thread). AsyncController runs the render loop and the connect/reconnect
+loop as tasks, and a slow or missing broker never blocks a frame: paho's
+connect() (name lookup and TCP handshake) is blocking, so it runs on the
+loop's default executor and the socket callbacks it fires there are handed
+back to the loop thread. A connect() that outlasts connect_timeout cannot be
+interrupted, so the retries wait for it to finish instead of starting a
+second one next to it. All other client calls happen on the loop.
+Retries use the same jittered Backoff, and post the same CONNECTION
+events, as mqtt_supervisor.py.
+
+Works against mosquitto or the in-process stand-in in mini_broker.py.
+"""
+
+import asyncio
+import logging
+import socket
+import threading
+
+import paho.mqtt.client as mqtt
+import pygame
+
+from mqtt_supervisor import Backoff, post_state
+
+
+class AsyncMqtt:
+    """Attach a paho client's socket to an asyncio event loop."""
+
+    def __init__(self, client, loop):
+        """Create on the loop's thread; the callbacks run there."""
+        self.client = client
+        self.loop = loop
+        self._thread = threading.get_ident()
+        self._misc = None
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    def _call(self, fn, *args):
+        # connect() runs in an executor thread and opens the socket (and
+        # queues CONNECT) there; the loop may only be touched from its own thread
+        if threading.get_ident() == self._thread:
+            fn(*args)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(fn, *args)
+
+    def _on_socket_open(self, client, userdata, sock):
+        # Small send buffer so loop_write is signalled instead of blocking
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 2048)
+        self._call(self._watch, sock)
+
+    def _watch(self, sock):
+        self.loop.add_reader(sock, self.client.loop_read)
+        if self._misc is not None:
+            self._misc.cancel()
+        self._misc = self.loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock):
+        # By fd (here and in unregister_write): paho closes the socket right
+        # after these callbacks, before a handed-over call can run
+        self._call(self._unwatch, sock.fileno())
+
+    def _unwatch(self, fd):
+        self.loop.remove_reader(fd)
+        self.loop.remove_writer(fd)
+        if self._misc is not None:
+            self._misc.cancel()
+            self._misc = None
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._call(self.loop.add_writer, sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._call(self.loop.remove_writer, sock.fileno())
+
+    async def _misc_loop(self):
+        # Keepalive pings and timeouts
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+
+class AsyncController:
+    """
+    Owns the MQTT session and the frame loop.
+
+    frame(events) is called with the pending pygame events and returns the
+    number of seconds until it wants the next frame, or None to stop.
+    wake() (e.g. from on_message, which also runs on the loop) brings the
+    next frame forward, but never to more than fps frames per second.
+    With host None it never connects (e.g. while replaying a sample log).
+    """
+
+    def __init__(self, client, host, port=1883, keepalive=60, topics=(), fps=30,
+                 reconnect_initial=5, reconnect_max=300, connect_timeout=5.0, log=None):
+        self.client = client
+        self.fps = fps
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.topics = list(topics)
+        self.backoff = Backoff(reconnect_initial, reconnect_max)
+        self.connect_timeout = connect_timeout
+        self.log = log or logging.getLogger(__name__)
+        self.connected = False
+
+        self._loop = None
+        self._connack = None
+        self._wakeup = None
+        self._connect_task = None
+        self._connecting = None  # client.connect() running on the executor
+        self._stopping = False
+        self._user_on_connect = client.on_connect
+        self._user_on_disconnect = client.on_disconnect
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+
+    @property
+    def reconnect_backoff(self):
+        return self.backoff.delay
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self, frame):
+        self._loop = asyncio.get_running_loop()
+        self._connack = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        AsyncMqtt(self.client, self._loop)
+        self._start_connecting()
+        loop = self._loop
+        try:
+            while True:
+                start = loop.time()
+                self._wakeup.clear()  # wakes during the frame still count
+                delay = frame(pygame.event.get())
+                if delay is None:
+                    break
+                # Until the frame is due or wake() is called, whichever is first...
+                remaining = start + delay - loop.time()
+                if remaining > 0 and not self._wakeup.is_set():
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                # ...but no sooner than 1/fps after the last one
+                await asyncio.sleep(max(0.0, start + 1.0 / self.fps - loop.time()))
+        finally:
+            self._stopping = True
+            if self._connect_task is not None:
+                self._connect_task.cancel()
+            if self.connected:
+                self.client.disconnect()
+
+    # --- connection handling ---
+    def _start_connecting(self):
+        if self.host is None or self._stopping:
+            return
+        if self._connect_task is not None and not self._connect_task.done():
+            return
+        self._connect_task = self._loop.create_task(self._connect_loop())
+
+    async def _connect_loop(self):
+        while not self.connected:
+            try:
+                if self._connecting is None:
+                    self._connack.clear()
+                    # paho's connect() blocks (lookup, TCP handshake): keep it off the loop
+                    self._connecting = self._loop.run_in_executor(
+                        None, self.client.connect, self.host, self.port, self.keepalive)
+                # Shielded: a timeout leaves it running, and the next try waits
+                # for that one rather than race it for paho's socket
+                connecting = self._connecting
+                try:
+                    await asyncio.wait_for(asyncio.shield(connecting), self.connect_timeout)
+                finally:
+                    if connecting.done():
+                        self._connecting = None
+                await asyncio.wait_for(self._connack.wait(), self.connect_timeout)
+                if self.connected:
+                    return
+                raise ConnectionError("broker refused the connection")
+            except (OSError, asyncio.TimeoutError, ConnectionError) as e:
+                delay = self.backoff.next()
+                self.log.warning("[Reconnect] Failed: %s (next try in %.1fs)",
+                                 str(e) or type(e).__name__, delay)
+                post_state(False, "connecting", delay)
+                await asyncio.sleep(delay)
+
+    def _on_connect(self, client, userdata, flags, rc):
+        self.connected = rc == 0
+        if self.connected:
+            self.backoff.reset()
+            for topic in self.topics:
+                client.subscribe(topic)
+            post_state(True, "connected")
+        self._connack.set()
+        if self._user_on_connect:
+            self._user_on_connect(client, userdata, flags, rc)
+        self.wake()
+
+    def _on_disconnect(self, client, userdata, rc):
+        was_connected = self.connected
+        self.connected = False
+        if self._user_on_disconnect:
+            self._user_on_disconnect(client, userdata, rc)
+        if was_connected and not self._stopping:
+            post_state(False, "disconnected")
+            self._start_connecting()
+        self.wake()
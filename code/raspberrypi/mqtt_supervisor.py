@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Connection supervisor for the threaded controllers: the render thread never
+touches the network.
+
+start() hands host and port to paho with connect_async() and starts paho's
+network thread (loop_start). That thread makes the first connection and
+every reconnect itself, waiting reconnect_delay_set() seconds in between.
+Paho only doubles that delay, so after each failed attempt the supervisor
+sets the next one with decorrelated jitter (between reconnect_initial and
+reconnect_max, see Backoff). A broker restart then does not bring every
+display back in the same second.
+
+State changes are posted as CONNECTION pygame events, so the main loop
+updates its own `connected` flag and redraws the status between frames
+(posting also wakes a loop idling in FrameScheduler.wait):
+
+    event.connected   True / False
+    event.state       "connecting", "connected" or "disconnected"
+    event.backoff     seconds until the next attempt (0 while connected)
+"""
+
+import logging
+import random
+import time
+
+import pygame
+
+CONNECTION = pygame.event.custom_type()
+
+
+class Backoff:
+    """
+    Decorrelated jitter: each delay is uniform in [initial, 3 * previous],
+    capped at maximum. reset() after a successful connect, so the first
+    retry after a drop lands somewhere in [initial, 3 * initial].
+    """
+
+    def __init__(self, initial=5, maximum=300):
+        self.initial = initial
+        self.maximum = maximum
+        self.delay = initial
+
+    def reset(self):
+        self.delay = self.initial
+
+    def next(self):
+        """The delay before the next attempt; also becomes the new `delay`."""
+        self.delay = min(self.maximum, random.uniform(self.initial, self.delay * 3))
+        return self.delay
+
+
+def post_state(connected, state, backoff=0):
+    """Post a CONNECTION event (safe from any thread; a no-op once pygame has quit)."""
+    try:
+        pygame.event.post(pygame.event.Event(CONNECTION, connected=connected, state=state,
+                                             backoff=backoff))
+    except pygame.error:
+        pass
+
+
+class ConnectionSupervisor:
+    """
+    Owns connect, reconnect and subscribe for a paho client run with loop_start().
+
+    The client's on_connect / on_disconnect are wrapped and still called
+    (on paho's thread). `connected`, `reconnect_backoff` and
+    `last_disconnect` are for metrics; the UI should follow the events.
+    """
+
+    def __init__(self, client, host, port=1883, keepalive=60, topics=(),
+                 reconnect_initial=5, reconnect_max=300, log=None):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.topics = list(topics)
+        self.backoff = Backoff(reconnect_initial, reconnect_max)
+        self.log = log or logging.getLogger(__name__)
+        self.connected = False
+        self.last_disconnect = 0
+        self._started = False
+        self._first_attempt = False
+        self._user_on_connect = client.on_connect
+        self._user_on_disconnect = client.on_disconnect
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_connect_fail = self._on_connect_fail
+
+    @property
+    def reconnect_backoff(self):
+        return self.backoff.delay
+
+    def start(self):
+        """Returns at once; the first connection is made on paho's thread."""
+        self.backoff.reset()
+        self.client.reconnect_delay_set(self.backoff.initial, self.backoff.maximum)
+        self.client.connect_async(self.host, self.port, keepalive=self.keepalive)
+        self.log.info("Connecting to %s:%s...", self.host, self.port)
+        post_state(False, "connecting", self.backoff.delay)
+        self._first_attempt = True
+        self._started = True
+        self.client.loop_start()
+
+    def stop(self):
+        if not self._started:
+            return
+        self._started = False
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+        self.client.loop_stop()
+
+    # --- paho thread ---
+    def _on_connect(self, client, userdata, flags, rc):
+        self._first_attempt = False
+        if rc == 0:
+            self.connected = True
+            self.backoff.reset()
+            client.reconnect_delay_set(self.backoff.initial, self.backoff.maximum)
+            for topic in self.topics:
+                client.subscribe(topic)
+            post_state(True, "connected")
+        if self._user_on_connect:
+            self._user_on_connect(client, userdata, flags, rc)
+
+    def _on_disconnect(self, client, userdata, rc):
+        was_connected = self.connected
+        self.connected = False
+        self._first_attempt = False
+        if self._user_on_disconnect:
+            self._user_on_disconnect(client, userdata, rc)
+        if not self._started:
+            return
+        if was_connected:
+            self.last_disconnect = time.time()
+        # Also reached when the broker refused the CONNACK
+        post_state(False, "disconnected", self._retry_later())
+
+    def _on_connect_fail(self, client, userdata):
+        # TCP connect failed (broker down, no route); paho waits, then retries
+        delay = self._retry_later(self._first_attempt)
+        self._first_attempt = False
+        self.log.warning("[Reconnect] %s:%s unreachable, next try in %.1fs", self.host, self.port, delay)
+        post_state(False, "connecting", delay)
+
+    def _retry_later(self, first_attempt=False):
+        delay = self.backoff.next()
+        # Resets paho's own doubling, so its next wait is exactly `delay`.
+        # After a failed first connect paho 1.x waits twice (d, then 2d) before
+        # the next attempt; a third of the delay makes the two add up to it.
+        first_wait = delay / 3 if first_attempt else delay
+        self.client.reconnect_delay_set(first_wait, self.backoff.maximum)
+        return delay
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Grid of distance tiles for many ESP32 sensors publishing to
+sensor/<id>/distance. Tiles are laid out automatically as sensors appear;
+each frame only the tiles whose sensor changed (value, or gone stale) are
+redrawn and pushed to the screen. Runs on the single-threaded asyncio core.
+"""
+
+import asyncio
+import paho.mqtt.client as mqtt
+import pygame
+import time
+
+import bar_meter
+import distance_protocol
+import latency
+import metrics
+import sample_log
+import startup
+import text_cache
+from log_setup import MessageStats, rate_limited, setup_logging
+from mqtt_asyncio import AsyncController
+from sensor_table import NO_VALUE, SensorTable
+from settings import (BROKER_IP, BROKER_PORT, LOG_LEVEL, METRICS_HOST, METRICS_PORT, PASSWORD,
+                      RECONNECT_INITIAL, RECONNECT_MAX, REPLAY, REPLAY_SPEED, SAMPLE_LOG, USERNAME)
+
+# --- SETTINGS ---
+# Broker, reconnects, logging, metrics and the sample log are in settings.py
+TOPIC = "sensor/+/distance"  # the + level is the sensor id
+CLIENT_ID = "distance_grid_client"
+
+FPS = 10
+MAX_SENSORS = 256
+STALE_AFTER = 5.0  # seconds without data before a tile is greyed out
+
+# --- Logging ---
+log = setup_logging("multi_sensor_display", LOG_LEVEL)
+stats = MessageStats(log)  # periodic "N samples/s, M invalid" summary
+
+# --- Pygame Setup ---
+SCREEN_SIZE = (800, 480)
+screen = startup.init_display(SCREEN_SIZE, "Distance Grid")
+font_small = startup.font(None, 28)
+startup.timer.mark("fonts")
+
+BG_COLOR = (12, 18, 24)
+HEADER_RECT = pygame.Rect(0, 0, SCREEN_SIZE[0], 36)
+GRID_RECT = pygame.Rect(4, 40, SCREEN_SIZE[0] - 8, SCREEN_SIZE[1] - 44)
+TILE_GAP = 4
+TILE_ASPECT = 2.0  # preferred width / height
+
+table = SensorTable(MAX_SENSORS)
+unrecorded = set()  # sensor ids too long for the sample log, warned about once
+tile_rects = []      # slot -> Rect, for the current layout
+tile_fonts = None    # (id font, value font) sized for the current layout
+header_state = None
+full_redraw = True
+last_stale_check = 0.0
+
+# --- Layout ---
+def grid_layout(n, area, aspect=TILE_ASPECT):
+    """Columns and rows that give n tiles the largest size at the given aspect."""
+    best = (0, 1, 1)
+    for cols in range(1, max(1, n) + 1):
+        rows = -(-max(1, n) // cols)
+        size = min(area.w / cols, area.h / rows * aspect)
+        if size > best[0]:
+            best = (size, cols, rows)
+    return best[1], best[2]
+
+def relayout(n):
+    """Recompute tile rects for at least n sensors; returns True if they moved."""
+    global tile_rects, tile_fonts
+    if n <= len(tile_rects):
+        return False
+    cols, rows = grid_layout(n, GRID_RECT)
+    w, h = GRID_RECT.w // cols, GRID_RECT.h // rows
+    tile_rects = [pygame.Rect(GRID_RECT.x + (i % cols) * w, GRID_RECT.y + (i // cols) * h, w, h)
+                  for i in range(cols * rows)]
+    tile_fonts = (startup.font(None, max(12, h // 4)),
+                  startup.font(None, max(14, int(h / 2.5))))
+    return True
+
+# --- Drawing ---
+def draw_header():
+    screen.fill(BG_COLOR, HEADER_RECT)
+    status_text = "Connected" if controller.connected else "Disconnected"
+    status_color = (80, 220, 120) if controller.connected else (220, 80, 80)
+    title = text_cache.render(font_small, f"{len(table)} sensors", True, (200, 200, 220))
+    screen.blit(title, (12, 8))
+    status_lbl = text_cache.render(font_small, f"MQTT: {status_text}", True, status_color)
+    screen.blit(status_lbl, (SCREEN_SIZE[0] - status_lbl.get_width() - 12, 8))
+
+def draw_tile(slot):
+    """Draw one sensor's tile and return the rect that changed."""
+    cell = tile_rects[slot]
+    rect = cell.inflate(-TILE_GAP, -TILE_GAP)
+    d = table.distance[slot]
+    faded = bool(table.stale[slot])
+    id_font, value_font = tile_fonts
+
+    screen.fill(BG_COLOR, cell)
+    if d == NO_VALUE:
+        color = (50, 50, 50)
+    else:
+        color = bar_meter.band(d)[0]
+    if faded:
+        color = tuple(int(0.3 * c + 50) for c in color)
+    pygame.draw.rect(screen, color, rect, border_radius=6)
+
+    pad = max(2, rect.h // 12)
+    label = text_cache.render(id_font, str(table.ids[slot]), True, (0, 0, 0))
+    screen.blit(label, (rect.x + pad, rect.y + pad))
+    bar_h = max(4, rect.h // 6)
+    if d != NO_VALUE:
+        value = text_cache.render(value_font, f"{d} cm", True, (0, 0, 0))
+        screen.blit(value, (rect.right - value.get_width() - pad,
+                            rect.y + (rect.h - bar_h - value.get_height()) // 2))
+        bar_meter.draw_bar(screen, rect.x + pad, rect.bottom - bar_h - pad,
+                           rect.w - 2 * pad, bar_h, d, faded)
+    return cell
+
+# --- MQTT Callbacks (called from the event loop) ---
+def on_connect(client, userdata, flags, rc):
+    if rc == 0:
+        log.info("Connected to MQTT broker.")
+        startup.timer.mark("connect")
+        startup.timer.report(log)
+    else:
+        log.warning("Failed to connect, return code %s", rc)
+
+def on_message(client, userdata, msg):
+    try:
+        # Binary batch from the ESP32, or a single ASCII number
+        batch = distance_protocol.decode(msg.payload)
+    except ValueError:
+        stats.invalid += 1
+        log.warning("Invalid MQTT payload received on %s: %r", msg.topic, msg.payload)
+        return
+    stats.messages += 1
+    stats.samples += len(batch.values)
+    latency.probe.received(batch)
+    sensor_id = msg.topic.split("/")[1]
+    try:
+        sample_log.recorder.append(sensor_id, batch)
+    except ValueError as e:
+        if sensor_id not in unrecorded:
+            unrecorded.add(sensor_id)
+            log.warning("Not recording %s: %s", sensor_id, e)
+    if table.update(sensor_id, batch.values) is None:
+        log.warning("More than %d sensors; ignoring %s", MAX_SENSORS, sensor_id)
+        return
+    controller.wake()
+    log.debug("Received distance from %s: %s cm", sensor_id, batch.values[-1],
+              extra=rate_limited(sensor_id))
+
+def on_disconnect(client, userdata, rc):
+    if rc == 0:
+        log.info("Clean disconnect from broker.")
+    else:
+        log.warning("Unexpected MQTT disconnect (rc=%s).", rc)
+
+def on_subscribe(client, userdata, mid, granted_qos):
+    log.info("Subscribed (mid=%s, qos=%s)", mid, granted_qos)
+
+# --- MQTT Client Setup ---
+client = mqtt.Client(client_id=CLIENT_ID)
+client.on_connect = on_connect
+client.on_message = on_message
+client.on_disconnect = on_disconnect
+client.on_subscribe = on_subscribe
+
+if USERNAME and PASSWORD:
+    client.username_pw_set(USERNAME, PASSWORD)
+
+client.will_set("clients/" + CLIENT_ID + "/status", payload="offline", qos=1, retain=True)
+
+controller = AsyncController(client, None if REPLAY else BROKER_IP, BROKER_PORT, topics=[TOPIC],
+                             fps=FPS, reconnect_initial=RECONNECT_INITIAL,
+                             reconnect_max=RECONNECT_MAX, log=log)
+
+# --- Metrics ---
+frame_metrics = metrics.FrameMetrics(1.0 / FPS)
+metrics.expose_stats(stats)
+metrics.expose_text_cache()
+metrics.expose_connection(lambda: controller.connected, lambda: controller.reconnect_backoff)
+overlay = metrics.Overlay()
+overlay_state = None
+
+# --- Frame ---
+def frame(events):
+    global header_state, full_redraw, last_stale_check, overlay_state
+    for event in events:
+        if overlay.handle(event):
+            continue
+        if event.type == pygame.QUIT:
+            return None
+
+    frame_metrics.start()
+    stats.maybe_log()
+
+    now = time.monotonic()
+    if now - last_stale_check >= 1.0:
+        table.mark_stale(STALE_AFTER, now)
+        last_stale_check = now
+
+    latency.probe.frame()
+    if relayout(len(table)):
+        full_redraw = True
+    dirty = table.take_dirty()
+    updated = []
+
+    state = overlay.state()
+    if state != overlay_state:
+        # Hiding or refreshing the panel needs the tiles under it redrawn
+        overlay_state = state
+        full_redraw = True
+
+    state = (len(table), controller.connected)
+    if full_redraw:
+        screen.fill(BG_COLOR)
+        dirty = range(len(table))
+    if full_redraw or state != header_state:
+        header_state = state
+        draw_header()
+        updated.append(HEADER_RECT)
+    for slot in dirty:
+        updated.append(draw_tile(slot))
+    if updated and overlay_state is not None:
+        # Blend the panel only over what was repainted, or it darkens with every frame
+        overlay.draw(screen, [screen.get_rect()] if full_redraw else updated)
+        updated.append(overlay.rect)
+
+    latency.probe.rendered()
+    if full_redraw:
+        pygame.display.flip()
+        full_redraw = False
+    elif updated:
+        pygame.display.update(updated)
+    if updated:
+        latency.probe.flipped()
+    frame_metrics.stop()
+    return 1.0 / FPS
+
+# First frame; the broker connect runs on the event loop afterwards
+frame([])
+startup.timer.mark("first frame")
+
+# --- Main loop ---
+async def main():
+    await metrics.serve_async(METRICS_PORT, METRICS_HOST)
+    replay = None
+    if REPLAY:
+        startup.timer.report(log)
+        log.info("Replaying %s at %sx", REPLAY, REPLAY_SPEED)
+        deliver = lambda msg: on_message(client, None, msg)
+        replay = sample_log.replay_task(REPLAY, deliver, REPLAY_SPEED, log)
+    elif SAMPLE_LOG:
+        sample_log.recorder.open(SAMPLE_LOG, log=log)
+    try:
+        await controller.run(frame)
+    finally:
+        if replay is not None:
+            await sample_log.cancel_replay(replay)
+
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    pass
+log.info("Shutting down.")
+sample_log.recorder.close()
+pygame.quit()
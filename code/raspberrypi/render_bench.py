@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Headless benchmarks for the display renderers.
+
+Runs the drawing functions (visuals.py) and the kiosk's scenes (scenes.py)
+under SDL's dummy video driver against synthetic distance sequences, so no
+screen or broker is needed. Each case reports per-call time percentiles; the
+frame_* cases time a whole frame as the standalone display scripts draw it,
+and the scene_* cases one kiosk frame of that scene (draw() and present),
+so the animation case includes picking the band and the frame. The
+animation scene plays the generated assets (see animation.py); at a size
+with frame packs (e.g. --size 1024x768) it plays those.
+
+    python3 render_bench.py                          # print a table
+    python3 render_bench.py --save baseline.json     # record a baseline
+    python3 render_bench.py --compare baseline.json  # exit 1 on regressions
+
+The timed calls run --repeats times, one pass over all cases per repeat; p50
+is the median of the repeats' medians, and --compare only looks at p50,
+since the tail of a run of a few hundred calls moves with whatever else the
+machine is doing.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+import pygame
+
+import scenes
+import texture_display
+import visuals
+
+SEQUENCES = ("sweep", "noisy", "none")
+MIN_COMPARE_FRAMES = 300  # fewer timed calls than this and p50 alone still jitters past the tolerance
+
+
+def distance_sequence(kind, n, seed=1):
+    """Synthetic readings in cm: a slow sweep, a noisy hover with dropouts, or no data."""
+    rng = random.Random(seed)
+    if kind == "sweep":
+        return [int(5 + 295 * (1 - math.cos(2 * math.pi * i / n)) / 2) for i in range(n)]
+    if kind == "noisy":
+        return [None if rng.random() < 0.02 else max(0, int(rng.gauss(80, 3))) for i in range(n)]
+    if kind == "none":
+        return [None] * n
+    raise ValueError(f"unknown sequence {kind!r}")
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))]
+
+
+def summarize(runs):
+    """Percentiles over the calls of all runs; p50 is the median of each run's own p50."""
+    times = sorted(t for run in runs for t in run)
+    p50 = statistics.median(percentile(sorted(run), 50) for run in runs)
+    us = 1e6
+    return {
+        "n": len(times),
+        "mean_us": round(sum(times) / len(times) * us, 1),
+        "p50_us": round(p50 * us, 1),
+        "p90_us": round(percentile(times, 90) * us, 1),
+        "p99_us": round(percentile(times, 99) * us, 1),
+        "max_us": round(times[-1] * us, 1),
+    }
+
+
+def scene_frame(display, scene_cls):
+    """draw(distance) for one kiosk frame of the scene, Start pressed and fully preloaded."""
+    state = scenes.SceneState()
+    state.started = True
+    scene = scene_cls(display, state)
+    for _ in scene.preload():
+        pass
+    scene.enter()
+
+    def draw(d):
+        state.distance = d
+        dirty = scene.draw()
+        if not dirty:
+            return
+        if scene.canvas:
+            display.present_canvas(dirty)
+        else:
+            display.present()
+
+    return draw
+
+
+def make_cases(display, only=None):
+    """name -> draw(distance); called once per synthetic reading."""
+    screen = display.canvas
+    w, h = screen.get_size()
+    font_big = pygame.font.SysFont(None, 96)
+    font_med = pygame.font.SysFont(None, 48)
+    font_small = pygame.font.SysFont(None, 28)
+    cx, cy = w // 3, h // 2
+    radius = min(h // 2 - 40, w // 3 - 40)
+    meter = pygame.Rect(w // 3 * 2 - 280, h // 2 - 40, 520, 80)
+
+    def radar(d):
+        visuals.draw_radar(screen, cx, cy, radius, d)
+
+    def bar_meter(d):
+        visuals.draw_bar_meter(screen, (font_med, font_small), meter.x, meter.y, meter.w, meter.h, d)
+
+    def no_data(d):
+        visuals.draw_no_data(screen, (font_big, font_small), w // 2, h // 2)
+
+    def band_screen(d):
+        if d is None:
+            visuals.draw_band_screen(screen, font_med, None, "Waiting for data...")
+        else:
+            visuals.draw_band_screen(screen, font_med, d)
+
+    def frame_static(d):
+        # static_visual.py's full redraw
+        screen.fill((12, 18, 24))
+        radar(d)
+        bar_meter(d)
+        if d is None:
+            no_data(d)
+        display.present_canvas([display.get_rect()])
+
+    def frame_colour(d):
+        band_screen(d)
+        display.present_canvas([display.get_rect()])
+
+    cases = {
+        "radar": radar,
+        "bar_meter": bar_meter,
+        "no_data": no_data,
+        "band_screen": band_screen,
+        "frame_static": frame_static,
+        "frame_colour": frame_colour,
+    }
+    for scene_cls in scenes.SCENES:
+        name = f"scene_{scene_cls.name}"
+        if not only or name in only:  # preloading the animations takes seconds
+            cases[name] = scene_frame(display, scene_cls)
+    return cases
+
+
+def run(size=(800, 480), frames=600, warmup=30, only=None, repeats=5, backend="surface"):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    display = texture_display.open_display(size, "render_bench", backend=backend)
+    cases = make_cases(display, only)
+    runs = {}  # "case/sequence" -> (draw, readings, [timed runs])
+    for name, draw in cases.items():
+        if only and name not in only:
+            continue
+        for kind in SEQUENCES:
+            if name == "no_data" and kind != "none":
+                continue  # only drawn while there is no data
+            seq = distance_sequence(kind, warmup + frames)
+            for d in seq[:warmup]:  # fill the surface/text caches
+                draw(d)
+            runs[f"{name}/{kind}"] = (draw, seq[warmup:], [])
+    # One pass over every case per repeat, so a busy moment on the machine
+    # lands in one repeat of a few cases rather than all repeats of one
+    for _ in range(repeats):
+        for draw, seq, timed in runs.values():
+            times = []
+            for d in seq:
+                t = time.perf_counter()
+                draw(d)
+                times.append(time.perf_counter() - t)
+            timed.append(times)
+    results = {case: summarize(timed) for case, (_, _, timed) in runs.items()}
+    pygame.quit()
+    return {
+        "meta": {
+            "size": list(size),
+            "frames": frames,
+            "repeats": repeats,
+            "backend": display.backend,
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "sdl": ".".join(map(str, pygame.get_sdl_version())),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Return [(case, metric, baseline, current)] whose p50 got slower than allowed."""
+    regressions = []
+    for case, base in baseline["results"].items():
+        now = current["results"].get(case)
+        if now is None:
+            continue
+        if now["p50_us"] > base["p50_us"] * (1 + tolerance):
+            regressions.append((case, "p50_us", base["p50_us"], now["p50_us"]))
+    return regressions
+
+
+def print_table(report):
+    print(f"{'case':<26}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}   (us)")
+    for case, r in report["results"].items():
+        print(f"{case:<26}{r['mean_us']:>9.0f}{r['p50_us']:>9.0f}{r['p90_us']:>9.0f}"
+              f"{r['p99_us']:>9.0f}{r['max_us']:>9.0f}")
+
+
+def parse_size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless renderer benchmarks.")
+    parser.add_argument("--size", type=parse_size, default=(800, 480), help="WxH, default 800x480")
+    parser.add_argument("--frames", type=int, default=600, help="timed calls per case and sequence")
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="timed runs per case and sequence; p50 is the median of their medians")
+    parser.add_argument("--backend", choices=texture_display.BACKENDS, default="surface",
+                        help="display backend the frame_* and scene_* cases present to")
+    parser.add_argument("--case", action="append", help="only run this case (repeatable)")
+    parser.add_argument("--save", metavar="JSON", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a case counts as a regression (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    if args.compare and args.frames < MIN_COMPARE_FRAMES:
+        parser.error(f"--compare needs --frames {MIN_COMPARE_FRAMES} or more")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["frames"] < MIN_COMPARE_FRAMES:
+            parser.error(f"{args.compare} was recorded with only {baseline['meta']['frames']} frames")
+    save = args.save and os.path.abspath(args.save)
+    # The scenes load their assets relative to this directory, as the display scripts do
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    report = run(args.size, args.frames, args.warmup, args.case, args.repeats, args.backend)
+    print_table(report)
+    if save:
+        with open(save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        regressions = compare(report, baseline, args.tolerance)
+        for case, metric, base, now in regressions:
+            print(f"REGRESSION {case} {metric}: {base:.0f} -> {now:.0f} us")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Pre-rendered ring sprites for draw_radar.
+
+Rings are rendered once per (quantized radius, color, line width) into a
+sprite just big enough to hold them. The alpha is applied as surface alpha at
+blit time, so one sprite serves every alpha step. The cache is LRU-bounded by
+pixel memory (MAX_BYTES); stats() reports its current size, which
+metrics.expose_ring_atlas() publishes.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+RADIUS_STEP = 2                 # pixels; radii are rounded to this step
+ALPHA_STEP = 8                  # alpha levels are rounded to this step
+MAX_BYTES = 4 * 1024 * 1024     # cap on cached sprite pixel memory
+
+_sprites = OrderedDict()
+_bytes = 0
+_hits = 0
+_misses = 0
+_evictions = 0
+
+
+def blit_ring(target, center, radius, color, alpha, width=6):
+    """Blit a ring of the given radius/color/alpha centred on center."""
+    radius = max(1, int(round(radius / RADIUS_STEP)) * RADIUS_STEP)
+    alpha = max(0, min(255, int(round(alpha / ALPHA_STEP)) * ALPHA_STEP))
+    if alpha == 0:
+        return
+    sprite = ring_sprite(radius, color, width)
+    sprite.set_alpha(alpha)
+    target.blit(sprite, (center[0] - radius - 1, center[1] - radius - 1))
+
+
+def ring_sprite(radius, color, width=6):
+    """Opaque ring on a transparent sprite of size (2*radius+2)^2."""
+    global _bytes, _hits, _misses
+    key = (radius, tuple(color), width)
+    sprite = _sprites.get(key)
+    if sprite is not None:
+        _hits += 1
+        _sprites.move_to_end(key)
+        return sprite
+
+    _misses += 1
+    size = radius * 2 + 2
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, tuple(color) + (255,), (radius + 1, radius + 1), radius, width=width)
+    _sprites[key] = sprite
+    _bytes += _sprite_bytes(sprite)
+    _evict()
+    return sprite
+
+
+def stats():
+    return {
+        "entries": len(_sprites),
+        "bytes": _bytes,
+        "max_bytes": MAX_BYTES,
+        "hits": _hits,
+        "misses": _misses,
+        "evictions": _evictions,
+    }
+
+
+def clear():
+    global _bytes
+    _sprites.clear()
+    _bytes = 0
+
+
+def _sprite_bytes(sprite):
+    return sprite.get_width() * sprite.get_height() * sprite.get_bytesize()
+
+
+def _evict():
+    global _bytes, _evictions
+    # Always keep the newest sprite, even if it alone exceeds the cap
+    while _bytes > MAX_BYTES and len(_sprites) > 1:
+        _, old = _sprites.popitem(last=False)
+        _bytes -= _sprite_bytes(old)
+        _evictions += 1
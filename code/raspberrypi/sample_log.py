@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Append-only binary log of every received reading, and replay of it.
+
+The controllers call `recorder.append(sensor_id, batch)` from on_message;
+that only queues the batch. A background thread packs the queue into
+fixed-size records every FLUSH_INTERVAL seconds and appends them to the
+log, rotating it like logging's RotatingFileHandler (samples.dslog,
+samples.dslog.1, ...). By default the log is kept in DEFAULT_PATH, so it
+does not depend on the directory a controller was started from.
+
+File layout (little endian): a HEADER.size header (magic, record size),
+the sensor id table (MAX_IDS entries of ID_SIZE bytes: UTF-8, zero padded,
+filled in order as sensors first appear in the file), then RECORD.size
+records starting at DATA_OFFSET:
+
+    offset size
+    0      8    time       Unix time the reading was taken (float64, from
+                           the receive time spaced back by interval_ms)
+    8      4    seq        batch sequence number (0 for ASCII payloads)
+    12     2    value      distance in cm, clamped to 0..65535
+    14     1    flags      bit 0: came in as an ASCII payload
+    15     1    sensor     1 + index into the id table; 0 for the
+                           single-sensor topic
+
+Sensor ids longer than ID_SIZE bytes are rejected by append(), never cut
+short. When a file's table is full it is rotated like a full file.
+Logs written by the first layout (ids cut to 8 bytes) can still be read.
+
+replay() memory-maps each file and walks the records in place, so hours of
+samples are never loaded at once. Consecutive records with the same sensor
+and seq are re-encoded into one distance_protocol payload and handed to
+on_message at their original pace, or `speed` times faster.
+
+    python3 sample_log.py samples.dslog          # summary
+    python3 sample_log.py samples.dslog --dump   # one CSV line per reading
+"""
+
+import argparse
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+
+import distance_protocol
+
+MAGIC = b"DSLOG\x00\x02\x00"
+HEADER = struct.Struct("<8sI12x")
+RECORD = struct.Struct("<dIHBB")
+ID_SIZE = 64   # bytes of UTF-8 per sensor id
+MAX_IDS = 255  # sensor ids per file
+DATA_OFFSET = HEADER.size + MAX_IDS * ID_SIZE
+FLAG_ASCII = 0x01
+MAGIC_V1 = b"DSLOG\x00\x01\x00"
+RECORD_V1 = struct.Struct("<dIHBx8s")
+MULTI_TOPIC = "sensor/{id}/distance"  # see multi_sensor_display.py
+
+DEFAULT_PATH = os.path.join(os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"),
+                            "distance_display", "samples.dslog")
+MAX_BYTES = 8 * 1024 * 1024  # ~520k readings per file
+BACKUPS = 4
+FLUSH_INTERVAL = 1.0
+
+# What replay() passes to on_message; the controllers only use these two
+Message = namedtuple("Message", "topic payload")
+
+
+class SampleLog:
+    """Batched writer. Disabled (append is one attribute check) until open()."""
+
+    def __init__(self):
+        self.path = None
+        self.written = 0
+        self._queue = deque()
+        self._file = None
+        self._ids = {}  # sensor id -> its number in the current file's table
+        self._thread = None
+        self._stop = threading.Event()
+
+    def open(self, path, max_bytes=MAX_BYTES, backups=BACKUPS, flush_interval=FLUSH_INTERVAL, log=None):
+        """
+        Start recording to path. If it cannot be written (read-only folder,
+        no permission) a warning is logged and False returned; the
+        controller runs on without recording.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._open_file()
+        except OSError as e:
+            (log or logging.getLogger(__name__)).warning(
+                "Cannot write the sample log %s (%s); not recording", path, e)
+            self.path = None
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sample_log", daemon=True)
+        self._thread.start()
+        return True
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._flush()
+        self._file.close()
+        self._file = None
+
+    # --- MQTT thread / event loop ---
+    def append(self, sensor_id, batch, received=None):
+        """Queue a batch; ValueError if sensor_id is longer than ID_SIZE bytes."""
+        if self._thread is None:
+            return
+        if len(sensor_id.encode()) > ID_SIZE:
+            raise ValueError(f"sensor id {sensor_id!r} is longer than {ID_SIZE} bytes")
+        self._queue.append((sensor_id, batch, time.time() if received is None else received))
+
+    # --- writer thread ---
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+
+    def _flush(self):
+        queue = self._queue
+        n = len(queue)  # only this thread pops, so n items are there
+        if not n:
+            return
+        items = [queue.popleft() for _ in range(n)]
+        buf = bytearray(RECORD.size * sum(len(batch.values) for _, batch, _ in items))
+        offset = 0
+        for sensor_id, batch, received in items:
+            if sensor_id and sensor_id not in self._ids:
+                if len(self._ids) == MAX_IDS:
+                    # Table full: finish this file, the next one starts an empty table
+                    self._write(buf[:offset])
+                    del buf[:offset]
+                    offset = 0
+                    self._rotate()
+                self._add_id(sensor_id)
+            sensor = self._ids[sensor_id] if sensor_id else 0
+            if batch.seq is None:
+                seq, flags = 0, FLAG_ASCII
+            else:
+                seq, flags = batch.seq, 0
+            for t, value in batch.timed(received):
+                RECORD.pack_into(buf, offset, t, seq, max(0, min(0xFFFF, int(value))), flags, sensor)
+                offset += RECORD.size
+        self._write(buf)
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _write(self, data):
+        self._file.write(data)
+        self._file.flush()
+        self.written += len(data) // RECORD.size
+
+    def _add_id(self, sensor_id):
+        number = len(self._ids) + 1
+        self._file.seek(HEADER.size + (number - 1) * ID_SIZE)
+        self._file.write(sensor_id.encode().ljust(ID_SIZE, b"\0"))
+        self._file.seek(0, os.SEEK_END)
+        self._ids[sensor_id] = number
+
+    def _open_file(self):
+        # Not append mode: the id table in the header is filled in as sensors appear
+        f = open(self.path, "r+b" if os.path.exists(self.path) else "w+b")
+        header = f.read(DATA_OFFSET)
+        if header and (len(header) < DATA_OFFSET
+                       or header[:HEADER.size] != HEADER.pack(MAGIC, RECORD.size)):
+            # Not ours, or an older layout: keep it as a backup and start over
+            f.close()
+            self._rotate(reopen=False)
+            f = open(self.path, "w+b")
+            header = b""
+        if not header:
+            f.write(HEADER.pack(MAGIC, RECORD.size) + bytes(DATA_OFFSET - HEADER.size))
+            self._ids = {}
+        else:
+            self._ids = {sensor_id: i + 1 for i, sensor_id in enumerate(_id_table(header))}
+            # Drop a record cut short by a crash or power loss
+            size = f.seek(0, os.SEEK_END)
+            f.truncate(size - (size - DATA_OFFSET) % RECORD.size)
+        f.seek(0, os.SEEK_END)
+        self._file = f
+
+    def _rotate(self, reopen=True):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.backups:
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, self.path + ".1")
+        else:
+            os.remove(self.path)
+        if reopen:
+            self._open_file()
+
+
+recorder = SampleLog()
+
+
+# --- Reading ---
+def log_files(path):
+    """The log and its rotated backups that exist, oldest first."""
+    files = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        files.append(f"{path}.{i}")
+        i += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def _id_table(header):
+    """The sensor ids in a header's table, in order."""
+    ids = []
+    for start in range(HEADER.size, DATA_OFFSET, ID_SIZE):
+        entry = header[start:start + ID_SIZE].rstrip(b"\0")
+        if not entry:
+            break
+        ids.append(entry.decode(errors="replace"))
+    return ids
+
+
+def records(path):
+    """Yield (time, seq, value, flags, sensor_id) from one file via mmap."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= HEADER.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header = HEADER.unpack_from(mm)
+            if header == (MAGIC_V1, RECORD_V1.size):
+                yield from _records_v1(mm, size)
+                return
+            if header != (MAGIC, RECORD.size) or size < DATA_OFFSET:
+                raise ValueError(f"{path} is not a sample log")
+            ids = [""] + _id_table(mm[:DATA_OFFSET])
+            end = DATA_OFFSET + (size - DATA_OFFSET) // RECORD.size * RECORD.size
+            view = memoryview(mm)[DATA_OFFSET:end]
+            try:
+                for t, seq, value, flags, sensor in RECORD.iter_unpack(view):
+                    yield t, seq, value, flags, ids[sensor] if sensor < len(ids) else f"#{sensor}"
+            finally:
+                view.release()
+
+
+def _records_v1(mm, size):
+    # First layout: the sensor id, cut to 8 bytes, in every record
+    end = HEADER.size + (size - HEADER.size) // RECORD_V1.size * RECORD_V1.size
+    view = memoryview(mm)[HEADER.size:end]
+    try:
+        for t, seq, value, flags, sensor in RECORD_V1.iter_unpack(view):
+            yield t, seq, value, flags, sensor.rstrip(b"\0").decode(errors="replace")
+    finally:
+        view.release()
+
+
+def messages(path):
+    """Yield (time of the newest reading, Message) per recorded batch, oldest first."""
+    key = None
+    values = []
+    first = last = 0.0
+    for name in log_files(path):
+        for t, seq, value, flags, sensor in records(name):
+            k = (sensor, seq, flags)
+            if k != key or flags & FLAG_ASCII or len(values) == distance_protocol.MAX_READINGS:
+                if values:
+                    yield last, _message(key, values, first, last)
+                key, values, first = k, [], t
+            values.append(value)
+            last = t
+    if values:
+        yield last, _message(key, values, first, last)
+
+
+def _message(key, values, first, last):
+    sensor, seq, flags = key
+    topic = MULTI_TOPIC.format(id=sensor) if sensor else distance_protocol.TOPIC
+    if flags & FLAG_ASCII:
+        return Message(topic, str(values[0]).encode())
+    interval_ms = int(round((last - first) * 1000 / (len(values) - 1))) if len(values) > 1 else 0
+    return Message(topic, distance_protocol.encode(values, seq, int(first * 1000), interval_ms))
+
+
+def replay(path, deliver, speed=1.0, stop=None):
+    """
+    Call deliver(Message) for every recorded batch, spaced as recorded and
+    sped up `speed` times (0 = as fast as possible). Returns the batch count.
+    """
+    n = 0
+    start = t0 = None
+    for t, msg in messages(path):
+        if stop is not None and stop.is_set():
+            break
+        if speed > 0:
+            if start is None:
+                start, t0 = time.monotonic(), t
+            delay = start + (t - t0) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        deliver(msg)
+        n += 1
+    return n
+
+
+async def replay_async(path, deliver, speed=1.0):
+    """replay() for the asyncio controllers; yields to the loop between batches."""
+    n = 0
+    start = t0 = None
+    loop = asyncio.get_running_loop()
+    for t, msg in messages(path):
+        delay = 0.0
+        if speed > 0:
+            if start is None:
+                start, t0 = loop.time(), t
+            delay = start + (t - t0) / speed - loop.time()
+        await asyncio.sleep(max(0.0, delay))
+        deliver(msg)
+        n += 1
+    return n
+
+
+def replay_task(path, deliver, speed=1.0, log=None):
+    """
+    Run replay_async() as a task on the running loop. If the replay fails
+    the exception is logged right away; stop the task with cancel_replay().
+    """
+    log = log or logging.getLogger(__name__)
+    task = asyncio.get_running_loop().create_task(replay_async(path, deliver, speed))
+    task.add_done_callback(lambda t: _log_replay_error(t, path, log))
+    return task
+
+
+def _log_replay_error(task, path, log):
+    if not task.cancelled() and task.exception() is not None:
+        log.error("Replay of %s failed", path, exc_info=task.exception())
+
+
+async def cancel_replay(task):
+    """Cancel a replay_task() and wait until it has stopped."""
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        pass  # already logged when the task finished
+
+
+def start_replay(path, on_message, client=None, speed=1.0):
+    """Replay into a paho-style on_message(client, userdata, msg) from a daemon thread."""
+    thread = threading.Thread(target=replay, args=(path, lambda msg: on_message(client, None, msg), speed),
+                              name="replay", daemon=True)
+    thread.start()
+    return thread
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a sample log.")
+    parser.add_argument("path", help="log file, e.g. samples.dslog (backups are included)")
+    parser.add_argument("--dump", action="store_true", help="print time,sensor,seq,value per reading")
+    args = parser.parse_args(argv)
+    files = log_files(args.path)
+    if not files:
+        parser.error(f"no log at {args.path}")
+    if args.dump:
+        print("time,sensor,seq,value")
+        for name in files:
+            for t, seq, value, flags, sensor in records(name):
+                print(f"{t:.3f},{sensor},{seq},{value}")
+        return
+    count = 0
+    first = last = None
+    sensors = set()
+    for name in files:
+        for t, seq, value, flags, sensor in records(name):
+            count += 1
+            first = t if first is None else first
+            last = t
+            sensors.add(sensor or "(single)")
+    print(f"{len(files)} file(s), {count} readings, {len(sensors)} sensor(s)")
+    if count:
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(first))} .. "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last))} "
+              f"({last - first:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Fixed-capacity ring buffer of timestamped distance samples.
+
+The paho network thread is the single writer (push) and the render loop the
+single reader (drain/latest). No locks are used: the writer fills a slot
+before publishing it by advancing its counter, and the reader only trusts
+slots the writer cannot have overwritten while they were being copied.
+Storage is preallocated array('d') so neither side allocates per sample.
+"""
+
+import time
+from array import array
+
+
+class SampleRing:
+    def __init__(self, capacity=1024):
+        # Power of two so the slot index is a mask, not a modulo
+        size = 1
+        while size < capacity:
+            size *= 2
+        self.capacity = size
+        self._mask = size - 1
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._written = 0   # total samples pushed; only the writer updates it
+        self._read = 0      # total samples consumed; only the reader updates it
+        self.dropped = 0    # samples overwritten before the reader got to them
+
+    # --- writer side (MQTT thread) ---
+    def push(self, value, t=None):
+        n = self._written
+        slot = n & self._mask
+        self._times[slot] = time.monotonic() if t is None else t
+        self._values[slot] = value
+        self._written = n + 1  # publish after the slot is filled
+
+    # --- reader side (render thread) ---
+    def drain(self, out_times, out_values):
+        """
+        Copy every sample pushed since the last drain into the caller's
+        preallocated arrays (at least `capacity` long). Returns the count.
+        """
+        end = self._written
+        start = self._read
+        if end - start > self.capacity:
+            self.dropped += end - start - self.capacity
+            start = end - self.capacity
+        n = 0
+        for i in range(start, end):
+            slot = i & self._mask
+            out_times[n] = self._times[slot]
+            out_values[n] = self._values[slot]
+            n += 1
+        # The writer may have lapped us while copying; discard torn slots
+        overrun = self._written - self.capacity - start
+        if overrun > 0:
+            skip = min(overrun, n)
+            self.dropped += skip
+            out_times[:n - skip] = out_times[skip:n]
+            out_values[:n - skip] = out_values[skip:n]
+            n -= skip
+        self._read = end
+        return n
+
+    def latest(self):
+        """Most recent (time, value) or None if nothing was ever pushed. Does not consume."""
+        n = self._written
+        if n == 0:
+            return None
+        slot = (n - 1) & self._mask
+        return self._times[slot], self._values[slot]
+
+    def pending(self):
+        return self._written - self._read
+
+    def clear(self):
+        """Reader side: forget everything not yet drained."""
+        self._read = self._written
+
+
+def make_buffers(ring):
+    """Preallocated (times, values) arrays sized for ring.drain()."""
+    return array("d", bytes(8 * ring.capacity)), array("d", bytes(8 * ring.capacity))
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+The display modes as scenes that share one runtime (see kiosk.py):
+
+    band       full-screen band colour      (display_controller_v2.py)
+    radar      radar pulse and bar meter    (static_visual_v2.py)
+    animation  per-band animations          (display_controller_animation.py)
+
+A scene draws from the runtime's SceneState (filtered distance, connection,
+Start/Stop) and never touches MQTT. It draws on the display's canvas (see
+texture_display.py), or, with `canvas = False`, through the display's own
+calls, so that the animation frames are textures on the texture backends. preload() does the slow part (decoding
+animations, warming the ring/gradient caches) in steps, which the runtime's
+Preloader runs between frames on the main thread (the caches it fills are
+not locked), so switching scenes later only swaps which one draws the next
+frame.
+"""
+
+import os
+import time
+
+import pygame
+
+import banding
+import gif_frames
+import startup
+import text_cache
+import visuals
+from dirty_rects import DirtyRenderer
+
+CLOSE_ANIM = "assets/animation_close.gif"
+FAR_ANIM = "assets/animation_far.gif"
+MANIFEST = "assets/manifest.json"  # written by animation.py; falls back to the two GIFs above,
+                                   # which are generated on first use
+
+
+class SceneState:
+    """Owned by the runtime; scenes read it and flip `started` from their buttons."""
+
+    def __init__(self):
+        self.distance = None
+        self.connected = False
+        self.started = False
+
+
+class Scene:
+    name = None
+    fps = 10           # frame rate while animating()
+    idle_fps = 1       # otherwise (input and MQTT still wake the loop)
+    idle_after = None  # seconds without a new distance before animations drop to idle_fps
+    canvas = True      # draws on display.canvas; False: with display.fill/blit/draw_rect
+
+    def __init__(self, display, state):
+        self.display = display
+        self.screen = display.canvas if self.canvas else None
+        self.state = state
+        self.ready = False
+        self.full_redraw = True
+
+    def preload(self):
+        """
+        Slow setup, as a generator: each step runs between two frames, so
+        yield after every part that takes more than a few milliseconds.
+        Must leave the screen alone.
+        """
+        self.ready = True
+        yield
+
+    def enter(self):
+        """Called when the scene becomes active; the next draw() repaints everything."""
+        self.full_redraw = True
+
+    def animating(self):
+        return False
+
+    def handle(self, event):
+        """Returns True when the event was consumed (e.g. a Start/Stop press)."""
+        return False
+
+    def draw(self):
+        """
+        Draw what changed; returns the rects to push to the display (empty
+        for none). Scenes without a canvas always redraw the whole display.
+        """
+        return []
+
+
+class BandScene(Scene):
+    """display_controller_v2: one colour per distance band; repaints only what changed."""
+
+    name = "band"
+
+    def __init__(self, display, state):
+        super().__init__(display, state)
+        self.font = startup.font(None, 48)
+        self.button_font = startup.font(None, 36)
+        self.button_rect = pygame.Rect(50, self.screen.get_height() - 70, 120, 50)
+        self.band_screen = visuals.BandScreen(self.screen, self.font)
+
+    def handle(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 \
+                and self.button_rect.collidepoint(event.pos):
+            self.state.started = not self.state.started
+            return True
+        return False
+
+    def draw(self):
+        state = self.state
+        if self.full_redraw:
+            self.band_screen.invalidate()
+            self.full_redraw = False
+        if not state.started:
+            dirty = self.band_screen.draw(None, "Press Start to begin")
+        elif state.distance is None:
+            dirty = self.band_screen.draw(None, "Waiting for data...")
+        else:
+            dirty = self.band_screen.draw(state.distance)
+        if not dirty:
+            return dirty
+        rect = self.button_rect
+        if not state.started:
+            pygame.draw.rect(self.screen, (0, 200, 0), rect)  # green
+            label = text_cache.render(self.button_font, "Start", True, (255, 255, 255))
+            self.screen.blit(label, (rect.x + 25, rect.y + 10))
+        else:
+            pygame.draw.rect(self.screen, (200, 0, 0), rect)  # red
+            label = text_cache.render(self.button_font, "Stop", True, (255, 255, 255))
+            self.screen.blit(label, (rect.x + 30, rect.y + 10))
+        return dirty
+
+
+class RadarScene(Scene):
+    """static_visual_v2: radar, bar meter and header as dirty-rect widgets."""
+
+    name = "radar"
+    fps = 30
+    idle_fps = 2
+    idle_after = 10
+    BG_COLOR = (12, 18, 24)
+
+    def __init__(self, display, state):
+        super().__init__(display, state)
+        self.font_big = startup.font(None, 96)
+        self.font_med = startup.font(None, 48)
+        self.font_small = startup.font(None, 28)
+        w, h = self.screen.get_size()
+        self.radar_center = (w // 3, h // 2)
+        self.radar_radius = min(h // 2 - 40, w // 3 - 40)
+        self.meter_rect = pygame.Rect(w // 3 * 2 - 280, h // 2 - 40, 520, 80)
+        self.no_data_center = (w // 2, h // 2)
+        self.start_rect = pygame.Rect(w // 2 - 80, h // 2 + 100, 160, 60)
+        self.stop_rect = pygame.Rect(w - 180, h - 70, 160, 50)
+        self.frame_no = 0  # animated widgets include it in their state
+        self.renderer = self._build_renderer()
+
+    def _build_renderer(self):
+        screen, state = self.screen, self.state
+        w = screen.get_width()
+        cx, cy = self.radar_center
+        r = self.radar_radius
+        renderer = DirtyRenderer(screen, self.BG_COLOR)
+        renderer.add("header", (20, 12) + self.font_med.size("Distance Visualizer"), self._header)
+        renderer.add("status", (w - 160, 14) + self.font_small.size("MQTT: Disconnected"),
+                     self._status, lambda: state.connected)
+        renderer.add("radar", (cx - r, cy - r, r * 2, r * 2), self._radar,
+                     lambda: None if not state.started else
+                             visuals.radar_frame(r) if state.distance is None else self.frame_no)
+        # Meter label is drawn to the right of the bar, so the rect runs to the screen edge
+        renderer.add("meter", (self.meter_rect.x, self.meter_rect.y, w - self.meter_rect.x,
+                               self.meter_rect.h), self._meter,
+                     lambda: (state.started, self.frame_no if state.distance is None else state.distance))
+        renderer.add("no_data", self._no_data_rect(), self._no_data,
+                     lambda: visuals.no_data_frame((self.font_big, self.font_small))
+                             if (not state.started or state.distance is None) else None)
+        renderer.add("start_button", self.start_rect, self._start_button, lambda: state.started)
+        renderer.add("stop_button", self.stop_rect, self._stop_button, lambda: state.started)
+        return renderer
+
+    def _no_data_rect(self):
+        # Largest pulse (+5%) of the "?" plus the label underneath
+        q_w, q_h = self.font_big.size("?")
+        q_w, q_h = int(q_w * 1.05) + 2, int(q_h * 1.05) + 2
+        lbl_w, lbl_h = self.font_small.size("No data yet")
+        w = max(q_w, lbl_w)
+        h = q_h + 8 + lbl_h + 2
+        cx, cy = self.no_data_center
+        return pygame.Rect(cx - w // 2, cy - q_h // 2 - 1, w, h)
+
+    def preload(self):
+        # Draw every widget once off-screen so the ring atlas, gradients and
+        # text cache are warm before the first real frame
+        scratch = pygame.Surface(self.screen.get_size())
+        distance = self.state.distance
+        visuals.draw_radar(scratch, *self.radar_center, self.radar_radius, distance)
+        yield
+        visuals.draw_bar_meter(scratch, (self.font_med, self.font_small), *self.meter_rect,
+                               distance if distance is not None else 100)
+        visuals.draw_bar_meter(scratch, (self.font_med, self.font_small), *self.meter_rect, None)
+        yield
+        visuals.draw_no_data(scratch, (self.font_big, self.font_small), *self.no_data_center)
+        self.ready = True
+
+    def enter(self):
+        super().enter()
+        self.renderer.invalidate()
+
+    def animating(self):
+        return True  # radar, scanner and "?" pulse
+
+    def handle(self, event):
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1:
+            return False
+        if not self.state.started and self.start_rect.collidepoint(event.pos):
+            self.state.started = True
+            return True
+        if self.state.started and self.stop_rect.collidepoint(event.pos):
+            self.state.started = False
+            return True
+        return False
+
+    def draw(self):
+        self.frame_no += 1
+        self.full_redraw = False
+        return self.renderer.draw()
+
+    # --- widgets ---
+    def _header(self):
+        header = text_cache.render(self.font_med, "Distance Visualizer", True, (200, 200, 220))
+        self.screen.blit(header, (20, 12))
+
+    def _status(self):
+        connected = self.state.connected
+        status_text = "Connected" if connected else "Disconnected"
+        status_color = (80, 220, 120) if connected else (220, 80, 80)
+        status_lbl = text_cache.render(self.font_small, f"MQTT: {status_text}", True, status_color)
+        self.screen.blit(status_lbl, (self.screen.get_width() - 160, 14))
+
+    def _radar(self):
+        if self.state.started:
+            visuals.draw_radar(self.screen, *self.radar_center, self.radar_radius, self.state.distance)
+
+    def _meter(self):
+        if self.state.started:
+            visuals.draw_bar_meter(self.screen, (self.font_med, self.font_small), *self.meter_rect,
+                                   self.state.distance)
+
+    def _no_data(self):
+        if not self.state.started or self.state.distance is None:
+            visuals.draw_no_data(self.screen, (self.font_big, self.font_small), *self.no_data_center)
+
+    def _start_button(self):
+        if not self.state.started:
+            visuals.draw_button(self.screen, self.font_med, "Start", *self.start_rect, (50, 180, 50))
+
+    def _stop_button(self):
+        if self.state.started:
+            visuals.draw_button(self.screen, self.font_med, "Stop", *self.stop_rect, (220, 50, 30))
+
+
+class AnimationScene(Scene):
+    """display_controller_animation: full-screen animation for the distance band."""
+
+    name = "animation"
+    fps = 30
+    canvas = False   # frames are uploaded as textures on the texture backends
+    frame_delay = 5  # ticks each animation frame is held
+
+    def __init__(self, display, state):
+        super().__init__(display, state)
+        self.font = startup.font(None, 80)
+        w, h = display.get_size()
+        self.button_rect = pygame.Rect(w - 320, h - 140, 300, 120)
+        self.bands = None  # Banding over the animations, set by preload()
+        self.frame_index = 0
+        self._shown = None
+
+    def preload(self):
+        display = self.display
+        size = display.get_size()
+        loaders = gif_frames.band_animation_loaders(MANIFEST, size)
+        if not loaders:
+            if not (os.path.exists(CLOSE_ANIM) and os.path.exists(FAR_ANIM)):
+                # Not in git; made on the first run, as "animation.py --legacy" does
+                import animation  # only needed here, keep it off the startup path
+                animation.write_legacy(os.path.dirname(CLOSE_ANIM))
+                yield
+            loaders = [(50, lambda: gif_frames.load_scaled_frames(CLOSE_ANIM, size)),
+                       (None, lambda: gif_frames.load_scaled_frames(FAR_ANIM, size))]
+        band_frames = []
+        for max_cm, load in loaders:  # one band per step
+            band_frames.append((max_cm, display.upload(load())))
+            yield
+        if display.backend != "surface":
+            gif_frames.clear()  # the textures hold the frames now
+        self.bands = banding.Banding(band_frames)
+        self.ready = True
+
+    def frames(self):
+        bands = self.bands
+        if bands is None:
+            return []  # preload() failed
+        distance = self.state.distance
+        if distance is None:
+            bands.reset()
+            return bands.values[-1]
+        bands.update(distance)
+        return bands.value
+
+    def animating(self):
+        return self.state.started
+
+    def handle(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN and self.button_rect.collidepoint(event.pos):
+            self.state.started = not self.state.started
+            return True
+        return False
+
+    def draw(self):
+        display, rect = self.display, self.button_rect
+        if not self.state.started:
+            if self._shown is False and not self.full_redraw:
+                return []
+            display.fill((0, 0, 0))
+            display.draw_rect((0, 255, 0), rect)
+            display.blit(text_cache.render(self.font, "START", True, (0, 0, 0)), (rect.x + 60, rect.y + 30))
+        else:
+            display.fill((0, 0, 0))
+            self.frame_index = gif_frames.draw_frame(display, self.frames(), self.frame_index,
+                                                     self.frame_delay)
+            display.draw_rect((255, 0, 0), rect)
+            display.blit(text_cache.render(self.font, "STOP", True, (255, 255, 255)), (rect.x + 70, rect.y + 30))
+        self._shown = self.state.started
+        self.full_redraw = False
+        return [display.get_rect()]
+
+
+SCENES = (BandScene, RadarScene, AnimationScene)
+
+
+def draw_loading(surface, font, name):
+    """Shown for a scene whose preload() has not finished yet."""
+    surface.fill((0, 0, 0))
+    label = text_cache.render(font, f"Loading {name}...", True, (200, 200, 200))
+    surface.blit(label, label.get_rect(center=surface.get_rect().center))
+    return [surface.get_rect()]
+
+
+class Preloader:
+    """
+    Runs the scenes' preload() steps on the main thread, `first` before the
+    others, for a few milliseconds after each frame. A single step can still
+    take longer (e.g. decoding one band's animation).
+    """
+
+    def __init__(self, scenes, first=None, log=None):
+        self.log = log
+        self._pending = sorted(scenes, key=lambda s: s is not first)
+        self._steps = None
+        self._spent = 0.0  # seconds of preload() so far for the current scene
+
+    @property
+    def done(self):
+        return not self._pending
+
+    def step(self, budget):
+        """Run steps until `budget` seconds have passed (at least one). True while work is left."""
+        deadline = time.perf_counter() + budget
+        while self._pending:
+            scene = self._pending[0]
+            if self._steps is None:
+                self._steps = scene.preload()
+                self._spent = 0.0
+            t = time.perf_counter()
+            try:
+                next(self._steps)
+            except StopIteration:
+                if self.log is not None:
+                    self.log.info("Scene %s ready in %.2f s", scene.name,
+                                  self._spent + time.perf_counter() - t)
+                self._finish()
+            except Exception:
+                if self.log is not None:
+                    self.log.exception("Preloading the %s scene failed", scene.name)
+                scene.ready = True  # draw with whatever loaded rather than hang on "Loading"
+                self._finish()
+            else:
+                self._spent += time.perf_counter() - t
+            if time.perf_counter() >= deadline:
+                break
+        return not self.done
+
+    def _finish(self):
+        self._pending.pop(0)
+        self._steps = None
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Stand-in for one or more ESP32s running distance_sender.ino.
+
+Publishes the same binary batches (or ASCII readings with --ascii) at a
+configurable rate and jitter. Batches carry a wall-clock timestamp
+(distance_protocol.FLAG_WALLCLOCK) so a display on the same machine can
+measure sample-to-pixel latency; see latency_bench.py.
+
+    python3 sensor_emulator.py --host 127.0.0.1                 # like the sketch
+    python3 sensor_emulator.py --sensors 100 --rate 20 --batch 10
+"""
+
+import argparse
+import heapq
+import math
+import random
+import time
+
+import paho.mqtt.client as mqtt
+
+import distance_protocol
+
+SINGLE_TOPIC = distance_protocol.TOPIC       # sensors == 1
+MULTI_TOPIC = "sensor/{id}/distance"          # sensors > 1, see multi_sensor_display.py
+
+
+class EmulatedSensor:
+    """Someone walking towards and away from an HC-SR04, with the odd missed echo."""
+
+    def __init__(self, sensor_id, rng, miss_rate=0.01):
+        self.sensor_id = sensor_id
+        self.rng = rng
+        self.miss_rate = miss_rate
+        self.period = rng.uniform(8.0, 20.0)
+        self.phase = rng.uniform(0, 2 * math.pi)
+        self.seq = 0
+
+    def reading(self, t):
+        if self.rng.random() < self.miss_rate:
+            return 0  # pulseIn timeout
+        d = 110 + 90 * math.sin(2 * math.pi * t / self.period + self.phase)
+        return max(2, int(d + self.rng.gauss(0, 2)))
+
+
+def run(host="127.0.0.1", port=1883, sensors=1, rate=20.0, batch=10, jitter_ms=0.0,
+        duration=None, ascii_payload=False, topic=None, seed=1, miss_rate=0.01):
+    """
+    Publish until duration seconds have passed (forever when None).
+    rate is readings per second per sensor; batch readings go in one message.
+    Returns the number of readings published.
+    """
+    rng = random.Random(seed)
+    if ascii_payload:
+        batch = 1
+    interval = 1.0 / rate
+    period = interval * batch
+    if topic is None:
+        topic = SINGLE_TOPIC if sensors == 1 else MULTI_TOPIC
+    devices = [EmulatedSensor(f"s{i:03d}", rng, miss_rate) for i in range(sensors)]
+
+    client = mqtt.Client(client_id=f"sensor_emulator_{seed}")
+    client.connect(host, port, keepalive=60)
+    client.loop_start()
+
+    start = time.time()
+    # Stagger the sensors over one period, as independent ESP32s would be
+    queue = [(start + period * i / sensors, i) for i in range(sensors)]
+    heapq.heapify(queue)
+    published = 0
+    try:
+        while queue:
+            due, i = heapq.heappop(queue)
+            if duration is not None and due - start >= duration:
+                break
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            device = devices[i]
+            now = time.time()
+            # Readings were taken over the last period, the newest just now
+            first = now - (batch - 1) * interval
+            values = [device.reading(first + k * interval) for k in range(batch)]
+            if ascii_payload:
+                payload = str(values[0])
+            else:
+                payload = distance_protocol.encode(values, device.seq, int(first * 1000),
+                                                   int(round(interval * 1000)),
+                                                   distance_protocol.FLAG_WALLCLOCK)
+            device.seq += 1
+            client.publish(topic.format(id=device.sensor_id), payload)
+            published += batch
+            jitter = rng.uniform(-jitter_ms, jitter_ms) / 1000.0 if jitter_ms else 0.0
+            heapq.heappush(queue, (due + period + jitter, i))
+    finally:
+        client.loop_stop()
+        client.disconnect()
+    return published
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emulate distance_sender.ino sensors over MQTT.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--sensors", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=20.0, help="readings/s per sensor (sketch: 20)")
+    parser.add_argument("--batch", type=int, default=10, help="readings per message (sketch: 10)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- ms added to each send time")
+    parser.add_argument("--duration", type=float, help="seconds; default runs until Ctrl+C")
+    parser.add_argument("--ascii", action="store_true", help="one ASCII reading per message")
+    parser.add_argument("--topic", help="topic, {id} is replaced by the sensor id")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    try:
+        n = run(args.host, args.port, args.sensors, args.rate, args.batch, args.jitter,
+                args.duration, args.ascii, args.topic, args.seed)
+        print(f"Published {n} readings")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Per-sensor state for the multi-sensor display.
+
+Sensors get a slot the first time they report (in order of appearance);
+everything else is kept in flat arrays indexed by slot, so an update is a
+couple of array stores and the renderer only visits the slots that changed
+since it last looked (take_dirty()).
+"""
+
+import time
+from array import array
+
+import filters
+
+NO_VALUE = -1
+
+
+class SensorTable:
+    def __init__(self, capacity=256, make_filter=filters.default_chain):
+        self.capacity = capacity
+        self.make_filter = make_filter
+        self.ids = []                                   # slot -> sensor id
+        self.slots = {}                                 # sensor id -> slot
+        self.distance = array("i", [NO_VALUE]) * capacity  # shown value, cm
+        self.last_seen = array("d", [0.0]) * capacity      # monotonic seconds
+        self.stale = bytearray(capacity)
+        self.dropped = 0  # messages from sensors beyond capacity
+        self._filters = []
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def slot(self, sensor_id):
+        """Slot for sensor_id, allocating one on first sight; None when full."""
+        slot = self.slots.get(sensor_id)
+        if slot is None:
+            if len(self.ids) >= self.capacity:
+                return None
+            slot = len(self.ids)
+            self.slots[sensor_id] = slot
+            self.ids.append(sensor_id)
+            self._filters.append(self.make_filter())
+            self._dirty.add(slot)
+        return slot
+
+    def update(self, sensor_id, values, now=None):
+        """
+        Feed a batch of readings for one sensor. Returns the slot, or None if
+        the table is full.
+        """
+        slot = self.slot(sensor_id)
+        if slot is None:
+            self.dropped += 1
+            return None
+        self.last_seen[slot] = time.monotonic() if now is None else now
+        if self.stale[slot]:
+            self.stale[slot] = 0
+            self._dirty.add(slot)
+        filtered = self._filters[slot].update_many(values, len(values))
+        if filtered is not None:
+            d = int(round(filtered))
+            if d != self.distance[slot]:
+                self.distance[slot] = d
+                self._dirty.add(slot)
+        return slot
+
+    def mark_stale(self, max_age, now=None):
+        """Flag sensors not heard from for max_age seconds; they become dirty once."""
+        now = time.monotonic() if now is None else now
+        cutoff = now - max_age
+        for slot in range(len(self.ids)):
+            if not self.stale[slot] and self.last_seen[slot] < cutoff:
+                self.stale[slot] = 1
+                self._dirty.add(slot)
+
+    def take_dirty(self):
+        """Return (and forget) the slots changed since the last call."""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def clear(self):
+        self.ids.clear()
+        self.slots.clear()
+        self._filters.clear()
+        self._dirty.clear()
+        for slot in range(self.capacity):
+            self.distance[slot] = NO_VALUE
+            self.last_seen[slot] = 0.0
+            self.stale[slot] = 0
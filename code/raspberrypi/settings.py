@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Settings shared by every display controller (kiosk.py and its launchers,
+display_controller.py, display_controller_async.py, static_visual.py,
+multi_sensor_display.py): broker, reconnects, logging, metrics and the
+sample log. Edit them here once for all scripts; the values that can come
+from the environment (BROKER_IP, METRICS_HOST, SAMPLE_LOG, REPLAY, ...)
+still override them per run. What differs per script (topic, client id,
+frame rates) stays in the script's own SETTINGS block.
+"""
+
+import os
+
+import sample_log
+
+BROKER_IP = os.environ.get("BROKER_IP", "192.168.1.100")  # Replace with your broker IP
+BROKER_PORT = int(os.environ.get("BROKER_PORT", 1883))
+USERNAME = None    # e.g. "myuser" if needed, otherwise None
+PASSWORD = None    # e.g. "mypassword" if needed, otherwise None
+
+# Reconnect params
+RECONNECT_INITIAL = 5     # Initial seconds between reconnect attempts
+RECONNECT_MAX = 300       # Max seconds backoff interval
+
+# Logging level; DEBUG also logs received distances (rate limited)
+LOG_LEVEL = "INFO"
+
+# Metrics: Prometheus text on http://METRICS_HOST:METRICS_PORT/metrics; F3 toggles an overlay.
+# Local only by default; METRICS_HOST=0.0.0.0 lets other machines scrape it (no authentication).
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = 9108
+
+# Sample log: every reading is appended here (rotated, see sample_log.py); "" disables.
+# REPLAY=samples.dslog plays a recorded log through on_message instead of connecting.
+SAMPLE_LOG = os.environ.get("SAMPLE_LOG", sample_log.DEFAULT_PATH)
+REPLAY = os.environ.get("REPLAY")
+REPLAY_SPEED = float(os.environ.get("REPLAY_SPEED", 1))
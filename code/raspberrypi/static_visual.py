@@ -4,160 +4,153 @@ import paho.mqtt.client as mqtt
 import pygame
 import sys
 import time
-import threading
-import math
+
+import distance_protocol
+import filters
+import frame_scheduler
+import latency
+import metrics
+import motion
+import mqtt_supervisor
+import sample_log
+import startup
+import text_cache
+import visuals
+from log_setup import MessageStats, rate_limited, setup_logging
+from sample_ring import SampleRing, make_buffers
+from settings import (BROKER_IP, BROKER_PORT, LOG_LEVEL, METRICS_HOST, METRICS_PORT, PASSWORD,
+                      RECONNECT_INITIAL, RECONNECT_MAX, REPLAY, REPLAY_SPEED, SAMPLE_LOG, USERNAME)
 
 # --- SETTINGS ---
-BROKER_IP = "192.168.1.100"  # Replace with your broker IP
-BROKER_PORT = 1883
+# Broker, reconnects, logging, metrics and the sample log are in settings.py
 TOPIC = "sensor/distance"
 CLIENT_ID = "distance_display_client"
-USERNAME = None
-PASSWORD = None
 
-# Reconnect params
-RECONNECT_INITIAL = 5
-RECONNECT_MAX = 300
+# Frame rate: FPS while animating, IDLE_FPS once the shown value has not
+# changed for IDLE_AFTER seconds
+FPS = 30
+IDLE_FPS = 2
+IDLE_AFTER = 10
+
+# Motion smoothing between readings (see motion.py): glide onto each new reading
+# over GLIDE seconds, extrapolating at most PREDICT_HORIZON s past it (0: off)
+GLIDE = 0.3
+PREDICT_HORIZON = 0.25
+
+# --- Logging ---
+log = setup_logging("static_visual", LOG_LEVEL)
+stats = MessageStats(log)  # periodic "N samples/s, M invalid" summary
 
 # --- Pygame Setup ---
-pygame.init()
 SCREEN_SIZE = (800, 480)
-screen = pygame.display.set_mode(SCREEN_SIZE)
-pygame.display.set_caption("Distance Visualization")
-clock = pygame.time.Clock()
-font_big = pygame.font.SysFont(None, 96)
-font_med = pygame.font.SysFont(None, 48)
-font_small = pygame.font.SysFont(None, 28)
+screen = startup.init_display(SCREEN_SIZE, "Distance Visualization")
+scheduler = frame_scheduler.FrameScheduler(FPS, IDLE_FPS, IDLE_AFTER)
+font_big = startup.font(None, 96)
+font_med = startup.font(None, 48)
+font_small = startup.font(None, 28)
+startup.timer.mark("fonts")
 
 # Visualization parameters
 current_distance = None
-connected = False
-last_disconnect_time = 0
-reconnect_backoff = RECONNECT_INITIAL
-reconnect_lock = threading.Lock()
-
-# Animation state
-start_time = time.time()
-pulse_phase = 0.0
-
-# --- Drawing helpers ---
+samples = SampleRing()  # written by on_message, drained by the main loop
+frame_times, frame_values = make_buffers(samples)
+distance_filter = filters.default_chain()  # outlier rejection, median and EMA
+estimator = motion.MotionEstimator(GLIDE, PREDICT_HORIZON)  # smooth value per frame
+connected = False  # updated from CONNECTION events in the main loop
+
+# --- Metrics ---
+frame_metrics = metrics.FrameMetrics(1.0 / FPS)
+metrics.expose_stats(stats, samples)
+metrics.expose_text_cache()
+metrics.expose_ring_atlas()
+metrics.serve(METRICS_PORT, METRICS_HOST)
+overlay = metrics.Overlay()
+
+# --- Drawing helpers (see visuals.py) ---
 def draw_radar(cx, cy, max_radius, distance_value):
-    """
-    Draw a radar-like circular pulse. If distance_value provided, scale pulse.
-    """
-    global pulse_phase
-    # base pulse speed and size
-    t = time.time() - start_time
-    pulse_phase = (pulse_phase + 0.05) % (2 * math.pi)
-    # If we have distance, map to 0..1 (clamp)
-    if distance_value is None:
-        norm = 0.5
-    else:
-        # assume sensors range 0..200 cm (tune as needed)
-        norm = max(0.0, min(1.0, distance_value / 200.0))
-
-    # number of rings and animated offset
-    rings = 4
-    offset = (math.sin(t * 1.2 + pulse_phase) + 1) / 2  # 0..1
-    for i in range(rings):
-        r = max_radius * ((i + 1) / float(rings)) * (0.6 + 0.4 * (1 - norm))
-        alpha = int(70 * (1 - (i / rings)) * (0.6 + 0.4 * offset))
-        color = (30, 200 - i * 30, 120 + i * 20)
-        s = pygame.Surface((max_radius * 2, max_radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(s, color + (alpha,), (max_radius, max_radius), int(r), width=6)
-        screen.blit(s, (cx - max_radius, cy - max_radius))
-
-    # center dot
-    dot_r = 10 + int(10 * (1 - norm))
-    pygame.draw.circle(screen, (255, 255, 255), (cx, cy), dot_r)
-    pygame.draw.circle(screen, (0, 0, 0), (cx, cy), dot_r, 2)
+    visuals.draw_radar(screen, cx, cy, max_radius, distance_value)
 
 def draw_bar_meter(x, y, w, h, distance_value):
-    """
-    Horizontal bar from left (near) to right (far).
-    """
-    pygame.draw.rect(screen, (40, 40, 40), (x, y, w, h), border_radius=6)
-    # If no data, show an animated scanning segment
-    t = time.time()
-    if distance_value is None:
-        # animated gradient block scanning
-        scan_w = w // 6
-        scan_x = x + int(((math.sin(t * 1.5) + 1) / 2) * (w - scan_w))
-        grad = pygame.Surface((scan_w, h), pygame.SRCALPHA)
-        for i in range(scan_w):
-            alpha = int(180 * (1 - abs(i - scan_w/2) / (scan_w/2)))
-            grad.fill((80, 120, 200, alpha), rect=pygame.Rect(i, 0, 1, h))
-        screen.blit(grad, (scan_x, y))
-        label = font_small.render("Waiting for sensor...", True, (200, 200, 200))
-        screen.blit(label, (x + 8, y + (h - label.get_height())//2))
-    else:
-        # Fill proportionally
-        norm = max(0.0, min(1.0, distance_value / 200.0))  # tune range
-        fill_w = int(w * norm)
-        # gradient fill
-        fill_surf = pygame.Surface((fill_w, h))
-        for i in range(fill_w):
-            r = int(40 + 200 * (i / max(1, fill_w)))
-            g = int(200 - 100 * (i / max(1, fill_w)))
-            b = int(60 + 60 * (1 - i / max(1, fill_w)))
-            fill_surf.fill((r, g, b), rect=pygame.Rect(i, 0, 1, h))
-        screen.blit(fill_surf, (x, y))
-        # indicator line
-        pygame.draw.line(screen, (0,0,0), (x + fill_w, y), (x + fill_w, y + h), 3)
-        # numeric label
-        lbl = f"{int(distance_value)} cm"
-        label = font_med.render(lbl, True, (230, 230, 230))
-        screen.blit(label, (x + w + 16, y + (h - label.get_height())//2))
+    visuals.draw_bar_meter(screen, (font_med, font_small), x, y, w, h, distance_value)
 
 def draw_no_data(cx, cy):
-    """
-    Big pulsing question mark when no data.
-    """
-    t = time.time()
-    scale = 1.0 + 0.05 * math.sin(t * 2.0)
-    q = font_big.render("?", True, (200, 200, 200))
-    qs = pygame.transform.rotozoom(q, 0, scale)
-    screen.blit(qs, (cx - qs.get_width()//2, cy - qs.get_height()//2))
-    label = font_small.render("No data yet", True, (180, 180, 180))
-    screen.blit(label, (cx - label.get_width()//2, cy + qs.get_height()//2 + 8))
+    visuals.draw_no_data(screen, (font_big, font_small), cx, cy)
+
+def draw_display():
+    # Draw background
+    screen.fill((12, 18, 24))
+
+    # Layout positions
+    cx, cy = SCREEN_SIZE[0]//3, SCREEN_SIZE[1]//2
+    radar_radius = min(SCREEN_SIZE[1]//2 - 40, SCREEN_SIZE[0]//3 - 40)
+    draw_radar(cx, cy, radar_radius, current_distance)
+
+    # Right-side meter
+    meter_x = SCREEN_SIZE[0]//3 * 2 - 280
+    meter_y = SCREEN_SIZE[1]//2 - 40
+    meter_w = 520
+    meter_h = 80
+    draw_bar_meter(meter_x, meter_y, meter_w, meter_h, current_distance)
+
+    # Header text
+    header = text_cache.render(font_med, "Distance Visualizer", True, (200, 200, 220))
+    screen.blit(header, (20, 12))
+    # Connection status
+    status_text = "Connected" if connected else "Disconnected"
+    status_color = (80, 220, 120) if connected else (220, 80, 80)
+    status_lbl = text_cache.render(font_small, f"MQTT: {status_text}", True, status_color)
+    screen.blit(status_lbl, (SCREEN_SIZE[0] - 160, 14))
+
+    # If no data, show big question mark
+    if current_distance is None:
+        draw_no_data(SCREEN_SIZE[0]//2, SCREEN_SIZE[1]//2)
+
+    # Footer hint
+    hint = text_cache.render(font_small, "Press window close button to exit", True, (120, 120, 140))
+    screen.blit(hint, (20, SCREEN_SIZE[1] - 28))
+
+    overlay.draw(screen)
+    latency.probe.rendered()
+    pygame.display.flip()
+    latency.probe.flipped()
 
 # --- MQTT Callbacks ---
 def on_connect(client, userdata, flags, rc):
-    global connected, reconnect_backoff
     if rc == 0:
-        connected = True
-        reconnect_backoff = RECONNECT_INITIAL
-        print("Connected to MQTT broker.")
-        client.subscribe(TOPIC)
+        log.info("Connected to MQTT broker.")
     else:
-        connected = False
-        print(f"Failed to connect, rc={rc}")
+        log.warning("Failed to connect, rc=%s", rc)
 
 def on_message(client, userdata, msg):
-    global current_distance
-    payload = msg.payload.decode(errors='ignore').strip()
     try:
-        current_distance = int(payload)
-        # clamp to reasonable range
-        if current_distance < 0:
-            current_distance = 0
-        elif current_distance > 10000:
-            current_distance = 10000
-        print(f"Received distance: {current_distance} cm")
+        # Binary batch from the ESP32, or a single ASCII number
+        batch = distance_protocol.decode(msg.payload)
     except ValueError:
-        print(f"Invalid payload: '{payload}'")
+        stats.invalid += 1
+        log.warning("Invalid payload: %r", msg.payload)
+        return
+    stats.messages += 1
+    stats.samples += len(batch.values)
+    latency.probe.received(batch)
+    sample_log.recorder.append("", batch)
+    for t, distance in batch.timed(time.monotonic()):
+        # clamp to reasonable range
+        if distance < 0:
+            distance = 0
+        elif distance > 10000:
+            distance = 10000
+        samples.push(distance, t)
+    frame_scheduler.wake()
+    log.debug("Received distance: %s cm", distance, extra=rate_limited(""))
 
 def on_disconnect(client, userdata, rc):
-    global connected, last_disconnect_time
-    connected = False
-    last_disconnect_time = time.time()
     if rc == 0:
-        print("Clean disconnect.")
+        log.info("Clean disconnect.")
     else:
-        print(f"Unexpected disconnect (rc={rc}).")
+        log.warning("Unexpected disconnect (rc=%s).", rc)
 
 def on_subscribe(client, userdata, mid, granted_qos):
-    print(f"Subscribed (mid={mid}, qos={granted_qos}).")
+    log.info("Subscribed (mid=%s, qos=%s).", mid, granted_qos)
 
 # --- MQTT Client Setup ---
 client = mqtt.Client(client_id=CLIENT_ID)
@@ -171,82 +164,63 @@ if USERNAME and PASSWORD:
 
 client.will_set(f"clients/{CLIENT_ID}/status", payload="offline", qos=1, retain=True)
 
-def try_connect():
-    try:
-        client.connect(BROKER_IP, BROKER_PORT, keepalive=60)
-        client.loop_start()
-    except Exception as e:
-        print(f"Initial connect failed: {e}")
-
-try_connect()
+# Connects and reconnects on paho's thread; state changes arrive as CONNECTION events
+supervisor = mqtt_supervisor.ConnectionSupervisor(client, BROKER_IP, BROKER_PORT, topics=[TOPIC],
+                                                  reconnect_initial=RECONNECT_INITIAL,
+                                                  reconnect_max=RECONNECT_MAX, log=log)
+metrics.expose_connection(lambda: supervisor.connected, lambda: supervisor.reconnect_backoff,
+                          lambda: supervisor.last_disconnect)
+
+# First frame, before the sample log and the broker connection are set up
+draw_display()
+startup.timer.mark("first frame")
+
+# --- Sample log ---
+if REPLAY:
+    log.info("Replaying %s at %sx", REPLAY, REPLAY_SPEED)
+    sample_log.start_replay(REPLAY, on_message, client, REPLAY_SPEED)
+else:
+    if SAMPLE_LOG:
+        sample_log.recorder.open(SAMPLE_LOG, log=log)
+    supervisor.start()
+    startup.timer.mark("connect")
+startup.timer.report(log)
 
 # --- Main Loop ---
 try:
     while True:
-        for event in pygame.event.get():
+        # Radar, scanner and "?" pulse always animate
+        for event in scheduler.wait(animating=True):
+            if overlay.handle(event):
+                continue
+            if event.type == mqtt_supervisor.CONNECTION:
+                connected = event.connected
+                continue
             if event.type == pygame.QUIT:
-                try:
-                    client.loop_stop()
-                    client.disconnect()
-                except Exception:
-                    pass
+                supervisor.stop()
+                sample_log.recorder.close()
                 pygame.quit()
                 sys.exit()
 
-        # Reconnect watchdog
-        if not connected:
-            now = time.time()
-            with reconnect_lock:
-                if now - last_disconnect_time >= reconnect_backoff:
-                    print(f"[Reconnect] Attempting to reconnect (backoff={reconnect_backoff}s)...")
-                    try:
-                        client.reconnect()
-                    except Exception as e:
-                        print(f"[Reconnect] Failed: {e}")
-                        last_disconnect_time = now
-                        reconnect_backoff = min(reconnect_backoff * 2, RECONNECT_MAX)
-
-        # Draw background
-        screen.fill((12, 18, 24))
-
-        # Layout positions
-        cx, cy = SCREEN_SIZE[0]//3, SCREEN_SIZE[1]//2
-        radar_radius = min(SCREEN_SIZE[1]//2 - 40, SCREEN_SIZE[0]//3 - 40)
-        draw_radar(cx, cy, radar_radius, current_distance)
-
-        # Right-side meter
-        meter_x = SCREEN_SIZE[0]//3 * 2 - 280
-        meter_y = SCREEN_SIZE[1]//2 - 40
-        meter_w = 520
-        meter_h = 80
-        draw_bar_meter(meter_x, meter_y, meter_w, meter_h, current_distance)
-
-        # Header text
-        header = font_med.render("Distance Visualizer", True, (200, 200, 220))
-        screen.blit(header, (20, 12))
-        # Connection status
-        status_text = "Connected" if connected else "Disconnected"
-        status_color = (80, 220, 120) if connected else (220, 80, 80)
-        status_lbl = font_small.render(f"MQTT: {status_text}", True, status_color)
-        screen.blit(status_lbl, (SCREEN_SIZE[0] - 160, 14))
-
-        # If no data, show big question mark
-        if current_distance is None:
-            draw_no_data(SCREEN_SIZE[0]//2, SCREEN_SIZE[1]//2)
-
-        # Footer hint
-        hint = font_small.render("Press window close button to exit", True, (120, 120, 140))
-        screen.blit(hint, (20, SCREEN_SIZE[1] - 28))
-
-        pygame.display.flip()
-        clock.tick(30)  # 30 FPS-ish
+        frame_metrics.start()
+
+        stats.maybe_log()
+
+        # Consume every sample received since the last frame
+        latency.probe.frame()
+        n = samples.drain(frame_times, frame_values)
+        estimator.add_many(frame_times, frame_values, n, distance_filter)
+        shown = estimator.value_at(time.monotonic())
+        if shown is not None and int(round(shown)) != current_distance:
+            current_distance = int(round(shown))
+            scheduler.activity()
+
+        draw_display()
+        frame_metrics.stop()
 
 except KeyboardInterrupt:
-    print("Exiting by user.")
-    try:
-        client.loop_stop()
-        client.disconnect()
-    except Exception:
-        pass
+    log.info("Exiting by user.")
+    supervisor.stop()
+    sample_log.recorder.close()
     pygame.quit()
     sys.exit()
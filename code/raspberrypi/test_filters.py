@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Batch filters give what update() gives, sample for sample.
+
+    python3 -m unittest test_filters   (or pytest, from this directory)
+"""
+
+import random
+import unittest
+
+import numpy
+
+import filters
+
+
+def streamed(make, values):
+    f = make()
+    return [numpy.nan if y is None else y for y in map(f.update, values)]
+
+
+class BatchMatchesUpdateTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.values = [max(0, min(500, round(rng.gauss(80, 20)))) for _ in range(500)]
+        self.values[::37] = [0] * len(self.values[::37])  # missed echoes
+        self.values[200:204] = [500] * 4                  # out of range long enough to pass
+
+    def assertBatchMatches(self, make, values):
+        numpy.testing.assert_allclose(make().batch(values), streamed(make, values))
+
+    def test_median_while_the_window_fills_and_after(self):
+        for n in range(1, 7):
+            for length in (0, 1, n - 1, n, n + 1, len(self.values)):
+                with self.subTest(n=n, length=length):
+                    self.assertBatchMatches(lambda: filters.Median(n), self.values[:length])
+
+    def test_default_chain(self):
+        self.assertBatchMatches(filters.default_chain, self.values)
+
+
+if __name__ == "__main__":
+    unittest.main()
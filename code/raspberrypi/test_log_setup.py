@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+RateLimitFilter: only opted-in DEBUG repeats are thinned out.
+
+    python3 -m unittest test_log_setup   (or pytest, from this directory)
+"""
+
+import logging
+import unittest
+
+from log_setup import RateLimitFilter, rate_limited
+
+
+def record(level, msg, args, extra=None, created=0.0):
+    rec = logging.LogRecord("kiosk", level, __file__, 1, msg, args, None)
+    rec.created = created
+    rec.__dict__.update(extra or {})
+    return rec
+
+
+class RateLimitFilterTest(unittest.TestCase):
+    def setUp(self):
+        self.limit = RateLimitFilter(interval=1.0)
+
+    def passed(self, records):
+        return [r.getMessage() for r in records if self.limit.filter(r)]
+
+    def test_different_args_are_all_logged(self):
+        self.assertEqual(
+            self.passed([record(logging.INFO, "Scene %s ready in %.2f s", ("radar", 0.03)),
+                         record(logging.INFO, "Scene %s ready in %.2f s", ("animation", 2.39))]),
+            ["Scene radar ready in 0.03 s", "Scene animation ready in 2.39 s"])
+        self.assertEqual(
+            self.passed([record(logging.DEBUG, "Received %s", (1,), rate_limited()),
+                         record(logging.DEBUG, "Received %s", (2,), rate_limited())]),
+            ["Received 1", "Received 2"])
+
+    def test_warnings_are_never_limited(self):
+        warning = record(logging.WARNING, "Broker %s unreachable", ("a",), rate_limited(""))
+        self.assertEqual(len(self.passed([warning, warning])), 2)
+
+    def test_opted_in_debug_repeats_are_thinned_out(self):
+        extra = rate_limited("")
+        self.assertEqual(
+            self.passed([record(logging.DEBUG, "Received %s cm", (10,), extra, 0.0),
+                         record(logging.DEBUG, "Received %s cm", (11,), extra, 0.5),
+                         record(logging.DEBUG, "Received %s cm", (12,), extra, 0.7),
+                         record(logging.DEBUG, "Received %s cm", (13,), extra, 1.2)]),
+            ["Received 10 cm", "Received 13 cm [2 similar suppressed]"])
+
+
+if __name__ == "__main__":
+    unittest.main()
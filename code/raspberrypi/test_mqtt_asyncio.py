@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+AsyncController against the in-process MiniBroker: connect, subscribe, and
+a published sample reaching on_message and waking the frame loop; a connect
+that hangs past connect_timeout is waited for, not raced by a retry.
+
+    python3 -m unittest test_mqtt_asyncio   (or pytest, from this directory)
+"""
+
+import asyncio
+import os
+import threading
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import paho.mqtt.client as mqtt
+import pygame
+
+from mini_broker import MiniBroker
+from mqtt_asyncio import AsyncController
+
+TOPIC = "sensor/distance"
+
+
+class AsyncControllerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        pygame.display.init()  # frame() is handed pygame.event.get()
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    async def test_published_sample_reaches_on_message(self):
+        broker = MiniBroker()
+        server = await broker.start("127.0.0.1", 0)
+        self.addCleanup(broker.close)
+        port = server.sockets[0].getsockname()[1]
+
+        received = []
+        client = mqtt.Client()
+
+        def on_message(client, userdata, msg):
+            received.append((msg.topic, msg.payload))
+            controller.wake()
+
+        client.on_message = on_message
+        controller = AsyncController(client, "127.0.0.1", port, topics=[TOPIC],
+                                     reconnect_initial=0.1, connect_timeout=2.0)
+        published = []
+
+        def frame(events):
+            if received:
+                return None
+            if not published and any(broker.subscriptions.values()):
+                broker.publish(TOPIC, b"123.4")
+                published.append(asyncio.get_running_loop().time())
+                return 10.0  # only wake() from on_message gets us back here in time
+            return 0.02
+
+        await asyncio.wait_for(controller.run(frame), 5.0)
+        self.assertEqual(received, [(TOPIC, b"123.4")])
+        self.assertLess(asyncio.get_running_loop().time() - published[0], 1.0)
+
+    async def test_retry_waits_for_a_hanging_connect(self):
+        broker = MiniBroker()
+        server = await broker.start("127.0.0.1", 0)
+        self.addCleanup(broker.close)
+        port = server.sockets[0].getsockname()[1]
+
+        release = threading.Event()
+        calls = []    # per connect(): was another one still running?
+        running = []
+
+        class HangingClient(mqtt.Client):
+            def connect(self, *args, **kwargs):
+                calls.append(bool(running))
+                running.append(1)
+                try:
+                    if len(calls) == 1:
+                        release.wait(5)  # e.g. a name lookup that takes its time
+                    return super().connect(*args, **kwargs)
+                finally:
+                    running.pop()
+
+        controller = AsyncController(HangingClient(), "127.0.0.1", port, reconnect_initial=0.05,
+                                     reconnect_max=0.1, connect_timeout=0.2)
+        loop = asyncio.get_running_loop()
+        hang_until = loop.time() + 1.0  # several connect_timeouts and retries
+
+        def frame(events):
+            if controller.connected:
+                return None
+            if loop.time() > hang_until:
+                release.set()
+            return 0.02
+
+        self.addCleanup(release.set)
+        with self.assertLogs("mqtt_asyncio", "WARNING"):
+            await asyncio.wait_for(controller.run(frame), 5.0)
+        self.assertEqual(calls, [False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Sample log round trips: sensor ids survive recording and replay whole.
+
+    python3 -m unittest test_sample_log   (or pytest, from this directory)
+"""
+
+import os
+import tempfile
+import unittest
+
+import distance_protocol
+import sample_log
+
+
+def batch(values, seq):
+    return distance_protocol.decode(distance_protocol.encode(values, seq, 0, 100))
+
+
+class SampleLogTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "samples.dslog")
+        self.recorder = sample_log.SampleLog()
+        self.assertTrue(self.recorder.open(self.path, flush_interval=60))
+        self.addCleanup(self.recorder.close)
+
+    def replayed(self):
+        self.recorder.close()
+        return [msg for _, msg in sample_log.messages(self.path)]
+
+    def test_ids_sharing_a_prefix_stay_apart(self):
+        self.recorder.append("kitchen-101", batch([10, 11], 1), received=1000.0)
+        self.recorder.append("kitchen-102", batch([20, 21], 1), received=1000.5)
+        self.recorder.append("", batch([30], 2), received=1001.0)
+        messages = self.replayed()
+        self.assertEqual([m.topic for m in messages],
+                         ["sensor/kitchen-101/distance", "sensor/kitchen-102/distance",
+                          distance_protocol.TOPIC])
+        self.assertEqual([list(distance_protocol.decode(m.payload).values) for m in messages],
+                         [[10, 11], [20, 21], [30]])
+
+    def test_ids_are_kept_when_the_log_is_reopened(self):
+        self.recorder.append("kitchen-101", batch([10], 1), received=1000.0)
+        self.recorder.close()
+        self.recorder.open(self.path, flush_interval=60)
+        self.recorder.append("kitchen-102", batch([20], 2), received=1001.0)
+        self.recorder.append("kitchen-101", batch([11], 3), received=1002.0)
+        self.assertEqual([m.topic for m in self.replayed()],
+                         ["sensor/kitchen-101/distance", "sensor/kitchen-102/distance",
+                          "sensor/kitchen-101/distance"])
+
+    def test_long_id_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.recorder.append("x" * (sample_log.ID_SIZE + 1), batch([10], 1))
+        self.assertEqual(self.replayed(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
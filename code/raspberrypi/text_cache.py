@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Shared LRU cache of rendered text surfaces.
+
+Most labels ("Distance Visualizer", "MQTT: Connected", "Start"/"Stop", the
+distance strings) repeat frame after frame, so rasterising them once and
+reusing the surface avoids the glyph rendering cost on every frame.
+stats() reports its size and hit rate, which metrics.expose_text_cache()
+publishes.
+"""
+
+from collections import OrderedDict
+
+MAX_ENTRIES = 256
+
+_surfaces = OrderedDict()
+_hits = 0
+_misses = 0
+
+
+def render(font, text, antialias, color):
+    """Drop-in replacement for font.render(text, antialias, color)."""
+    global _hits, _misses
+    key = (font, text, antialias, tuple(color))
+    surf = _surfaces.get(key)
+    if surf is not None:
+        _hits += 1
+        _surfaces.move_to_end(key)
+        return surf
+
+    _misses += 1
+    surf = font.render(text, antialias, color)
+    _surfaces[key] = surf
+    if len(_surfaces) > MAX_ENTRIES:
+        _surfaces.popitem(last=False)
+    return surf
+
+
+def stats():
+    return {"entries": len(_surfaces), "hits": _hits, "misses": _misses}
+
+
+def clear():
+    _surfaces.clear()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Display backends: the classic software surface, or SDL2 textures.
+
+Both backends offer the few calls the display scripts make on their screen
+(fill, blit, draw_rect, draw_overlay, present, get_size), so a script can
+draw through either:
+
+    surface   pygame.display.set_mode and flip(): every frame is composed by
+              the CPU and the whole screen is copied out on each flip.
+    texture   pygame._sdl2.video Renderer: assets are uploaded once as
+              textures and composed by the GPU, so a full-screen animation
+              frame costs a draw call instead of a full-screen copy.
+              Without a usable GPU driver it falls back to SDL's software
+              renderer (logged), which is also what "software" selects, so
+              the texture path runs and can be tested anywhere.
+
+Code that draws with pygame.draw and surface blits (the band and radar
+scenes) draws on `canvas` instead and shows it with present_canvas(rects).
+On the surface backend the canvas is the screen itself; on the texture
+backends it is an off-screen surface whose changed rects are copied into
+a streaming texture.
+
+upload() turns a list of surfaces (animation frames) into textures up front.
+blit() also takes plain surfaces (text_cache labels, ring_atlas sprites):
+each is uploaded the first time it is seen and drawn from the texture after
+that, so it is meant for long-lived assets, and surfaces passed to blit()
+must not be changed once drawn. A texture is dropped together with its
+surface (the cache holds the surfaces weakly), or when the cache is full.
+The sprite's surface alpha (set_alpha) is applied on every blit. The F3
+overlay, which is redrawn every second, goes to one reused streaming
+texture instead.
+"""
+
+import logging
+import weakref
+
+import pygame
+
+import startup
+
+try:
+    from pygame._sdl2 import video
+except ImportError:  # pygame 1.x, or built without the _sdl2 module
+    video = None
+
+BACKENDS = ("surface", "texture", "software")
+MAX_TEXTURES = 256  # surfaces uploaded by blit(); upload() results are not counted
+BLEND = 1  # SDL_BLENDMODE_BLEND
+
+
+def open_display(size, caption, fullscreen=False, backend="surface", log=None):
+    """
+    A SurfaceDisplay or TextureDisplay. size (0, 0) with fullscreen uses the
+    native mode. An unavailable texture backend falls back to "surface".
+    """
+    log = log or logging.getLogger(__name__)
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown display backend {backend!r}, expected one of {BACKENDS}")
+    if backend != "surface":
+        if video is not None:
+            return TextureDisplay(size, caption, fullscreen, accelerated=backend == "texture", log=log)
+        log.warning("pygame._sdl2 is not available; using the surface backend")
+    return SurfaceDisplay(startup.init_display(size, caption, fullscreen))
+
+
+class SurfaceDisplay:
+    """The display surface from set_mode; present() flips it."""
+
+    backend = "surface"
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.canvas = screen
+
+    def get_size(self):
+        return self.screen.get_size()
+
+    def get_rect(self):
+        return self.screen.get_rect()
+
+    def upload(self, surfaces):
+        return surfaces
+
+    def fill(self, color, rect=None):
+        self.screen.fill(color, rect)
+
+    def blit(self, source, pos):
+        self.screen.blit(source, pos)
+
+    def draw_rect(self, color, rect):
+        pygame.draw.rect(self.screen, color, rect)
+
+    def draw_overlay(self, overlay):
+        overlay.draw(self.screen)
+
+    def present(self):
+        pygame.display.flip()
+
+    def present_canvas(self, rects):
+        if rects[0] == self.screen.get_rect():
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+
+class TextureDisplay:
+    """A window with an SDL2 renderer; the frame is built from textures."""
+
+    def __init__(self, size, caption, fullscreen=False, accelerated=True, log=None):
+        self.log = log or logging.getLogger(__name__)
+        pygame.display.init()
+        pygame.font.init()
+        if size == (0, 0):
+            size = pygame.display.get_desktop_sizes()[0]
+        self.window = video.Window(caption, size, fullscreen_desktop=fullscreen)
+        self.renderer = None
+        if accelerated:
+            try:
+                self.renderer = video.Renderer(self.window, accelerated=1)
+            except video.error as e:  # no GPU render driver (a RuntimeError, not pygame.error)
+                self.log.warning("No accelerated renderer (%s); using the software renderer", e)
+        self.accelerated = self.renderer is not None
+        if self.renderer is None:
+            self.renderer = video.Renderer(self.window, accelerated=0)
+        self.backend = "texture" if self.accelerated else "software"
+        self.log.info("Display: %s renderer, %dx%d", self.backend, *self.window.size)
+        # Draw in window coordinates even where the output is scaled (HiDPI)
+        self.renderer.logical_size = self.window.size
+        self._textures = weakref.WeakKeyDictionary()  # surface -> texture, oldest first
+        self._overlay_texture = None
+        self._overlay_lines = None  # overlay text last copied to _overlay_texture
+        self._canvas = None
+        self._canvas_texture = None
+        self.uploads = 0
+        startup.timer.mark("display")
+
+    def get_size(self):
+        return self.window.size
+
+    def get_rect(self):
+        return pygame.Rect((0, 0), self.window.size)
+
+    @property
+    def canvas(self):
+        """Off-screen surface for surface drawing; made on first use."""
+        if self._canvas is None:
+            self._canvas = pygame.Surface(self.window.size)
+        return self._canvas
+
+    def upload(self, surfaces):
+        """Textures for surfaces (e.g. animation frames), made once."""
+        self.uploads += len(surfaces)
+        return [video.Texture.from_surface(self.renderer, s) for s in surfaces]
+
+    def texture(self, surface):
+        """The cached texture for a surface, uploaded on first use."""
+        textures = self._textures
+        texture = textures.pop(surface, None)
+        if texture is None:
+            texture = video.Texture.from_surface(self.renderer, surface)
+            self.uploads += 1
+            if len(textures) >= MAX_TEXTURES:
+                del textures[next(iter(textures))]
+        textures[surface] = texture  # (re)inserted as the most recently used
+        return texture
+
+    def fill(self, color, rect=None):
+        self.renderer.draw_color = tuple(color)[:3] + (255,)
+        if rect is None:
+            self.renderer.clear()
+        else:
+            self.renderer.fill_rect(rect)
+
+    def blit(self, source, pos):
+        if isinstance(source, pygame.Surface):
+            texture = self.texture(source)
+            alpha = source.get_alpha()
+            texture.alpha = 255 if alpha is None else alpha
+            source = texture
+        source.draw(dstrect=(pos[0], pos[1]))
+
+    def draw_rect(self, color, rect):
+        self.renderer.draw_color = tuple(color)[:3] + (255,)
+        self.renderer.fill_rect(rect)
+
+    def draw_overlay(self, overlay):
+        lines = overlay.state()
+        if lines is None:
+            return
+        panel = overlay.panel()
+        texture = self._overlay_texture
+        if texture is None or (texture.width, texture.height) != panel.get_size():
+            texture = self._overlay_texture = video.Texture(self.renderer, panel.get_size(),
+                                                            streaming=True)
+            texture.blend_mode = BLEND
+            self._overlay_lines = None
+        if lines is not self._overlay_lines:
+            texture.update(panel)
+            self._overlay_lines = lines
+        texture.draw(dstrect=overlay.rect.topleft)
+
+    def present(self):
+        self.renderer.present()
+
+    def present_canvas(self, rects):
+        """Copy the canvas rects that changed to its texture and show the whole canvas."""
+        screen_rect = self.get_rect()
+        if self._canvas_texture is None:
+            self._canvas_texture = video.Texture(self.renderer, self.window.size, streaming=True)
+            rects = [screen_rect]  # a new texture holds garbage
+        for rect in rects:
+            rect = screen_rect.clip(rect)
+            if rect:
+                self._canvas_texture.update(self.canvas.subsurface(rect), rect)
+        self._canvas_texture.draw()
+        self.renderer.present()
+
+    def screenshot(self):
+        """The current frame as a surface (slow; for tests)."""
+        return self.renderer.to_surface()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Drawing functions shared by the display scripts.
+
+Everything here draws onto the surface it is given, with the fonts it is
+given, so the module can be imported (and benchmarked, see render_bench.py)
+without opening a window or connecting to a broker.
+"""
+
+import math
+import time
+
+import pygame
+
+import bar_meter
+import cyclic
+import gradient_cache
+import ring_atlas
+import text_cache
+
+# Looping effects, pre-rendered per phase (see cyclic.py)
+RADAR_PULSE_PERIOD = 2 * math.pi / 2.7  # seconds; the old per-frame pulse at 30 fps
+RADAR_PULSE_FRAMES = 16  # ring alphas are quantized (ring_atlas.ALPHA_STEP), few more differ
+NO_DATA_PULSE_PERIOD = math.pi  # seconds for one +-5% breath of the "?"
+NO_DATA_PULSE_FRAMES = 32  # under a pixel of growth between frames
+
+
+def draw_button(surface, font, text, x, y, w, h, color, text_color=(255, 255, 255)):
+    """Draws a button and returns the Rect for click detection."""
+    # Draw button rectangle
+    pygame.draw.rect(surface, color, (x, y, w, h), border_radius=8)
+    # Draw border
+    border_color = (max(color[0] - 40, 0), max(color[1] - 40, 0), max(color[2] - 40, 0))
+    pygame.draw.rect(surface, border_color, (x, y, w, h), 3, border_radius=8)
+    # Render label
+    label = text_cache.render(font, text, True, text_color)
+    surface.blit(label, (x + (w - label.get_width())//2, y + (h - label.get_height())//2))
+    return pygame.Rect(x, y, w, h)
+
+
+def draw_radar(surface, cx, cy, max_radius, distance_value, faded=False):
+    """
+    Draw a radar-like circular pulse. If distance_value provided, scale pulse.
+    Without one the pulse only depends on the time, so it is a pre-rendered
+    frame (one blit).
+    """
+    if distance_value is None:
+        _radar_pulse(max_radius, faded).blit(surface, (cx, cy))
+        return
+    # Map the distance to 0..1 (clamp)
+    norm = max(0.0, min(1.0, distance_value / bar_meter.METER_RANGE))
+    phase = time.monotonic() / RADAR_PULSE_PERIOD % 1.0
+    _draw_radar(surface, cx, cy, max_radius, norm, phase, faded)
+
+
+def _draw_radar(surface, cx, cy, max_radius, norm, phase, faded):
+    # number of rings and animated offset
+    rings = 4
+    offset = (math.sin(2 * math.pi * phase) + 1) / 2  # 0..1
+    for i in range(rings):
+        r = max_radius * ((i + 1) / float(rings)) * (0.6 + 0.4 * (1 - norm))
+        alpha = int(70 * (1 - (i / rings)) * (0.6 + 0.4 * offset))
+        base_color = (30, 200 - i * 30, 120 + i * 20)
+        color = tuple([c if not faded else int(0.5*c+60) for c in base_color])
+        ring_atlas.blit_ring(surface, (cx, cy), r, color, alpha, width=6)
+
+    # center dot
+    dot_r = 10 + int(10 * (1 - norm))
+    dot_color = (255, 255, 255) if not faded else (180, 180, 180)
+    pygame.draw.circle(surface, dot_color, (cx, cy), dot_r)
+    pygame.draw.circle(surface, (0, 0, 0), (cx, cy), dot_r, 2)
+
+
+def radar_frame(max_radius, faded=False):
+    """
+    The frame draw_radar shows now without a distance. Identical frames are
+    the same surface, so a dirty-rect widget can use it as its state.
+    """
+    return _radar_pulse(max_radius, faded).frame()
+
+
+def _radar_pulse(max_radius, faded):
+    return cyclic.animation(("radar", max_radius, faded),
+                            lambda: _radar_animation(max_radius, faded))
+
+
+def _radar_animation(max_radius, faded):
+    half = int(max_radius * 0.8) + 4  # outer ring at norm 0.5, plus rounding
+    return cyclic.CyclicAnimation(
+        (half * 2, half * 2), RADAR_PULSE_PERIOD, RADAR_PULSE_FRAMES,
+        lambda canvas, phase: _draw_radar(canvas, half, half, max_radius, 0.5, phase, faded),
+        anchor=(half, half))
+
+
+def draw_bar_meter(surface, fonts, x, y, w, h, distance_value, faded=False):
+    """
+    Horizontal bar from left (near) to right (far), with the value to its
+    right. fonts is (label font, "waiting" font).
+    """
+    label_font, waiting_font = fonts
+    if distance_value is None:
+        # If no data, show an animated scanning segment
+        pygame.draw.rect(surface, (40, 40, 40), (x, y, w, h), border_radius=6)
+        t = time.time()
+        scan_w = w // 6
+        scan_x = x + int(((math.sin(t * 1.5) + 1) / 2) * (w - scan_w))
+        grad = gradient_cache.scanner_gradient(scan_w, h)
+        surface.blit(grad, (scan_x, y))
+        label = text_cache.render(waiting_font, "Waiting for sensor...", True, (200, 200, 200))
+        surface.blit(label, (x + 8, y + (h - label.get_height())//2))
+    else:
+        bar_meter.draw_bar(surface, x, y, w, h, distance_value, faded)
+        # numeric label
+        lbl = f"{int(distance_value)} cm"
+        label_color = (230, 230, 230) if not faded else (160, 160, 160)
+        label = text_cache.render(label_font, lbl, True, label_color)
+        surface.blit(label, (x + w + 16, y + (h - label.get_height())//2))
+
+
+def draw_no_data(surface, fonts, cx, cy):
+    """
+    Big pulsing question mark when no data. fonts is (big font, small font).
+    The "?" and its label are pre-rendered per phase of the pulse.
+    """
+    _no_data_pulse(fonts).blit(surface, (cx, cy))
+
+
+def no_data_frame(fonts):
+    """The frame draw_no_data shows now (see radar_frame)."""
+    return _no_data_pulse(fonts).frame()
+
+
+def _no_data_pulse(fonts):
+    return cyclic.animation(("no_data",) + tuple(fonts), lambda: _no_data_animation(*fonts))
+
+
+def _no_data_animation(font_big, font_small):
+    q = font_big.render("?", True, (200, 200, 200))
+    label = font_small.render("No data yet", True, (180, 180, 180))
+    q_max = pygame.transform.rotozoom(q, 0, 1.05)  # largest frame
+    size = (max(q_max.get_width(), label.get_width()),
+            q_max.get_height() + 8 + label.get_height())
+
+    def render(canvas, phase):
+        # "?" centred on the anchor, label 8 px under it
+        scale = 1.0 + 0.05 * math.sin(2 * math.pi * phase)
+        qs = pygame.transform.rotozoom(q, 0, scale)
+        top = q_max.get_height() // 2 - qs.get_height() // 2
+        canvas.blit(qs, (size[0] // 2 - qs.get_width() // 2, top))
+        canvas.blit(label, (size[0] // 2 - label.get_width() // 2, top + qs.get_height() + 8))
+
+    return cyclic.CyclicAnimation(size, NO_DATA_PULSE_PERIOD, NO_DATA_PULSE_FRAMES, render,
+                                  anchor=(size[0] // 2, q_max.get_height() // 2))
+
+
+def draw_band_screen(surface, font, distance, prompt=None, band=None):
+    """
+    Full-screen colour for the distance band with "Name (N cm)", or the
+    prompt text on the default background when prompt is given. band is the
+    (colour, name) to show instead of looking the distance up.
+    """
+    surface.fill((30, 30, 30))  # default background
+    if prompt is not None:
+        label = text_cache.render(font, prompt, True, (200, 200, 200))
+    else:
+        color, name = band or bar_meter.band(distance)
+        surface.fill(color)
+        label = text_cache.render(font, f"{name} ({distance} cm)", True, (0, 0, 0))
+    surface.blit(label, (40, surface.get_height()//2 - 24))
+
+
+class BandScreen:
+    """
+    draw_band_screen that repaints only what changed: the whole screen when
+    the band or the prompt changes, the label row when only the number does,
+    and nothing otherwise. The band is chosen with hysteresis (see banding.py).
+    """
+
+    def __init__(self, surface, font):
+        self.surface = surface
+        self.font = font
+        self.banding = bar_meter.make_banding()
+        self._shown = None  # (prompt, band index) on screen
+        self._text = None   # band label on screen
+
+    def invalidate(self):
+        """Repaint everything on the next draw (e.g. under a hidden overlay)."""
+        self._shown = None
+
+    def draw(self, distance, prompt=None):
+        """Returns the rects to push to the display; empty when nothing changed."""
+        surface = self.surface
+        if prompt is not None:
+            self.banding.reset()  # the next reading picks its band afresh
+            shown, text = (prompt, None), None
+        else:
+            self.banding.update(distance)
+            color, name = self.banding.value
+            shown, text = (None, self.banding.index), f"{name} ({distance} cm)"
+        if shown != self._shown:
+            draw_band_screen(surface, self.font, distance, prompt, self.banding.value)
+            self._shown, self._text = shown, text
+            return [surface.get_rect()]
+        if text == self._text:
+            return []
+        # Same band, new number: repaint the label row only
+        label = text_cache.render(self.font, text, True, (0, 0, 0))
+        row = pygame.Rect(0, surface.get_height()//2 - 24, surface.get_width(), label.get_height())
+        surface.fill(color, row)
+        surface.blit(label, (40, row.y))
+        self._text = text
+        return [row]